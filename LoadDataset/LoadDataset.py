@@ -1,37 +1,556 @@
 import os
-import io
 import gzip
+import shutil
+import inspect
 import zipfile
-import requests
+import tempfile
 import pandas as pd
-from tqdm import tqdm
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .download import download_file, fetch_archive, read_archive_meta, set_revalidate_ttl, new_session, using_session
+from .stream import open_remote_stream
+from .pipeline import open_pipeline
+from .parsing import check_engine, read_csv
+from .dtypes import apply_dtype_policy, check_dtype_policy, parse_dtypes
+from .encoding import codes_dtype, decode_column, encode_column, encode_columns
+from .cache import CacheWriter, iter_frames, read_dataset, split_target, write_frame, set_cache_format, migrate_cache, load_numpy, read_categories, with_categories
+from .uci import fetch_uci, set_fetch_function
+from .memo import memoized, set_memory_budget, get_memory_budget, clear_memory_cache, memory_cache_info
+from .shared import shared, enable_shared_memory, set_shared_dir, get_shared_dir, entry_path, publish_frame, attach, release, references, collect_shared
+from .instrument import Span, add_listener, remove_listener, recording, instrumented, span, timed_reader
+from .store import CacheEntryWriter, cache_enabled, cached_entry, cached_path, store_frame, set_cache_dir, get_cache_dir, set_store_format, get_store_format, enable_cache, verify_cache, clear_cache, read_manifest, describe
+from .stats import StatsAccumulator, frame_stats
+from .shards import SHARD_ROWS, SAMPLER_BUFFER_SHARDS, SAMPLER_PREFETCH, MinibatchSampler, ShardedDataset, ShardWriter, read_shard_index, shard_dir, write_shards
+from .splits import OFFICIAL_TEST_ROWS, check_split, split_indices, load_split, read_split, write_split, take_split, splittable
+from .scaling import SCALE_METHODS, check_scale, fit_scale, apply_scale, scale_features, with_scale
 
-def load_susy(debug=False, save_path=None, load_path=None):
+
+SUSY_URL = 'https://archive.ics.uci.edu/static/public/279/susy.zip'
+HIGGS_URL = 'https://archive.ics.uci.edu/static/public/280/higgs.zip'
+KDD99_URL = 'http://kdd.ics.uci.edu/databases/kddcup99/kddcup.data.gz'
+
+# Number of rows loaded by preview
+PREVIEW_ROWS = 1000
+
+# Feature groups of HIGGS and SUSY, as column labels of the CSV (the target is column 0)
+HIGGS_FEATURE_GROUPS = {'low_level': list(range(1, 22)), 'high_level': list(range(22, 29))}
+SUSY_FEATURE_GROUPS = {'raw': list(range(1, 9)), 'derived': list(range(9, 19))}
+
+# Source recorded in the local cache manifest of the datasets fetched with ucimlrepo
+UCIMLREPO_SOURCE = 'ucimlrepo:{}'
+
+# Number of datasets load_many loads at the same time by default
+LOAD_MANY_WORKERS = 4
+
+
+def _kept_archive(url, download_path):
+    # Path of the archive kept in download_path
+    return os.path.join(download_path, os.path.basename(url))
+
+
+def _revalidate_archive(url, desc, download_path=None, segments=None):
+    """
+    Check that the archive kept in download_path is the current version, downloading the new one if it changed upstream.
+    """
+
+    if not download_path or not os.path.exists(_kept_archive(url, download_path)):
+        return
+
+    with span('download', url=url, revalidate=True) as the_span:
+        if fetch_archive(url, _kept_archive(url, download_path), desc=desc, segments=segments):
+            the_span.set(bytes=os.path.getsize(_kept_archive(url, download_path)))
+
+
+def _archive_source(url, download_path=None):
+    """
+    Source recorded in the local dataset cache for a downloaded archive.
+
+    The ETag (or Last-Modified) of an archive kept in download_path is part of
+    it, so a copy cached from an older version of the archive is not used.
+    """
+
+    if not download_path:
+        return url
+
+    meta = read_archive_meta(_kept_archive(url, download_path), url)
+    validator = meta.get('etag') or meta.get('last_modified')
+
+    return f"{url}#{validator}" if validator else url
+
+
+@contextmanager
+def _open_remote_csv(url, desc, member=None, download_path=None, segments=None, stream=False, pipeline=False):
+    """
+    Download an archive to disk and open the CSV inside it as a stream.
+
+    The archive is spooled to ``download_path`` (kept for later calls) or to a
+    temporary directory (removed on exit), and decompressed lazily while it is
+    read, so only the parsed DataFrame is ever held in memory.
+
+    :param url: URL of the archive
+    :param desc: Description shown on the progress bar
+    :param member: Name of the gzip member inside a zip archive, or None if the archive is a plain gzip file
+    :param download_path: If provided, keep the downloaded archive in this directory and reuse it on later calls
+    :param segments: If greater than 1, download the archive as this many concurrent byte ranges
+    :param stream: If True and the archive is not in download_path, read it straight from the connection instead of downloading it, for when only the first rows are needed
+    :param pipeline: If True, download and decompress the archive on background threads while the CSV is parsed (see open_pipeline). Without download_path, nothing is written to disk
+
+    :return: A binary file object with the decompressed CSV
+    """
+
+    if stream and not (download_path and os.path.exists(_kept_archive(url, download_path))):
+        # The download happens inside the reads, so it is part of the decompress span
+        with open_remote_stream(url, member=member) as the_file:
+            with timed_reader(the_file, streamed=True) as the_file:
+                yield the_file
+        return
+
+    if pipeline and not download_path:
+        with open_pipeline(url, member=member) as the_file:
+            yield the_file
+        return
+
+    tmp_dir = None
+    if download_path:
+        os.makedirs(download_path, exist_ok=True)
+        archive_dir = download_path
+    else:
+        tmp_dir = archive_dir = tempfile.mkdtemp(prefix='LoadDataset-')
+
+    try:
+        archive = _kept_archive(url, archive_dir)
+        if not os.path.exists(archive):
+            with span('download', url=url, segments=segments) as the_span:
+                if download_path:
+                    # Kept archives record their validators, to be revalidated later
+                    fetch_archive(url, archive, desc=desc, segments=segments)
+                else:
+                    download_file(url, archive, desc=desc, segments=segments)
+                the_span.set(bytes=os.path.getsize(archive))
+
+        if pipeline:
+            with open_pipeline(archive, member=member) as the_file:
+                yield the_file
+        elif member is None:
+            with gzip.open(archive) as the_file:
+                with timed_reader(the_file) as the_file:
+                    yield the_file
+        else:
+            with zipfile.ZipFile(archive) as the_zip:
+                with the_zip.open(member) as gz_file:
+                    with gzip.open(gz_file) as the_file:
+                        with timed_reader(the_file) as the_file:
+                            yield the_file
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+# Categorical columns of kddcup.data (protocol_type, service, flag and the label)
+KDD99_CATEGORICAL = [1, 2, 3, 41]
+
+# Float columns of kddcup.data (the *_rate features)
+KDD99_FLOAT = list(range(24, 31)) + list(range(33, 41))
+
+
+def _iter_cached_batches(load_path, name, chunksize, cache_format=None, dtype_policy=None, nrows=None, columns=None):
+    """
+    Yield (data, target) batches of chunksize rows from a dataset saved with save_path,
+    stopping after nrows rows if nrows is provided.
+    """
+
+    categories = read_categories(load_path, name)
+    for df in iter_frames(load_path, name, chunksize, cache_format, dtype_policy, columns):
+        if nrows is not None:
+            df = df.iloc[:nrows]
+            nrows -= len(df)
+
+        data, target = split_target(df)
+        yield with_categories(data, categories), with_categories(target, categories)
+
+        if nrows == 0:
+            return
+
+
+def _read_cached_rows(load_path, name, nrows, cache_format=None, dtype_policy=None, columns=None, scale=None):
+    """
+    Load the first nrows rows of a dataset saved with save_path, without reading the rest.
+
+    Features are scaled with the statistics of the whole dataset, as a full load scales them.
+    """
+
+    # A chunk of at least one row, so that nrows=0 still reads the labels and types of the columns
+    data, target = next(_iter_cached_batches(load_path, name, max(nrows, 1), cache_format, dtype_policy, nrows=nrows, columns=columns))
+    if scale:
+        data = _scaled(data, scale, data.attrs.get('categories'), describe(name, load_path, cache_format))
+
+    return data, target
+
+
+def _iter_frame_batches(data, target, chunksize):
+    """
+    Yield (data, target) batches of chunksize rows of a loaded dataset.
+    """
+
+    for start in range(0, len(target), chunksize):
+        yield data.iloc[start:start + chunksize], target.iloc[start:start + chunksize]
+
+
+def _check_partial(save_path, nrows=None, columns=None):
+    # A partial dataset must never end up where a later call would take it for the whole one
+    if save_path and (nrows is not None or columns is not None):
+        raise ValueError("nrows and columns only load part of the dataset, they cannot be combined with save_path")
+
+
+def _check_scale(scale, chunksize=None):
+    # Batches cannot be scaled by statistics of the rows they have not seen yet
+    check_scale(scale)
+    if scale and chunksize:
+        raise ValueError("scale cannot be combined with chunksize, scale the batches with apply_scale(batch, fit_scale(describe(name), scale))")
+
+
+def _scaled(data, scale, categories=None, stats=None):
+    """
+    Scale the features of a loaded dataset that may share its memory with a cache, in a copy.
+    """
+
+    if not scale:
+        return data
+
+    data = data.copy()
+    return with_scale(data, scale_features(data, scale, stats, target_column=None, categories=categories))
+
+
+def _written_stats(name, save_path, cache_format, stored):
+    # Statistics computed while the caches of a cold load were written, so scaling needs no other pass over the data
+    if save_path:
+        return describe(name, save_path, cache_format)
+
+    return describe(name) if stored else None
+
+
+def _select_columns(columns, groups, n_columns):
+    """
+    Resolve the columns argument of a loader into the sorted labels of the feature columns.
+
+    :param columns: None, a feature group name, a column label, or a list of them
+    :param groups: The {name: column labels} feature groups of the dataset
+    :param n_columns: Number of columns of the CSV, the target included
+
+    :return: A list of column labels, or None for every column
+    """
+
+    if columns is None:
+        return None
+
+    if isinstance(columns, (str, int)):
+        columns = [columns]
+
+    selected = set()
+    for col in columns:
+        if col in groups:
+            selected.update(groups[col])
+        elif str(col).isdigit() and 1 <= int(col) < n_columns:
+            selected.add(int(col))
+        else:
+            raise ValueError(f"Unknown column {col!r}. Choose among the feature groups {sorted(groups)} or the column labels 1 to {n_columns - 1}")
+
+    return sorted(selected)
+
+
+def _batch_writers(name, source, save_path, cache, cache_format, dtype_policy):
+    """
+    Writers filled by a batch iterator: the save_path cache and the local dataset cache.
+    """
+
+    writers = []
+    if save_path:
+        writers.append(CacheWriter(save_path, name, cache_format))
+    if cache_enabled(cache):
+        writers.append(CacheEntryWriter(name, source, cache_format, dtype_policy))
+
+    return writers
+
+
+def _iter_remote_batches(name, url, desc, n_columns, chunksize, member=None, download_path=None, save_path=None,
+                         cache_format=None, dtype_policy=None, segments=None, cache=None, columns=None, pipeline=False):
+    """
+    Yield (data, target) batches of chunksize rows while streaming through a
+    downloaded SUSY or HIGGS archive, parsing only the target and columns if
+    columns is provided.
+    """
+
+    names = [i for i in range(0, n_columns)]
+    usecols = None if columns is None else [0] + columns
+    dtype = parse_dtypes(dtype_policy, usecols or names, float_columns=names, target=0)
+
+    writers = []
+    try:
+        with _open_remote_csv(url, desc, member=member, download_path=download_path, segments=segments,
+                              pipeline=pipeline) as the_file:
+            writers = _batch_writers(name, _archive_source(url, download_path), save_path, cache, cache_format, dtype_policy)
+            for df in pd.read_csv(the_file, names=names, usecols=usecols, dtype=dtype, chunksize=chunksize):
+                data, target = split_target(df)
+                data = apply_dtype_policy(data.copy(deep=False), dtype_policy, downcast_integers=False)
+                target = apply_dtype_policy(target, dtype_policy, downcast_integers=False)
+                for writer in writers:
+                    writer.write(pd.concat([target, data], axis=1))
+                yield data, target
+    except BaseException:
+        # A stream stopped early must not leave a truncated cache behind
+        for writer in writers:
+            writer.abort()
+        raise
+
+    for writer in writers:
+        writer.close()
+
+
+def _kdd99_vocabulary(the_file, chunksize):
+    """
+    Collect the sorted categories of every KDD99 categorical column in one pass.
+
+    Sorting matches the codes encode_columns assigns when it sees the whole
+    column, so batches encoded with this vocabulary agree with a full load.
+    """
+
+    values = {col: set() for col in KDD99_CATEGORICAL}
+    for df in pd.read_csv(the_file, header=None, usecols=KDD99_CATEGORICAL, chunksize=chunksize):
+        for col in KDD99_CATEGORICAL:
+            values[col].update(df[col].unique())
+
+    return {col: sorted(values[col]) for col in KDD99_CATEGORICAL}
+
+
+def _kdd99_categories(categories):
+    # The label column is saved as the target, its categories go by that name
+    categories['target'] = categories.pop(str(KDD99_CATEGORICAL[-1]))
+    return categories
+
+
+def _kdd99_frame(kdd9):
+    # The caches hold the label first, as the target column. The columns are
+    # put in that order without copying them, the frame is only written out
+    columns = {'target': kdd9.iloc[:, -1], **{col: kdd9[col] for col in kdd9.columns[:-1]}}
+    return pd.DataFrame(columns, copy=False)
+
+
+def _kdd99_parse_dtypes(dtype_policy):
+    # The categorical columns are encoded after parsing, the policy applies to them afterwards
+    columns = [col for col in range(0, 42) if col not in KDD99_CATEGORICAL]
+    return parse_dtypes(dtype_policy, columns, float_columns=KDD99_FLOAT)
+
+
+def _iter_kdd99_batches(chunksize, download_path=None, save_path=None, cache_format=None, dtype_policy=None, segments=None,
+                        cache=None):
+    """
+    Yield label encoded (data, target) batches of chunksize rows while
+    streaming through the downloaded KDD99 archive.
+    """
+
+    writers = []
+    try:
+        with _open_remote_csv(KDD99_URL, 'Download KDD99 Dataset', download_path=download_path, segments=segments) as the_file:
+            writers = _batch_writers('kdd99', _archive_source(KDD99_URL, download_path), save_path, cache, cache_format, dtype_policy)
+            vocabulary = _kdd99_vocabulary(the_file, chunksize)
+            the_file.seek(0)
+
+            # Codes get the smallest type for the vocabulary, the same type a full load gives them
+            dtypes = {col: codes_dtype(len(categories), dtype_policy) for col, categories in vocabulary.items()}
+            dtype = _kdd99_parse_dtypes(dtype_policy)
+
+            categories = _kdd99_categories({str(col): categories for col, categories in vocabulary.items()})
+            for writer in writers:
+                writer.write_categories(categories)
+
+            for df in pd.read_csv(the_file, header=None, dtype=dtype, chunksize=chunksize):
+                for col, known in vocabulary.items():
+                    df[col] = encode_column(df[col], known, dtypes[col])[0]
+
+                data, target = split_target(df, -1)
+                with_categories(data, categories)
+                with_categories(target, categories)
+                data = apply_dtype_policy(data.copy(deep=False), dtype_policy, downcast_integers=False)
+                target = apply_dtype_policy(target, dtype_policy, downcast_integers=False)
+                for writer in writers:
+                    writer.write(pd.concat([target, data], axis=1))
+                yield data, target
+    except BaseException:
+        # A stream stopped early must not leave a truncated cache behind
+        for writer in writers:
+            writer.abort()
+        raise
+
+    for writer in writers:
+        writer.close()
+
+
+def iter_batches(name, chunksize=100000, **kwargs):
+    """
+    Iterate over SUSY, HIGGS or KDD99 in (data, target) batches of chunksize rows.
+
+    The dataset is streamed from load_path or from the downloaded archive and
+    is never held whole in memory, which makes it suitable for incremental
+    training with partial_fit.
+
+    :param name: Name of the dataset, one of 'susy', 'higgs' or 'kdd99'
+    :param chunksize: Number of rows per batch
+    :param kwargs: Further arguments passed to the loader (save_path, load_path, download_path, ...)
+
+    :return: An iterator of (data, target) tuples
+    """
+
+    loaders = {'susy': load_susy, 'higgs': load_higgs, 'kdd99': load_kdd99}
+    if name not in loaders:
+        raise ValueError(f"Batch iteration is not available for {name!r}. Choose one of {sorted(loaders)}")
+
+    return loaders[name](chunksize=chunksize, **kwargs)
+
+
+def preview(name, nrows=PREVIEW_ROWS, **kwargs):
+    """
+    Load the first nrows rows of SUSY, HIGGS or KDD99.
+
+    The archive is decompressed and parsed straight from the connection,
+    which is closed as soon as the rows are parsed, so only the bytes they
+    come from are downloaded. Useful for smoke tests and exploration.
+
+    :param name: Name of the dataset, one of 'susy', 'higgs' or 'kdd99'
+    :param nrows: Number of rows to load
+    :param kwargs: Further arguments passed to the loader (load_path, dtype_policy, ...)
+
+    :return: A tuple containing the data and target variables
+    """
+
+    loaders = {'susy': load_susy, 'higgs': load_higgs, 'kdd99': load_kdd99}
+    if name not in loaders:
+        raise ValueError(f"Preview is not available for {name!r}. Choose one of {sorted(loaders)}")
+
+    return loaders[name](nrows=nrows, **kwargs)
+
+
+def open_shards(name, shard_rows=None, load_path=None, cache=None, **kwargs):
+    """
+    Open SUSY, HIGGS or KDD99 as fixed-size row shards, for random access to any row.
+
+    The shards are written next to the dataset (in load_path or the entry of
+    the local dataset cache) the first time, from the cache read in batches.
+    A dataset found in neither place is first streamed into it in batches,
+    so it is never held whole in memory.
+
+    :param name: Name of the dataset, one of 'susy', 'higgs' or 'kdd99'
+    :param shard_rows: Number of rows per shard, defaults to SHARD_ROWS; shards of another size are written again
+    :param load_path: Directory of a dataset saved with save_path, where it is saved first if it does not exist
+    :param cache: If False, skip the local dataset cache (load_path is then required); None uses the global setting
+    :param kwargs: Further arguments passed to the loader to build the cache (download_path, cache_format, dtype_policy, ...)
+
+    :return: A ShardedDataset
+    """
+
+    urls = {'susy': SUSY_URL, 'higgs': HIGGS_URL, 'kdd99': KDD99_URL}
+    if name not in urls:
+        raise ValueError(f"Shards are not available for {name!r}. Choose one of {sorted(urls)}")
+
+    path = load_path if load_path and os.path.exists(load_path) else None
+    if path is None:
+        if not load_path and not cache_enabled(cache):
+            raise ValueError("open_shards writes the shards next to the dataset, it needs load_path or the local dataset cache")
+
+        if not load_path:
+            path = cached_path(name, _archive_source(urls[name], kwargs.get('download_path')), cache,
+                               kwargs.get('cache_format'), kwargs.get('dtype_policy'))
+        if path is None:
+            for _ in iter_batches(name, shard_rows or SHARD_ROWS, save_path=load_path, cache=cache, **kwargs):
+                pass
+            path = load_path or cached_entry(name)
+
+    index = read_shard_index(path, name)
+    if index is None or (shard_rows and index['shard_rows'] != shard_rows):
+        write_shards(path, name, shard_rows)
+
+    return ShardedDataset(path, name)
+
+
+def minibatch_sampler(name, batch_size, seed=0, shard_rows=None, buffer_shards=None, prefetch=None, drop_last=False, **kwargs):
+    """
+    Shuffled minibatches of SUSY, HIGGS or KDD99 for SGD-style training, read from shards on a background thread.
+
+    Every epoch visits the shards in a random order and shuffles the rows of
+    buffer_shards shards at a time, so memory stays bounded whatever the size
+    of the dataset. Iterate over the sampler once per epoch.
+
+    :param name: Name of the dataset, one of 'susy', 'higgs' or 'kdd99'
+    :param batch_size: Number of rows per minibatch
+    :param seed: Seed of the shuffle, combined with the epoch number
+    :param shard_rows: Number of rows per shard, see open_shards
+    :param buffer_shards: Number of shards shuffled together, defaults to SAMPLER_BUFFER_SHARDS
+    :param prefetch: Number of minibatches prepared ahead, defaults to SAMPLER_PREFETCH
+    :param drop_last: If True, skip the last minibatch of an epoch when it is smaller than batch_size
+    :param kwargs: Further arguments passed to open_shards (load_path, cache, download_path, ...)
+
+    :return: A MinibatchSampler, yielding (data, target) tuples indexed by row number
+    """
+
+    return MinibatchSampler(open_shards(name, shard_rows, **kwargs), batch_size, seed, buffer_shards, prefetch, drop_last)
+
+
+@splittable('susy')
+@instrumented('susy')
+@memoized('susy')
+@shared('susy')
+def load_susy(debug=False, save_path=None, load_path=None, download_path=None, chunksize=None, cache_format=None, dtype_policy=None,
+              engine='c', workers=None, segments=None, cache=None, nrows=None, columns=None, pipeline=False, scale=None,
+              split=None, seed=0):
     """
     Load the SUSY dataset from the UCI Machine Learning Repository.
 
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process (use nrows to load a subset)
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param download_path: If provided, keep the downloaded archive in this directory instead of a temporary one
+    :param chunksize: If provided, return an iterator of (data, target) batches with this many rows instead of the full dataset
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param engine: Parser used for the downloaded CSV: 'c' (single core), 'pyarrow' (multithreaded, correctly rounded floats) or 'parallel' (C parser on a thread pool, identical to 'c')
+    :param workers: Number of threads of the 'parallel' engine, defaults to the number of CPUs
+    :param segments: If greater than 1, download the archive as this many concurrent byte ranges when the server supports it
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param nrows: If provided, only load the first nrows rows: the archive is streamed and the connection closed once they are parsed. Nothing is saved or cached
+    :param columns: If provided, only parse and return these features: 'raw' (the 8 kinematic properties), 'derived' (the 10 functions of them), column labels 1 to 18, or a list of them. Nothing is saved or cached
+    :param pipeline: If True, download, decompress and parse the archive at the same time on separate threads exchanging bounded buffers, instead of one after the other. Without download_path the archive is never written to disk; with it, the archive is downloaded first and only decompression overlaps parsing
+    :param scale: If provided, 'standard' or 'minmax': scale the features in place as they are loaded, with the statistics saved with the cache when there is one. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: 'official' for the original split (the last 500,000 rows are the test set, sliced without a copy), or (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of a split given as fractions
 
     :return: A tuple containing the data and target variables
 
 
     """
 
+    check_dtype_policy(dtype_policy)
+    check_engine(engine)
+    _check_partial(save_path, nrows, columns)
+    _check_scale(scale, chunksize)
+    columns = _select_columns(columns, SUSY_FEATURE_GROUPS, 19)
+
+    if not (load_path and os.path.exists(load_path)):
+        _revalidate_archive(SUSY_URL, 'Download Susy Dataset', download_path, segments)
+
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('susy', _archive_source(SUSY_URL, download_path), cache, cache_format, dtype_policy) or load_path
+
     if load_path and os.path.exists(load_path):
         print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'susy.csv'))
- 
-
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+        if chunksize:
+            return _iter_cached_batches(load_path, 'susy', chunksize, cache_format, dtype_policy, nrows, columns)
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+        if nrows is not None:
+            data, target = _read_cached_rows(load_path, 'susy', nrows, cache_format, dtype_policy, columns, scale)
+        else:
+            data, target = read_dataset(load_path, 'susy', cache_format, dtype_policy, columns, scale)
 
         if debug:
 
@@ -43,90 +562,118 @@ def load_susy(debug=False, save_path=None, load_path=None):
         return data,target
 
 
-    url = 'https://archive.ics.uci.edu/static/public/279/susy.zip'
-    response = requests.get(url, stream=True)
+    if chunksize and nrows is None:
+        return _iter_remote_batches('susy', SUSY_URL, 'Download Susy Dataset', 19, chunksize, member='SUSY.csv.gz',
+                                    download_path=download_path, save_path=save_path, cache_format=cache_format,
+                                    dtype_policy=dtype_policy, segments=segments, cache=cache if columns is None else False,
+                                    columns=columns, pipeline=pipeline)
 
-    if response.status_code == 200:
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 1024
-        t = tqdm(total=total_size, unit='iB', unit_scale=True, desc='Download Susy Dataset')
+    with _open_remote_csv(SUSY_URL, 'Download Susy Dataset', member='SUSY.csv.gz', download_path=download_path, segments=segments,
+                          stream=nrows is not None, pipeline=pipeline) as the_file:
+        # Load the full CSV into a DataFrame
+        print("Load CSV into DataFrame")
+        names = [i for i in range(0, 19)]
+        usecols = None if columns is None else [0] + columns
+        df = read_csv(the_file, engine=engine, workers=workers, names=names, usecols=usecols, nrows=nrows,
+                      dtype=parse_dtypes(dtype_policy, usecols or names, float_columns=names, target=0))
 
-        file_buffer = io.BytesIO()
-        for data in response.iter_content(block_size):
-            t.update(len(data))
-            file_buffer.write(data)
-        t.close()
+    df = apply_dtype_policy(df, dtype_policy, target=0)
 
-        file_buffer.seek(0)
-
-        with zipfile.ZipFile(file_buffer) as the_zip:
-            with the_zip.open('SUSY.csv.gz') as gz_file:
-                with gzip.open(gz_file) as the_file:
-                    # Load the full CSV into a DataFrame
-                    print("Load CSV into DataFrame")
-                    the_file.seek(0)
-                    df = pd.read_csv(the_file, names=[i for i in range(0, 19)])
+    saved = None
+    if save_path:
+        # Ensure the save path exists
+        os.makedirs(save_path, exist_ok=True)
 
-                    # Rename the first column to 'target' and separate it as a Series
-                    target = df.iloc[:, 0]
-                    target.name = 'target'
+        if debug:
+            print(f"Saving dataset to {save_path}")
 
-                    # Get the remaining columns as a DataFrame
-                    data = df.iloc[:, 1:]
+        saved = write_frame(df, save_path, 'susy', cache_format)
 
-                    if save_path:
-                        # Ensure the save path exists
-                        os.makedirs(save_path, exist_ok=True)
+    stored = cache_enabled(cache) and nrows is None and columns is None
+    if stored:
+        store_frame('susy', _archive_source(SUSY_URL, download_path), df, cache_format, dtype_policy, saved=saved)
 
-                        if debug:
-                            print(f"Saving dataset to {save_path}")
-                       
-                        df.to_csv(os.path.join(save_path, 'susy.csv'), index=False)
-           
+    params = None
+    if scale:
+        # The caches hold the raw values; the features are scaled in place while df is the only owner of its columns
+        params = scale_features(df, scale, _written_stats('susy', save_path, cache_format, stored))
 
-                        
-                    if debug:
-                        print("="*100)
-                        print("Loaded SUSY dataset successfully. Returning data and target variables.")
-                        print("Link to dataset: https://archive.ics.uci.edu/ml/datasets/SUSY")
-                        print(f"Data: {data.shape}")
-                        print(f"Target: {target.shape}")
-                        print("="*100)
-                        
+    # Rename the first column to 'target' and separate it as a Series
+    target = df.iloc[:, 0]
+    target.name = 'target'
 
+    # Get the remaining columns as a DataFrame
+    data = with_scale(df.iloc[:, 1:], params)
 
+    if debug:
+        print("="*100)
+        print("Loaded SUSY dataset successfully. Returning data and target variables.")
+        print("Link to dataset: https://archive.ics.uci.edu/ml/datasets/SUSY")
+        print(f"Data: {data.shape}")
+        print(f"Target: {target.shape}")
+        print("="*100)
 
-                    return data, target
+    if chunksize:
+        return _iter_frame_batches(data, target, chunksize)
 
-    else:
-        ValueError(f"Failed to download dataset from {url}. Status code: {response.status_code}")
-        return None
+    return data, target
 
-def load_higgs(debug=False, save_path=None, load_path=None):
+@splittable('higgs')
+@instrumented('higgs')
+@memoized('higgs')
+@shared('higgs')
+def load_higgs(debug=False, save_path=None, load_path=None, download_path=None, chunksize=None, cache_format=None, dtype_policy=None,
+               engine='c', workers=None, segments=None, cache=None, nrows=None, columns=None, pipeline=False, scale=None,
+               split=None, seed=0):
     """
     Load the HIGGS dataset from the UCI Machine Learning Repository.
 
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process (use nrows to load a subset)
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param download_path: If provided, keep the downloaded archive in this directory instead of a temporary one
+    :param chunksize: If provided, return an iterator of (data, target) batches with this many rows instead of the full dataset
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param engine: Parser used for the downloaded CSV: 'c' (single core), 'pyarrow' (multithreaded, correctly rounded floats) or 'parallel' (C parser on a thread pool, identical to 'c')
+    :param workers: Number of threads of the 'parallel' engine, defaults to the number of CPUs
+    :param segments: If greater than 1, download the archive as this many concurrent byte ranges when the server supports it
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param nrows: If provided, only load the first nrows rows: the archive is streamed and the connection closed once they are parsed. Nothing is saved or cached
+    :param columns: If provided, only parse and return these features: 'low_level' (the 21 kinematic properties), 'high_level' (the 7 derived masses), column labels 1 to 28, or a list of them. Nothing is saved or cached
+    :param pipeline: If True, download, decompress and parse the archive at the same time on separate threads exchanging bounded buffers, instead of one after the other. Without download_path the archive is never written to disk; with it, the archive is downloaded first and only decompression overlaps parsing
+    :param scale: If provided, 'standard' or 'minmax': scale the features in place as they are loaded, with the statistics saved with the cache when there is one. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: 'official' for the original split (the last 500,000 rows are the test set, sliced without a copy), or (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of a split given as fractions
 
     :return: A tuple containing the data and target variables
 
 
     """
 
+    check_dtype_policy(dtype_policy)
+    check_engine(engine)
+    _check_partial(save_path, nrows, columns)
+    _check_scale(scale, chunksize)
+    columns = _select_columns(columns, HIGGS_FEATURE_GROUPS, 29)
+
+    if not (load_path and os.path.exists(load_path)):
+        _revalidate_archive(HIGGS_URL, 'Download Higgs Dataset', download_path, segments)
+
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('higgs', _archive_source(HIGGS_URL, download_path), cache, cache_format, dtype_policy) or load_path
+
     if load_path and os.path.exists(load_path):
         print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'higgs.csv'))
- 
-
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+        if chunksize:
+            return _iter_cached_batches(load_path, 'higgs', chunksize, cache_format, dtype_policy, nrows, columns)
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+        if nrows is not None:
+            data, target = _read_cached_rows(load_path, 'higgs', nrows, cache_format, dtype_policy, columns, scale)
+        else:
+            data, target = read_dataset(load_path, 'higgs', cache_format, dtype_policy, columns, scale)
 
         if debug:
 
@@ -138,86 +685,96 @@ def load_higgs(debug=False, save_path=None, load_path=None):
         return data,target
 
 
-    url = 'https://archive.ics.uci.edu/static/public/280/higgs.zip'
-    response = requests.get(url, stream=True)
-
-    if response.status_code == 200:
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 1024
-        t = tqdm(total=total_size, unit='iB', unit_scale=True, desc='Download Higgs Dataset')
-
-        file_buffer = io.BytesIO()
-        for data in response.iter_content(block_size):
-            t.update(len(data))
-            file_buffer.write(data)
-        t.close()
-
-        file_buffer.seek(0)
-
-        with zipfile.ZipFile(file_buffer) as the_zip:
-            with the_zip.open('HIGGS.csv.gz') as gz_file:
-                with gzip.open(gz_file) as the_file:
-                    # Load the full CSV into a DataFrame
-                    print("Load CSV into DataFrame")
-                    the_file.seek(0)
-                    df = pd.read_csv(the_file, names=[i for i in range(0, 29)])
-
-                    # Rename the first column to 'target' and separate it as a Series
-                    target = df.iloc[:, 0]
-                    target.name = 'target'
-
-                    # Get the remaining columns as a DataFrame
-                    data = df.iloc[:, 1:]
-
-                    if save_path:
-                        # Ensure the save path exists
-                        os.makedirs(save_path, exist_ok=True)
-
-
-                        if debug:
-                            print(f"Saving dataset to {save_path}")
-                       
-                        df.to_csv(os.path.join(save_path, 'higgs.csv'), index=False)
-           
-                    
-                    if debug:
-                        print("="*100)
-                        print("Loaded HIGGS dataset successfully. Returning data and target variables.")
-                        print("Link to dataset: https://archive.ics.uci.edu/ml/datasets/HIGGS")
-                        print(f"Data: {data.shape}")
-                        print(f"Target: {target.shape}")
-                        print("="*100)
-                    
-                    return data, target
-                
-    else:
-        ValueError(f"Failed to download dataset from {url}. Status code: {response.status_code}")
-        return None
-    
-def load_covtype(debug=False, save_path=None, load_path=None):
+    if chunksize and nrows is None:
+        return _iter_remote_batches('higgs', HIGGS_URL, 'Download Higgs Dataset', 29, chunksize, member='HIGGS.csv.gz',
+                                    download_path=download_path, save_path=save_path, cache_format=cache_format,
+                                    dtype_policy=dtype_policy, segments=segments, cache=cache if columns is None else False,
+                                    columns=columns, pipeline=pipeline)
+
+    with _open_remote_csv(HIGGS_URL, 'Download Higgs Dataset', member='HIGGS.csv.gz', download_path=download_path, segments=segments,
+                          stream=nrows is not None, pipeline=pipeline) as the_file:
+        # Load the full CSV into a DataFrame
+        print("Load CSV into DataFrame")
+        names = [i for i in range(0, 29)]
+        usecols = None if columns is None else [0] + columns
+        df = read_csv(the_file, engine=engine, workers=workers, names=names, usecols=usecols, nrows=nrows,
+                      dtype=parse_dtypes(dtype_policy, usecols or names, float_columns=names, target=0))
+
+    df = apply_dtype_policy(df, dtype_policy, target=0)
+
+    saved = None
+    if save_path:
+        # Ensure the save path exists
+        os.makedirs(save_path, exist_ok=True)
+
+        if debug:
+            print(f"Saving dataset to {save_path}")
+
+        saved = write_frame(df, save_path, 'higgs', cache_format)
+
+    stored = cache_enabled(cache) and nrows is None and columns is None
+    if stored:
+        store_frame('higgs', _archive_source(HIGGS_URL, download_path), df, cache_format, dtype_policy, saved=saved)
+
+    params = None
+    if scale:
+        # The caches hold the raw values; the features are scaled in place while df is the only owner of its columns
+        params = scale_features(df, scale, _written_stats('higgs', save_path, cache_format, stored))
+
+    # Rename the first column to 'target' and separate it as a Series
+    target = df.iloc[:, 0]
+    target.name = 'target'
+
+    # Get the remaining columns as a DataFrame
+    data = with_scale(df.iloc[:, 1:], params)
+
+    if debug:
+        print("="*100)
+        print("Loaded HIGGS dataset successfully. Returning data and target variables.")
+        print("Link to dataset: https://archive.ics.uci.edu/ml/datasets/HIGGS")
+        print(f"Data: {data.shape}")
+        print(f"Target: {target.shape}")
+        print("="*100)
+
+    if chunksize:
+        return _iter_frame_batches(data, target, chunksize)
+
+    return data, target
+
+@splittable('covtype')
+@instrumented('covtype')
+@memoized('covtype')
+@shared('covtype')
+def load_covtype(debug=False, save_path=None, load_path=None, cache_format=None, dtype_policy=None, cache=None, scale=None,
+                 split=None, seed=0):
     """
     Load the Covertype dataset from the UCI Machine Learning Repository.
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param scale: If provided, 'standard' or 'minmax': scale the numeric features (not the label encoded ones) with the statistics saved with the cache. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of the split
 
     :return: A tuple containing the data and target variables
 
 
     """
 
-    if load_path and os.path.exists(load_path):
-        print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'covtype.csv'))
- 
+    check_dtype_policy(dtype_policy)
+    _check_scale(scale)
 
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('covtype', UCIMLREPO_SOURCE.format(31), cache, cache_format, dtype_policy) or load_path
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+    if load_path and os.path.exists(load_path):
+        print(f"Loading dataset from {load_path}")
+        data, target = read_dataset(load_path, 'covtype', cache_format, dtype_policy, scale=scale)
 
         if debug:
 
@@ -228,22 +785,24 @@ def load_covtype(debug=False, save_path=None, load_path=None):
 
         return data,target
 
-    from ucimlrepo import fetch_ucirepo 
-    
-    # fetch dataset 
-    covertype = fetch_ucirepo(id=31) 
+    # fetch dataset, the raw payload is kept in the local cache
+    covertype = fetch_uci(31, cache=cache)
 
-    from sklearn.preprocessing import LabelEncoder
-    le = LabelEncoder()
-    covertype.data.targets = le.fit_transform(covertype.data.targets.values.ravel())
+    covertype.data.targets, target_categories = encode_column(covertype.data.targets.values.ravel())
+    categories = {'target': target_categories}
 
 
  
     # data (as pandas dataframes) 
     X = covertype.data.features 
     y = pd.Series(covertype.data.targets, name='target')
+
+    # Shrink the columns to the requested types
+    X = with_categories(apply_dtype_policy(X, dtype_policy), categories)
+    y = with_categories(apply_dtype_policy(y, dtype_policy), categories)
     
 
+    saved = None
     if save_path:
         # Ensure the save path exists
         os.makedirs(save_path, exist_ok=True)
@@ -254,7 +813,13 @@ def load_covtype(debug=False, save_path=None, load_path=None):
             print(f"Saving dataset to {save_path}")
     
         # Save the dataset to the save path
-        df.to_csv(os.path.join(save_path, 'covtype.csv'), index=False)
+        saved = write_frame(df, save_path, 'covtype', cache_format, categories)
+
+    stored = cache_enabled(cache)
+    if stored:
+        store_frame('covtype', UCIMLREPO_SOURCE.format(31), pd.concat([y, X], axis=1), cache_format, dtype_policy, categories, saved=saved)
+
+    X = _scaled(X, scale, categories, _written_stats('covtype', save_path, cache_format, stored))
 
     if debug:
         print("="*100)
@@ -268,32 +833,40 @@ def load_covtype(debug=False, save_path=None, load_path=None):
 
     return X,y
 
-def load_adult(debug=False, save_path=None, load_path=None):
+@splittable('adult')
+@instrumented('adult')
+@memoized('adult')
+@shared('adult')
+def load_adult(debug=False, save_path=None, load_path=None, cache_format=None, dtype_policy=None, cache=None, scale=None,
+               split=None, seed=0):
     """
     Load the Adult dataset from the UCI Machine Learning Repository.
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param scale: If provided, 'standard' or 'minmax': scale the numeric features (not the label encoded ones) with the statistics saved with the cache. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of the split
 
     :return: A tuple containing the data and target variables
 
 
     """
 
-    if load_path and os.path.exists(load_path):
-        print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'adult.csv'))
-
-
- 
+    check_dtype_policy(dtype_policy)
+    _check_scale(scale)
 
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('adult', UCIMLREPO_SOURCE.format(2), cache, cache_format, dtype_policy) or load_path
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+    if load_path and os.path.exists(load_path):
+        print(f"Loading dataset from {load_path}")
+        data, target = read_dataset(load_path, 'adult', cache_format, dtype_policy, scale=scale)
 
         if debug:
 
@@ -304,24 +877,19 @@ def load_adult(debug=False, save_path=None, load_path=None):
 
         return data,target
 
-    from ucimlrepo import fetch_ucirepo 
-    
-    # fetch dataset 
-    adult = fetch_ucirepo(id=2) 
+    # fetch dataset, the raw payload is kept in the local cache
+    adult = fetch_uci(2, cache=cache)
 
     # 2025-05-26 18:03:08
     # For this dataset, the target collumn needs to be worked on
     # It contains some trailing dots in the target values
     # i.e.: ['<=50K' '<=50K' '<=50K' ... '<=50K.' '<=50K.' '>50K.']
     # We will remove the trailing dots and then encode the target values
-    adult.data.targets = adult.data.targets.values.ravel()
-    adult.data.targets = [str(target).replace('.', '') for target in adult.data.targets]
+    targets = pd.Series(adult.data.targets.values.ravel()).astype(str).str.replace('.', '', regex=False)
 
-    from sklearn.preprocessing import LabelEncoder
-    le = LabelEncoder()
-    adult.data.targets = le.fit_transform(adult.data.targets)
-    for col in adult.data.features.select_dtypes(include='object').columns:
-        adult.data.features[col] = le.fit_transform(adult.data.features[col]) 
+    adult.data.targets, target_categories = encode_column(targets)
+    categories = encode_columns(adult.data.features, dtype_policy=dtype_policy)
+    categories['target'] = target_categories
 
         
     # data (as pandas dataframes) 
@@ -329,8 +897,13 @@ def load_adult(debug=False, save_path=None, load_path=None):
     y = pd.Series(adult.data.targets, name='target')
     y.name = 'target'
 
+    # Shrink the columns to the requested types
+    X = with_categories(apply_dtype_policy(X, dtype_policy), categories)
+    y = with_categories(apply_dtype_policy(y, dtype_policy), categories)
+
 
 
+    saved = None
     if save_path:
         # Ensure the save path exists
         os.makedirs(save_path, exist_ok=True)
@@ -341,7 +914,13 @@ def load_adult(debug=False, save_path=None, load_path=None):
             print(f"Saving dataset to {save_path}")
     
         # Save the dataset to the save path
-        df.to_csv(os.path.join(save_path, 'adult.csv'), index=False)
+        saved = write_frame(df, save_path, 'adult', cache_format, categories)
+
+    stored = cache_enabled(cache)
+    if stored:
+        store_frame('adult', UCIMLREPO_SOURCE.format(2), pd.concat([y, X], axis=1), cache_format, dtype_policy, categories, saved=saved)
+
+    X = _scaled(X, scale, categories, _written_stats('adult', save_path, cache_format, stored))
 
     if debug:
         print("="*100)
@@ -355,32 +934,42 @@ def load_adult(debug=False, save_path=None, load_path=None):
 
     return X,y
 
-def load_iris(debug=False, save_path=None, load_path=None):
+@splittable('iris')
+@instrumented('iris')
+@memoized('iris')
+@shared('iris')
+def load_iris(debug=False, save_path=None, load_path=None, cache_format=None, dtype_policy=None, cache=None, scale=None,
+              split=None, seed=0):
 
     """
     Load the Iris dataset from the UCI Machine Learning Repository.
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param scale: If provided, 'standard' or 'minmax': scale the numeric features (not the label encoded ones) with the statistics saved with the cache. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of the split
 
     :return: A tuple containing the data and target variables
     
     
         """
     
-    if load_path and os.path.exists(load_path):
+    check_dtype_policy(dtype_policy)
+    _check_scale(scale)
 
-        print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'iris.csv'))
- 
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('iris', UCIMLREPO_SOURCE.format(53), cache, cache_format, dtype_policy) or load_path
 
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+    if load_path and os.path.exists(load_path):
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+        print(f"Loading dataset from {load_path}")
+        data, target = read_dataset(load_path, 'iris', cache_format, dtype_policy, scale=scale)
 
         if debug:
 
@@ -392,19 +981,21 @@ def load_iris(debug=False, save_path=None, load_path=None):
         return data,target
 
 
-    from ucimlrepo import fetch_ucirepo 
-  
-    # fetch dataset 
-    iris = fetch_ucirepo(id=53) 
+    # fetch dataset, the raw payload is kept in the local cache
+    iris = fetch_uci(53, cache=cache)
     
-    from sklearn.preprocessing import LabelEncoder
-    le = LabelEncoder()
-    iris.data.targets = le.fit_transform(iris.data.targets.values.ravel())
+    iris.data.targets, target_categories = encode_column(iris.data.targets.values.ravel())
+    categories = {'target': target_categories}
 
     # data (as pandas dataframes)
     X = iris.data.features
     y = pd.Series(iris.data.targets, name='target')
 
+    # Shrink the columns to the requested types
+    X = with_categories(apply_dtype_policy(X, dtype_policy), categories)
+    y = with_categories(apply_dtype_policy(y, dtype_policy), categories)
+
+    saved = None
     if save_path:
         # Ensure the save path exists
         os.makedirs(save_path, exist_ok=True)
@@ -415,8 +1006,14 @@ def load_iris(debug=False, save_path=None, load_path=None):
             print(f"Saving da   taset to {save_path}")
     
         # Save the dataset to the save path
-        df.to_csv(os.path.join(save_path, 'iris.csv'), index=False)
+        saved = write_frame(df, save_path, 'iris', cache_format, categories)
     
+    stored = cache_enabled(cache)
+    if stored:
+        store_frame('iris', UCIMLREPO_SOURCE.format(53), pd.concat([y, X], axis=1), cache_format, dtype_policy, categories, saved=saved)
+
+    X = _scaled(X, scale, categories, _written_stats('iris', save_path, cache_format, stored))
+
     if debug:
         print("="*100)
         print("Loaded Iris dataset successfully. Returning data and target variables.")
@@ -427,31 +1024,60 @@ def load_iris(debug=False, save_path=None, load_path=None):
     
     return X, y
 
-def load_kdd99(debug=False, save_path:str = None, load_path:str = None):
+@splittable('kdd99')
+@instrumented('kdd99')
+@memoized('kdd99')
+@shared('kdd99')
+def load_kdd99(debug=False, save_path:str = None, load_path:str = None, download_path:str = None, chunksize:int = None, cache_format:str = None, dtype_policy:str = None,
+               engine:str = 'c', workers:int = None, segments:int = None, cache:bool = None, nrows:int = None, pipeline:bool = False,
+               scale:str = None, split=None, seed:int = 0):
 
     """
     Load the KDD99 dataset from the UCI Machine Learning Repository.
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process (use nrows to load a subset)
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param download_path: If provided, keep the downloaded archive in this directory instead of a temporary one
+    :param chunksize: If provided, return an iterator of (data, target) batches with this many rows instead of the full dataset
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param engine: Parser used for the downloaded CSV: 'c' (single core), 'pyarrow' (multithreaded, correctly rounded floats) or 'parallel' (C parser on a thread pool, identical to 'c')
+    :param workers: Number of threads of the 'parallel' engine, defaults to the number of CPUs
+    :param segments: If greater than 1, download the archive as this many concurrent byte ranges when the server supports it
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param nrows: If provided, only load the first nrows rows: the archive is streamed and the connection closed once they are parsed. Nothing is saved or cached
+    :param pipeline: If True, download, decompress and parse the archive at the same time on separate threads exchanging bounded buffers, instead of one after the other. Without download_path the archive is never written to disk; with it, the archive is downloaded first and only decompression overlaps parsing. Batches (chunksize) read the archive twice and do not use it
+    :param scale: If provided, 'standard' or 'minmax': scale the numeric features in place as they are loaded, with the statistics saved with the cache when there is one. The label encoded columns are left as they are. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of the split
 
     :return: A tuple containing the data and target variables
     
     
     """
     
+    check_dtype_policy(dtype_policy)
+    check_engine(engine)
+    _check_partial(save_path, nrows)
+    _check_scale(scale, chunksize)
+
+    if not (load_path and os.path.exists(load_path)):
+        _revalidate_archive(KDD99_URL, 'Download KDD99 Dataset', download_path, segments)
+
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('kdd99', _archive_source(KDD99_URL, download_path), cache, cache_format, dtype_policy) or load_path
+
     if load_path and os.path.exists(load_path):
         print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'kdd99.csv'))
- 
-
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+        if chunksize:
+            return _iter_cached_batches(load_path, 'kdd99', chunksize, cache_format, dtype_policy, nrows)
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+        if nrows is not None:
+            data, target = _read_cached_rows(load_path, 'kdd99', nrows, cache_format, dtype_policy, scale=scale)
+        else:
+            data, target = read_dataset(load_path, 'kdd99', cache_format, dtype_policy, scale=scale)
 
         if debug:
 
@@ -463,117 +1089,122 @@ def load_kdd99(debug=False, save_path:str = None, load_path:str = None):
         return data,target
 
     # link to dataset http://kdd.ics.uci.edu/databases/kddcup99/kddcup.data.gz
-    url = 'http://kdd.ics.uci.edu/databases/kddcup99/kddcup.data.gz'
-    response = requests.get(url, stream=True)
+    if chunksize and nrows is None:
+        return _iter_kdd99_batches(chunksize, download_path=download_path, save_path=save_path, cache_format=cache_format,
+                                   dtype_policy=dtype_policy, segments=segments, cache=cache)
 
-    if response.status_code == 200:
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 1024
-        t = tqdm(total=total_size, unit='iB', unit_scale=True, desc='Download KDD99 Dataset')
+    with _open_remote_csv(KDD99_URL, 'Download KDD99 Dataset', download_path=download_path, segments=segments,
+                          stream=nrows is not None, pipeline=pipeline) as the_file:
+        # Load the full CSV into a DataFrame
+        print("Load CSV into DataFrame")
+        kdd9 = read_csv(the_file, engine=engine, workers=workers, header=None, nrows=nrows, dtype=_kdd99_parse_dtypes(dtype_policy))
 
-        file_buffer = io.BytesIO()
-        for data in response.iter_content(block_size):
-            t.update(len(data))
-            file_buffer.write(data)
-        t.close()
+    # Encode the all the categorical columns
+    categories = _kdd99_categories(encode_columns(kdd9, KDD99_CATEGORICAL, dtype_policy=dtype_policy))
 
-        file_buffer.seek(0)
+    kdd9 = apply_dtype_policy(kdd9, dtype_policy, target=41)
 
-        with gzip.open(file_buffer) as the_file:
-            # Load the full CSV into a DataFrame
-            print("Load CSV into DataFrame")
-            the_file.seek(0)
-            kdd9 = pd.read_csv(the_file, header=None)
+    saved = None
+    if save_path:
+        # Ensure the save path exists
+        os.makedirs(save_path, exist_ok=True)
+
+        if debug:
+            print(f"Saving dataset to {save_path}")
 
-            # Encode the all the categorical columns
-            from sklearn.preprocessing import LabelEncoder
-            le = LabelEncoder()
-            for col in kdd9.select_dtypes(include='object').columns:
-                kdd9[col] = le.fit_transform(kdd9[col])
-            
+        saved = write_frame(_kdd99_frame(kdd9), save_path, 'kdd99', cache_format, categories)
 
-            # Rename the last column to 'target' and separate it as a Series
-            target = kdd9.iloc[:, -1]
-            target.name = 'target'
+    stored = cache_enabled(cache) and nrows is None
+    if stored:
+        store_frame('kdd99', _archive_source(KDD99_URL, download_path), _kdd99_frame(kdd9), cache_format, dtype_policy, categories,
+                    saved=saved)
 
-            # Get the remaining columns as a DataFrame
-            data = kdd9.iloc[:, :-1]
+    params = None
+    if scale:
+        # The caches hold the raw values; the features are scaled in place before the target is split off
+        params = scale_features(kdd9, scale, _written_stats('kdd99', save_path, cache_format, stored), target_column=-1, categories=categories)
 
+    # Rename the last column to 'target' and separate it as a Series
+    target = with_categories(kdd9.iloc[:, -1], categories)
+    target.name = 'target'
 
+    # Get the remaining columns as a DataFrame
+    data = with_scale(with_categories(kdd9.iloc[:, :-1], categories), params)
 
-            if save_path:
-                # Ensure the save path exists
-                os.makedirs(save_path, exist_ok=True)
+    if debug:
+        print("="*100)
+        print("Loaded KDD99 dataset successfully. Returning data and target variables.")
+        print("Link to dataset: https://archive.ics.uci.edu/ml/datasets/KDD+Cup+1999+Data")
+        print(f"Data: {data.shape}")
+        print(f"Target: {target.shape}")
+        print("="*100)
 
-                if debug:
-                    print(f"Saving dataset to {save_path}")
+    if chunksize:
+        return _iter_frame_batches(data, target, chunksize)
 
-                df = pd.concat([target, data], axis=1)
-                df.to_csv(os.path.join(save_path, 'kdd99.csv'), index=False)
-        
-            if debug:
-                print("="*100)
-                print("Loaded KDD99 dataset successfully. Returning data and target variables.")
-                print("Link to dataset: https://archive.ics.uci.edu/ml/datasets/KDD+Cup+1999+Data")
-                print(f"Data: {data.shape}")
-                print(f"Target: {target.shape}")
-                print("="*100)
-            
-            return data, target
+    return data, target
 
-    else:
-        ValueError(f"Failed to download dataset from {url}. Status code: {response.status_code}")
-        return None
-    
-def load_spambase(debug:bool = False, save_path:str  = None, load_path:str = None):
+@splittable('spambase')
+@instrumented('spambase')
+@memoized('spambase')
+@shared('spambase')
+def load_spambase(debug:bool = False, save_path:str  = None, load_path:str = None, cache_format:str = None, dtype_policy:str = None, cache:bool = None, scale:str = None,
+                  split=None, seed:int = 0):
     """
     Load the Spambase dataset from the UCI Machine Learning Repository.
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param scale: If provided, 'standard' or 'minmax': scale the numeric features (not the label encoded ones) with the statistics saved with the cache. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of the split
 
     :return: A tuple containing the data and target variables
 
     """
     
 
-    if load_path and os.path.exists(load_path):
+    check_dtype_policy(dtype_policy)
+    _check_scale(scale)
 
-        print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'iris.csv'))
- 
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('spambase', UCIMLREPO_SOURCE.format(94), cache, cache_format, dtype_policy) or load_path
 
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+    if load_path and os.path.exists(load_path):
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+        print(f"Loading dataset from {load_path}")
+        data, target = read_dataset(load_path, 'spambase', cache_format, dtype_policy, scale=scale)
 
         if debug:
 
-            print("Loaded Iris dataset successfully. Returning data and target variables.")
-            print("Link to dataset: https://archive.ics.uci.edu/ml/datasets/Iris")
+            print("Loaded spambase dataset successfully. Returning data and target variables.")
+            print("Link to dataset: https://archive.ics.uci.edu/dataset/94/spambase")
             print(f"Data: {data.shape}")
             print(f"Target: {target.shape}")
 
         return data,target
 
 
-    from ucimlrepo import fetch_ucirepo 
-  
-    # fetch dataset 
-    spambase = fetch_ucirepo(id=94) 
+    # fetch dataset, the raw payload is kept in the local cache
+    spambase = fetch_uci(94, cache=cache)
     
-    from sklearn.preprocessing import LabelEncoder
-    le = LabelEncoder()
-    spambase.data.targets = le.fit_transform(spambase.data.targets.values.ravel())
+    spambase.data.targets, target_categories = encode_column(spambase.data.targets.values.ravel())
+    categories = {'target': target_categories}
 
     # data (as pandas dataframes)
     X = spambase.data.features
     y = pd.Series(spambase.data.targets, name='target')
 
+    # Shrink the columns to the requested types
+    X = with_categories(apply_dtype_policy(X, dtype_policy), categories)
+    y = with_categories(apply_dtype_policy(y, dtype_policy), categories)
+
+    saved = None
     if save_path:
         # Ensure the save path exists
         os.makedirs(save_path, exist_ok=True)
@@ -584,8 +1215,14 @@ def load_spambase(debug:bool = False, save_path:str  = None, load_path:str = Non
             print(f"Saving da   taset to {save_path}")
     
         # Save the dataset to the save path
-        df.to_csv(os.path.join(save_path, 'spambase.csv'), index=False)
+        saved = write_frame(df, save_path, 'spambase', cache_format, categories)
     
+    stored = cache_enabled(cache)
+    if stored:
+        store_frame('spambase', UCIMLREPO_SOURCE.format(94), pd.concat([y, X], axis=1), cache_format, dtype_policy, categories, saved=saved)
+
+    X = _scaled(X, scale, categories, _written_stats('spambase', save_path, cache_format, stored))
+
     if debug:
         print("="*100)
         print("Loaded spambase dataset successfully. Returning data and target variables.")
@@ -597,30 +1234,40 @@ def load_spambase(debug:bool = False, save_path:str  = None, load_path:str = Non
     return X, y
   
   
-def load_drybean(debug:bool = False, save_path:str  = None, load_path:str = None):
+@splittable('drybean')
+@instrumented('drybean')
+@memoized('drybean')
+@shared('drybean')
+def load_drybean(debug:bool = False, save_path:str  = None, load_path:str = None, cache_format:str = None, dtype_policy:str = None, cache:bool = None, scale:str = None,
+                 split=None, seed:int = 0):
     """
     Load the DryBean dataset from the UCI Machine Learning Repository.
 
-    :param debug: If True, only load a subset of the dataset for faster testing
+    :param debug: If True, print details about the loading process
     :param save_path: If provided, save the dataset to this path
     :param load_path: If provided, load the dataset from this path
+    :param cache_format: Format of the save_path cache ('csv', 'parquet', 'feather' or 'npy'), defaults to the global setting
+    :param dtype_policy: If provided, 'float32', 'compact' or a {column: dtype} mapping used to shrink the returned columns
+    :param cache: If True, read and write the local dataset cache (see set_cache_dir); None uses the global setting, False skips it
+    :param scale: If provided, 'standard' or 'minmax': scale the numeric features (not the label encoded ones) with the statistics saved with the cache. The fitted parameters are returned in data.attrs['scale'], see apply_scale
+    :param split: If provided, return a {part: (data, target)} dict instead: (train, test) or (train, validation, test) fractions for a split stratified by class. The row indices are saved beside the dataset (save_path, load_path or the local dataset cache) and reused by later calls
+    :param seed: Seed of the shuffle of the split
 
     :return: A tuple containing the data and target variables
 
     """
     
-    if load_path and os.path.exists(load_path):
+    check_dtype_policy(dtype_policy)
+    _check_scale(scale)
 
-        print(f"Loading dataset from {load_path}")
-        df = pd.read_csv(os.path.join(load_path, 'drybean.csv'))
- 
+    if not save_path and not (load_path and os.path.exists(load_path)):
+        # Use a valid copy from the local dataset cache, if there is one
+        load_path = cached_path('drybean', UCIMLREPO_SOURCE.format(602), cache, cache_format, dtype_policy) or load_path
 
-        # Rename the first column to 'target' and separate it as a Series
-        target = df.iloc[:, 0]
-        target.name = 'target'
+    if load_path and os.path.exists(load_path):
 
-        # Get the remaining columns as a DataFrame
-        data = df.iloc[:, 1:]
+        print(f"Loading dataset from {load_path}")
+        data, target = read_dataset(load_path, 'drybean', cache_format, dtype_policy, scale=scale)
 
         if debug:
 
@@ -632,19 +1279,21 @@ def load_drybean(debug:bool = False, save_path:str  = None, load_path:str = None
         return data,target
 
 
-    from ucimlrepo import fetch_ucirepo 
-  
-    # fetch dataset 
-    drybean = fetch_ucirepo(id=602) 
+    # fetch dataset, the raw payload is kept in the local cache
+    drybean = fetch_uci(602, cache=cache)
     
-    from sklearn.preprocessing import LabelEncoder
-    le = LabelEncoder()
-    drybean.data.targets = le.fit_transform(drybean.data.targets.values.ravel())
+    drybean.data.targets, target_categories = encode_column(drybean.data.targets.values.ravel())
+    categories = {'target': target_categories}
 
     # data (as pandas dataframes)
     X = drybean.data.features
     y = pd.Series(drybean.data.targets, name='target')
 
+    # Shrink the columns to the requested types
+    X = with_categories(apply_dtype_policy(X, dtype_policy), categories)
+    y = with_categories(apply_dtype_policy(y, dtype_policy), categories)
+
+    saved = None
     if save_path:
         # Ensure the save path exists
         os.makedirs(save_path, exist_ok=True)
@@ -655,8 +1304,14 @@ def load_drybean(debug:bool = False, save_path:str  = None, load_path:str = None
             print(f"Saving da   taset to {save_path}")
     
         # Save the dataset to the save path
-        df.to_csv(os.path.join(save_path, 'drybean.csv'), index=False)
+        saved = write_frame(df, save_path, 'drybean', cache_format, categories)
     
+    stored = cache_enabled(cache)
+    if stored:
+        store_frame('drybean', UCIMLREPO_SOURCE.format(602), pd.concat([y, X], axis=1), cache_format, dtype_policy, categories, saved=saved)
+
+    X = _scaled(X, scale, categories, _written_stats('drybean', save_path, cache_format, stored))
+
     if debug:
         print("="*100)
         print("Loaded drybean dataset successfully. Returning data and target variables.")
@@ -664,4 +1319,72 @@ def load_drybean(debug:bool = False, save_path:str  = None, load_path:str = None
         print(f"Data : {X.shape}")
         print(f"Target: {y.shape}")
         print("="*100)
-    return X, y
\ No newline at end of file
+    return X, y
+
+
+# Loader of every dataset, by name
+LOADERS = {
+    'susy': load_susy,
+    'higgs': load_higgs,
+    'covtype': load_covtype,
+    'adult': load_adult,
+    'iris': load_iris,
+    'kdd99': load_kdd99,
+    'spambase': load_spambase,
+    'drybean': load_drybean,
+}
+
+
+def _load_one(name, kwargs, session):
+    with using_session(session):
+        return LOADERS[name](**kwargs)
+
+
+def load_many(datasets, max_workers=None, session=None, **kwargs):
+    """
+    Load several datasets concurrently and yield each one as soon as it is ready.
+
+    The loaders run on a pool of max_workers threads and their downloads share
+    one pooled requests.Session (ucimlrepo opens its own connections). A
+    loader that raises does not stop the others: its exception is yielded in
+    place of the result.
+
+    :param datasets: Names of the datasets, or a {name: kwargs} mapping with arguments for each loader
+    :param max_workers: Number of datasets loaded at the same time, defaults to LOAD_MANY_WORKERS
+    :param session: requests.Session shared by the downloads, defaults to a new session with a pool sized for the workers
+    :param kwargs: Arguments passed to every loader that accepts them (save_path, cache_format, dtype_policy, ...)
+
+    :return: An iterator of (name, result, error) tuples in completion order, where result is what the loader returned, or None when it raised error
+    """
+
+    if not isinstance(datasets, dict):
+        datasets = {name: {} for name in datasets}
+
+    unknown = [name for name in datasets if name not in LOADERS]
+    if unknown:
+        raise ValueError(f"Unknown datasets {unknown}. Choose from {sorted(LOADERS)}")
+
+    calls = {}
+    for name, own in datasets.items():
+        accepted = inspect.signature(LOADERS[name]).parameters
+        calls[name] = {**{key: value for key, value in kwargs.items() if key in accepted}, **(own or {})}
+
+    max_workers = max_workers or LOAD_MANY_WORKERS
+    return _iter_load_many(calls, max_workers, session, max_workers * max(kwargs.get('segments') or 1, 1))
+
+
+def _iter_load_many(calls, max_workers, session, pool_size):
+    own_session = session is None
+    if own_session:
+        session = new_session(pool_size)
+
+    pool = ThreadPoolExecutor(max_workers)
+    try:
+        futures = {pool.submit(_load_one, name, call, session): name for name, call in calls.items()}
+        for future in as_completed(futures):
+            error = future.exception()
+            yield futures[future], None if error else future.result(), error
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if own_session:
+            session.close()
@@ -0,0 +1,764 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+from .dtypes import apply_dtype_policy, parse_dtypes
+from .instrument import span
+from .stats import StatsAccumulator, frame_stats
+from .scaling import scale_features, with_scale
+
+
+# File extension used by every supported cache format
+CACHE_FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'npy': '.npy',
+}
+
+# Version of the layout of the npy cache directory, stored in its header
+NPY_CACHE_VERSION = 1
+
+# Number of rows converted at once when a DataFrame is written to the npy cache
+NPY_WRITE_ROWS = 65536
+
+# Compression used by the binary formats
+CACHE_COMPRESSION = 'zstd'
+
+# Version of the layout of the schema sidecar written next to every cache file
+SCHEMA_VERSION = 1
+
+_cache_format = os.environ.get('LOADDATASET_CACHE_FORMAT', 'csv')
+
+
+def set_cache_format(cache_format):
+    """
+    Set the format used by save_path when a loader is called without cache_format.
+
+    The initial value is read from the LOADDATASET_CACHE_FORMAT environment variable and defaults to 'csv'.
+
+    :param cache_format: One of 'csv', 'parquet', 'feather' or 'npy'
+    """
+
+    global _cache_format
+    _cache_format = get_cache_format(cache_format)
+
+
+def get_cache_format(cache_format=None):
+    """
+    Resolve the cache format to use, falling back to the global setting.
+
+    :param cache_format: One of 'csv', 'parquet', 'feather' or 'npy', or None for the global setting
+
+    :return: The name of the cache format
+    """
+
+    cache_format = cache_format or _cache_format
+    if cache_format not in CACHE_FORMATS:
+        raise ValueError(f"Unknown cache format {cache_format!r}. Choose one of {sorted(CACHE_FORMATS)}")
+
+    return cache_format
+
+
+def cache_file(path, name, cache_format=None):
+    """
+    Path of the cache file of a dataset in the given format.
+    """
+
+    return os.path.join(path, name + CACHE_FORMATS[get_cache_format(cache_format)])
+
+
+def find_cache_file(path, name, cache_format=None):
+    """
+    Find the cache file of a dataset in path.
+
+    The requested format is looked up first and then every other format, so a
+    cache keeps working after it has been migrated with migrate_cache.
+
+    :return: A tuple with the path of the cache file and its format
+    """
+
+    preferred = get_cache_format(cache_format)
+    for fmt in [preferred] + [f for f in CACHE_FORMATS if f != preferred]:
+        candidate = cache_file(path, name, fmt)
+        if os.path.exists(candidate):
+            return candidate, fmt
+
+    raise FileNotFoundError(f"No cached {name} dataset found in {path}")
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The parquet and feather cache formats require pyarrow. Install it with 'pip install pyarrow'") from e
+
+    return pyarrow
+
+
+def _to_table(df):
+    # Arrow needs string column names; the CSV cache stringifies them as well
+    pa = _import_pyarrow()
+    df = df.copy(deep=False)
+    df.columns = df.columns.map(str)
+
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def cache_size(path):
+    """
+    Number of bytes taken by a cache file, which is a directory for the npy format.
+    """
+
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, entry)) for root, _, entries in os.walk(path) for entry in entries)
+
+    return os.path.getsize(path)
+
+
+def categories_file(path, name):
+    """
+    Path of the file holding the category mappings of a cached dataset.
+    """
+
+    return os.path.join(path, f'{name}.categories.json')
+
+
+def write_categories(path, name, categories):
+    """
+    Save the {column: categories} mappings of the encoded columns of a dataset next to its cache.
+    """
+
+    os.makedirs(path, exist_ok=True)
+    with open(categories_file(path, name), 'w') as f:
+        json.dump(categories, f)
+
+
+def read_categories(path, name):
+    """
+    Category mappings saved next to the cache of a dataset, or None if it has no encoded columns.
+
+    :return: A {str(column): categories} mapping, the categories being listed in code order
+    """
+
+    try:
+        with open(categories_file(path, name)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def with_categories(obj, categories):
+    """
+    Attach category mappings to a DataFrame or Series as attrs['categories'].
+    """
+
+    if categories:
+        obj.attrs['categories'] = categories
+
+    return obj
+
+
+def schema_file(file):
+    """
+    Path of the schema sidecar of a cache file.
+    """
+
+    return file + '.schema.json'
+
+
+def _schema(name, cache_format, df, rows):
+    return {
+        'version': SCHEMA_VERSION,
+        'dataset': name,
+        'format': cache_format,
+        'columns': [str(col) for col in df.columns],
+        'dtypes': [str(dtype) for dtype in df.dtypes],
+        'rows': rows,
+        # The files only hold string labels, the integer ones are restored when the cache is read
+        'int_labels': [int(col) for col in df.columns if isinstance(col, (int, np.integer))],
+    }
+
+
+def _restore_labels(df, schema):
+    # Give back their integer type to the labels the frame was saved with, in place
+    labels = {str(col): col for col in schema.get('int_labels', ())} if schema else {}
+    if labels:
+        df.columns = [labels.get(col, col) for col in df.columns]
+    return df
+
+
+def write_schema(file, schema):
+    """
+    Save the schema of a cache file next to it.
+
+    :param file: Path of the cache file
+    :param schema: Dict with the dataset name, format, column names, dtypes, number of rows and statistics (see frame_stats)
+    """
+
+    with open(schema_file(file), 'w') as f:
+        json.dump(schema, f, indent=2)
+
+
+def read_schema(file):
+    """
+    Load the schema saved next to a cache file.
+
+    :param file: Path of the cache file
+
+    :return: The schema dict, or None for a cache written without one or by another version
+    """
+
+    try:
+        with open(schema_file(file)) as f:
+            schema = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    return schema if schema.get('version') == SCHEMA_VERSION else None
+
+
+def _check_schema(file, name, schema, df=None):
+    # A cache file must hold the dataset it is named after, with all of its rows
+    if schema is None:
+        return
+
+    if schema['dataset'] != name:
+        raise ValueError(f"{file} holds the {schema['dataset']} dataset, not {name}")
+
+    if df is not None:
+        if not set(map(str, df.columns)).issubset(schema['columns']):
+            raise ValueError(f"The columns of {file} do not match its schema")
+        if len(df) != schema['rows']:
+            raise ValueError(f"{file} has {len(df)} rows instead of {schema['rows']}, the cache is incomplete")
+
+
+def write_frame(df, path, name, cache_format=None, categories=None, scale=None):
+    """
+    Save a DataFrame as the cache of a dataset.
+
+    :param df: DataFrame with the target in the first column
+    :param path: Directory of the cache
+    :param name: Name of the dataset, used as the file name
+    :param cache_format: One of 'csv', 'parquet', 'feather' or 'npy', or None for the global setting
+    :param categories: If provided, the {column: categories} mappings of the encoded columns, saved next to the cache
+    :param scale: If provided, the parameters the features of df were scaled with (see fit_scale), saved in the schema
+
+    :return: The path of the written file
+    """
+
+    cache_format = get_cache_format(cache_format)
+    os.makedirs(path, exist_ok=True)
+    file = cache_file(path, name, cache_format)
+
+    if categories:
+        write_categories(path, name, categories)
+
+    with span('cache_write', cache_format=cache_format) as the_span:
+        if cache_format == 'csv':
+            df.to_csv(file, index=False)
+        elif cache_format == 'npy':
+            writer = _NpyWriter(file)
+            writer.write(df)
+            writer.close()
+        elif cache_format == 'parquet':
+            _import_pyarrow().parquet.write_table(_to_table(df), file, compression=CACHE_COMPRESSION)
+        else:
+            _import_pyarrow().feather.write_feather(_to_table(df), file, compression=CACHE_COMPRESSION)
+        the_span.set(bytes=cache_size(file), rows=len(df))
+
+    schema = _schema(name, cache_format, df, len(df))
+    schema['stats'] = frame_stats(df)
+    if scale:
+        schema['scale'] = scale
+    write_schema(file, schema)
+
+    return file
+
+
+def cache_columns(file, cache_format):
+    """
+    Labels of the columns of a cache file, the target first, without reading its rows.
+    """
+
+    if cache_format == 'csv':
+        return list(pd.read_csv(file, nrows=0).columns)
+
+    if cache_format == 'npy':
+        return ['target'] + _read_npy_header(file)['columns']
+
+    pa = _import_pyarrow()
+    if cache_format == 'parquet':
+        return pa.parquet.read_schema(file).names
+
+    return pa.ipc.open_file(pa.memory_map(file)).schema.names
+
+
+def _projection(file, cache_format, columns):
+    # Labels to read for the requested feature columns: the target and the matching columns, in file order
+    if columns is None:
+        return None
+
+    names = cache_columns(file, cache_format)
+    wanted = {str(col) for col in columns}
+    missing = wanted.difference(names[1:])
+    if missing:
+        raise ValueError(f"Columns {sorted(missing)} are not in the cache {file}")
+
+    return [names[0]] + [col for col in names[1:] if col in wanted]
+
+
+def _csv_dtypes(file, dtype_policy, schema=None):
+    # With a schema the numeric columns are parsed straight into their saved types, without inference.
+    # Otherwise the float columns are found on the first rows, so they can be parsed as float32 directly
+    if schema is not None:
+        dtypes = {col: dtype for col, dtype in zip(schema['columns'], schema['dtypes'])
+                  if pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype))}
+        float_columns = [col for col, dtype in dtypes.items() if pd.api.types.is_float_dtype(pd.api.types.pandas_dtype(dtype))]
+        return {**dtypes, **(parse_dtypes(dtype_policy, schema['columns'], float_columns) or {})}
+
+    if dtype_policy is None:
+        return None
+
+    sample = pd.read_csv(file, nrows=1000)
+    float_columns = [col for col in sample.columns if pd.api.types.is_float_dtype(sample[col])]
+
+    return parse_dtypes(dtype_policy, sample.columns, float_columns)
+
+
+def read_frame(path, name, cache_format=None, dtype_policy=None, columns=None):
+    """
+    Load the cache of a dataset written by write_frame.
+
+    :param path: Directory of the cache
+    :param name: Name of the dataset
+    :param cache_format: Format looked up first, or None for the global setting
+    :param dtype_policy: dtype policy applied to the loaded columns, see apply_dtype_policy
+    :param columns: If provided, only these feature columns (and the target) are read from the file
+
+    :return: A DataFrame with the target in the first column
+    """
+
+    file, cache_format = find_cache_file(path, name, cache_format)
+    schema = read_schema(file)
+    _check_schema(file, name, schema)
+    usecols = _projection(file, cache_format, columns)
+
+    if cache_format == 'csv':
+        df = pd.read_csv(file, dtype=_csv_dtypes(file, dtype_policy, schema), usecols=usecols)
+    elif cache_format == 'npy':
+        data, target = _read_npy(file, columns)
+        df = pd.concat([target, data], axis=1)
+    elif cache_format == 'parquet':
+        _import_pyarrow()
+        df = pd.read_parquet(file, columns=usecols)
+    else:
+        _import_pyarrow()
+        df = pd.read_feather(file, columns=usecols)
+
+    _check_schema(file, name, schema, df)
+
+    return apply_dtype_policy(_restore_labels(df, schema), dtype_policy)
+
+
+def split_target(df, target_column=0):
+    """
+    Separate the target column of a DataFrame as a Series named 'target'.
+
+    :param df: DataFrame holding the target and the features
+    :param target_column: Position of the target column, either 0 or -1
+
+    :return: A tuple containing the data and target variables
+    """
+
+    target = df.iloc[:, target_column]
+    target.name = 'target'
+
+    if target_column == 0:
+        data = df.iloc[:, 1:]
+    else:
+        data = df.iloc[:, :-1]
+
+    if data.columns.dtype == object and len(data.columns) and all(isinstance(col, (int, np.integer)) for col in data.columns):
+        # Without the 'target' label, integer labels are held in an integer index again
+        data.columns = pd.Index(list(data.columns))
+
+    return data, target
+
+
+def read_dataset(path, name, cache_format=None, dtype_policy=None, columns=None, scale=None):
+    """
+    Load the cache of a dataset and separate the target from the features.
+
+    The npy format is opened memory-mapped, so the returned DataFrame and
+    Series are read-only views of the page cache rather than copies.
+
+    :param path: Directory of the cache
+    :param name: Name of the dataset
+    :param cache_format: Format looked up first, or None for the global setting
+    :param dtype_policy: dtype policy applied to the loaded columns, see apply_dtype_policy
+    :param columns: If provided, only these feature columns are read, the others are never loaded
+    :param scale: If provided, 'standard' or 'minmax': scale the features with the statistics saved in the schema as they are loaded (the npy format is then copied to memory)
+
+    :return: A tuple containing the data and target variables, with the category mappings of encoded columns in attrs['categories'] and the scaling parameters in attrs['scale']
+    """
+
+    file, cache_format = find_cache_file(path, name, cache_format)
+    categories = read_categories(path, name)
+    schema = read_schema(file)
+    stats = schema.get('stats') if schema else None
+    with span('cache_read', cache_format=cache_format) as the_span:
+        if cache_format == 'npy':
+            _check_schema(file, name, schema)
+            data, target = _read_npy(file, columns)
+            _check_schema(file, name, schema, data)
+            _restore_labels(data, schema)
+            if dtype_policy is not None:
+                data = apply_dtype_policy(data.copy(deep=False), dtype_policy)
+                target = apply_dtype_policy(target, dtype_policy)
+            params = None
+            if scale:
+                # The mapped file is read-only, the features are scaled in a copy
+                data = data.copy()
+                params = scale_features(data, scale, stats, None, categories)
+        else:
+            df = read_frame(path, name, cache_format, dtype_policy, columns)
+            # Scaled before the target is split off, while df is the only owner of its columns
+            params = scale_features(df, scale, stats, 0, categories) if scale else None
+            data, target = split_target(df)
+        the_span.set(bytes=cache_size(file), rows=len(data))
+
+    # A shared copy of a scaled dataset records how it was scaled
+    params = params or (schema.get('scale') if schema else None)
+    return with_scale(with_categories(data, categories), params), with_categories(target, categories)
+
+
+def load_numpy(path, name):
+    """
+    Open the npy cache of a dataset as memory-mapped NumPy arrays.
+
+    Opening is near-instant whatever the size of the dataset, and every
+    process mapping the same files shares the same physical pages.
+
+    :param path: Directory of the cache
+    :param name: Name of the dataset
+
+    :return: A tuple with the read-only features and target arrays
+    """
+
+    file = cache_file(path, name, 'npy')
+    if not os.path.exists(file):
+        raise FileNotFoundError(f"No cached {name} dataset found in {path}")
+
+    return _open_npy(file)
+
+
+def _open_npy(file):
+    features = np.load(os.path.join(file, 'features.npy'), mmap_mode='r')
+    target = np.load(os.path.join(file, 'target.npy'), mmap_mode='r')
+
+    return features, target
+
+
+def _read_npy_header(file):
+    with open(os.path.join(file, 'header.json')) as f:
+        header = json.load(f)
+
+    if header.get('version') != NPY_CACHE_VERSION:
+        raise ValueError(f"Unsupported npy cache version {header.get('version')} in {file}")
+
+    return header
+
+
+def _read_npy(file, columns=None):
+    header = _read_npy_header(file)
+    features, target = _open_npy(file)
+
+    positions = list(range(len(header['columns'])))
+    if columns is not None:
+        wanted = {str(col) for col in columns}
+        missing = wanted.difference(header['columns'])
+        if missing:
+            raise ValueError(f"Columns {sorted(missing)} are not in the cache {file}")
+        positions = [i for i, col in enumerate(header['columns']) if col in wanted]
+
+    if positions and positions == list(range(positions[0], positions[-1] + 1)):
+        # A contiguous range of columns, like a feature group, stays a view of the mapping
+        features = features[:, positions[0]:positions[-1] + 1]
+    else:
+        features = features[:, positions]
+
+    names = [header['columns'][i] for i in positions]
+    dtypes = [header['dtypes'][i] for i in positions]
+
+    # Wrap the memory-mapped arrays without copying them
+    index = pd.RangeIndex(len(target))
+    data = pd.DataFrame(np.asarray(features), columns=names, index=index, copy=False)
+    target = pd.Series(np.asarray(target), name='target', index=index, copy=False)
+
+    # Columns whose type differs from the shared array type are restored with a copy
+    dtypes = {col: dtype for col, dtype in zip(names, dtypes) if dtype != header['dtype']}
+    if dtypes:
+        data = data.astype(dtypes)
+
+    return data, target
+
+
+def _rebatch(record_batches, chunksize):
+    # Arrow readers yield batches of their own size, regroup them into chunksize rows
+    pa = _import_pyarrow()
+    pending = []
+    pending_rows = 0
+    for batch in record_batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows < chunksize:
+            continue
+
+        table = pa.Table.from_batches(pending)
+        offset = 0
+        while table.num_rows - offset >= chunksize:
+            yield table.slice(offset, chunksize)
+            offset += chunksize
+        rest = table.slice(offset)
+        pending = rest.to_batches()
+        pending_rows = rest.num_rows
+
+    if pending_rows:
+        yield pa.Table.from_batches(pending)
+
+
+def iter_frames(path, name, chunksize, cache_format=None, dtype_policy=None, columns=None):
+    """
+    Iterate over the cache of a dataset in DataFrames of chunksize rows.
+
+    :param path: Directory of the cache
+    :param name: Name of the dataset
+    :param chunksize: Number of rows per DataFrame
+    :param cache_format: Format looked up first, or None for the global setting
+    :param dtype_policy: dtype policy applied to every DataFrame, integers keep their type so all DataFrames share the same dtypes
+    :param columns: If provided, only these feature columns (and the target) are read from the file
+
+    :return: An iterator of DataFrames with the target in the first column
+    """
+
+    file, cache_format = find_cache_file(path, name, cache_format)
+    schema = read_schema(file)
+    _check_schema(file, name, schema)
+    usecols = _projection(file, cache_format, columns)
+
+    if cache_format == 'csv':
+        for df in pd.read_csv(file, dtype=_csv_dtypes(file, dtype_policy, schema), usecols=usecols, chunksize=chunksize):
+            yield apply_dtype_policy(_restore_labels(df, schema), dtype_policy, downcast_integers=False)
+        return
+
+    if cache_format == 'npy':
+        data, target = _read_npy(file, columns)
+        for start in range(0, len(target), chunksize):
+            df = pd.concat([target.iloc[start:start + chunksize], data.iloc[start:start + chunksize]], axis=1)
+            yield apply_dtype_policy(_restore_labels(df, schema), dtype_policy, downcast_integers=False)
+        return
+
+    pa = _import_pyarrow()
+    if cache_format == 'parquet':
+        batches = pa.parquet.ParquetFile(file).iter_batches(batch_size=chunksize, columns=usecols)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(file))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        if usecols is not None:
+            # Selecting columns of a memory-mapped batch does not read the others
+            batches = (batch.select(usecols) for batch in batches)
+
+    offset = 0
+    for table in _rebatch(batches, chunksize):
+        df = table.to_pandas()
+        df.index = pd.RangeIndex(offset, offset + len(df))
+        offset += len(df)
+        yield apply_dtype_policy(_restore_labels(df, schema), dtype_policy, downcast_integers=False)
+
+
+class CacheWriter:
+    """
+    Write the cache of a dataset incrementally, one DataFrame at a time.
+
+    Used when a dataset is streamed in batches and never held whole in memory.
+    """
+
+    def __init__(self, path, name, cache_format=None, stats=None):
+        self.cache_format = get_cache_format(cache_format)
+        self.path = path
+        self.name = name
+        os.makedirs(path, exist_ok=True)
+        self.file = cache_file(path, name, self.cache_format)
+        self.writer = _NpyWriter(self.file) if self.cache_format == 'npy' else None
+        self.first = True
+        self.schema = None
+        # Statistics already computed for the data are saved as they are, not accumulated again
+        self.stats = StatsAccumulator() if stats is None else None
+        self.known_stats = stats
+
+    def write(self, df):
+        if self.schema is None:
+            self.schema = _schema(self.name, self.cache_format, df, 0)
+        self.schema['rows'] += len(df)
+        if self.stats is not None:
+            self.stats.update(df)
+
+        if self.cache_format == 'npy':
+            self.writer.write(df)
+            return
+
+        if self.cache_format == 'csv':
+            df.to_csv(self.file, index=False, header=self.first, mode='w' if self.first else 'a')
+            self.first = False
+            return
+
+        pa = _import_pyarrow()
+        table = _to_table(df)
+        if self.writer is None:
+            if self.cache_format == 'parquet':
+                self.writer = pa.parquet.ParquetWriter(self.file, table.schema, compression=CACHE_COMPRESSION)
+            else:
+                options = pa.ipc.IpcWriteOptions(compression=CACHE_COMPRESSION)
+                self.writer = pa.ipc.new_file(self.file, table.schema, options=options)
+        self.writer.write_table(table)
+
+    def write_categories(self, categories):
+        write_categories(self.path, self.name, categories)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+        if self.schema is not None:
+            self.schema['stats'] = self.stats.result() if self.stats is not None else self.known_stats
+            write_schema(self.file, self.schema)
+
+    def abort(self):
+        """
+        Discard what was written, used when the stream is interrupted before the end.
+        """
+
+        if os.path.exists(categories_file(self.path, self.name)):
+            os.remove(categories_file(self.path, self.name))
+
+        if self.cache_format == 'npy':
+            self.writer.abort()
+            return
+
+        self.schema = None
+        self.close()
+        if os.path.exists(self.file):
+            os.remove(self.file)
+
+
+class _NpyWriter:
+    """
+    Write the npy cache directory of a dataset.
+
+    The layout is a features.npy matrix (rows x features, C order) and a
+    target.npy vector holding raw values, plus a header.json describing the
+    columns. Rows are appended to raw files as they arrive and only wrapped
+    with the .npy headers on close, once the number of rows is known, so a
+    streamed dataset is never held whole in memory.
+    """
+
+    def __init__(self, file):
+        if os.path.isdir(file):
+            shutil.rmtree(file)
+        os.makedirs(file)
+        self.file = file
+        self.header = None
+        self.rows = 0
+        self.features = open(os.path.join(file, 'features.bin'), 'wb')
+        self.target = open(os.path.join(file, 'target.bin'), 'wb')
+
+    def write(self, df):
+        data, target = split_target(df)
+
+        if self.header is None:
+            dtypes = [str(dtype) for dtype in data.dtypes]
+            if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in data.dtypes):
+                raise ValueError("The npy cache format only supports numeric datasets")
+
+            self.header = {
+                'version': NPY_CACHE_VERSION,
+                'columns': [str(col) for col in data.columns],
+                'dtypes': dtypes,
+                'dtype': str(np.result_type(*data.dtypes)),
+                'target_dtype': str(target.dtype),
+            }
+
+        # Converted in blocks of rows, so a whole dataset is never copied into one matrix
+        for start in range(0, len(df), NPY_WRITE_ROWS):
+            rows = slice(start, start + NPY_WRITE_ROWS)
+            self.features.write(np.ascontiguousarray(data.iloc[rows].to_numpy(dtype=self.header['dtype'])).tobytes())
+            self.target.write(np.ascontiguousarray(target.iloc[rows].to_numpy(dtype=self.header['target_dtype'])).tobytes())
+        self.rows += len(df)
+
+    def abort(self):
+        self.features.close()
+        self.target.close()
+        shutil.rmtree(self.file, ignore_errors=True)
+
+    def _finish(self, raw, name, dtype, shape):
+        raw.close()
+        raw_path = raw.name
+        with open(os.path.join(self.file, name), 'wb') as f:
+            np.lib.format.write_array_header_1_0(f, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                     'fortran_order': False, 'shape': shape})
+            with open(raw_path, 'rb') as source:
+                shutil.copyfileobj(source, f, 16 * 1024 * 1024)
+        os.remove(raw_path)
+
+    def close(self):
+        if self.header is None:
+            raise ValueError("Cannot write an empty dataset to the npy cache")
+
+        self.header['rows'] = self.rows
+        self._finish(self.features, 'features.npy', self.header['dtype'], (self.rows, len(self.header['columns'])))
+        self._finish(self.target, 'target.npy', self.header['target_dtype'], (self.rows,))
+
+        with open(os.path.join(self.file, 'header.json'), 'w') as f:
+            json.dump(self.header, f, indent=2)
+
+
+def migrate_cache(path, cache_format='parquet', remove=False):
+    """
+    Convert every CSV cache found in path to another cache format.
+
+    Loaders find the converted files automatically, so existing save_path /
+    load_path directories can be migrated in place.
+
+    :param path: Directory holding the caches written with save_path
+    :param cache_format: Target format, 'parquet' or 'feather'
+    :param remove: If True, delete the CSV files once they are converted
+
+    :return: The list of written files
+    """
+
+    cache_format = get_cache_format(cache_format)
+    written = []
+    if cache_format == 'csv':
+        return written
+
+    for entry in sorted(os.listdir(path)):
+        name, ext = os.path.splitext(entry)
+        if ext != CACHE_FORMATS['csv']:
+            continue
+
+        df = read_frame(path, name, 'csv')
+        written.append(write_frame(df, path, name, cache_format))
+        del df
+
+        if remove:
+            os.remove(os.path.join(path, entry))
+            if os.path.exists(schema_file(os.path.join(path, entry))):
+                os.remove(schema_file(os.path.join(path, entry)))
+
+    return written
@@ -0,0 +1,465 @@
+import os
+import json
+import time
+import logging
+import requests
+import urllib3
+import contextvars
+from tqdm import tqdm
+from email.utils import formatdate
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Bounds of the adaptive read size: it starts small and grows while data is waiting to be read
+MIN_BLOCK_SIZE = 64 * 1024
+MAX_BLOCK_SIZE = 8 * 1024 * 1024
+
+# Number of times an interrupted download is resumed before giving up
+DOWNLOAD_RETRIES = 5
+
+# Seconds waited before the first retry, doubled on every following one
+RETRY_BACKOFF = 0.5
+
+# Seconds a kept archive is used without asking the server whether it changed
+_revalidate_ttl = float(os.environ.get('LOADDATASET_REVALIDATE_TTL', 24 * 3600))
+
+# Diagnostics go to the logger the spans of instrument.py are logged on
+logger = logging.getLogger('LoadDataset')
+
+# Errors raised when a connection drops or stalls in the middle of a transfer
+_TRANSFER_ERRORS = (requests.RequestException, urllib3.exceptions.HTTPError, ConnectionError, TimeoutError)
+
+
+# Session used by the downloads of the current thread when none is passed, see using_session
+_session = contextvars.ContextVar('LoadDataset_session', default=None)
+
+
+def new_session(pool_size=10):
+    """
+    Create a requests.Session whose connection pool is large enough for pool_size concurrent transfers.
+
+    :param pool_size: Number of connections kept open per host
+
+    :return: A requests.Session
+    """
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def default_session():
+    """
+    Session set with using_session for the current thread, or None.
+    """
+
+    return _session.get()
+
+
+@contextmanager
+def using_session(session):
+    """
+    Make the downloads started inside the block use session when they are not given one.
+
+    The setting is local to the current thread, so loaders running on
+    different threads can share one session or use their own.
+
+    :param session: requests.Session to use
+    """
+
+    token = _session.set(session)
+    try:
+        yield session
+    finally:
+        _session.reset(token)
+
+
+class IncompleteDownload(Exception):
+    """
+    Raised when a response ends before the announced number of bytes.
+    """
+
+
+def _validators(response):
+    # ETag and Last-Modified headers of a response
+    return {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+
+
+def _write_meta(meta_path, url, response):
+    meta = {'url': url, **_validators(response)}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    return meta
+
+
+def set_revalidate_ttl(seconds):
+    """
+    Set how long a downloaded archive kept in download_path is used without checking the server for a new version.
+
+    The initial value is read from the LOADDATASET_REVALIDATE_TTL environment variable and defaults to one day.
+
+    :param seconds: Number of seconds, 0 to check on every load, or None to never check
+    """
+
+    global _revalidate_ttl
+    _revalidate_ttl = float('inf') if seconds is None else float(seconds)
+
+
+def archive_meta_path(dest):
+    """
+    Path of the file holding the validators of a kept archive.
+    """
+
+    return dest + '.json'
+
+
+def read_archive_meta(dest, url):
+    """
+    Load the validators (ETag, Last-Modified) and the time of the last check of a kept archive.
+
+    :param dest: Path of the archive
+    :param url: URL it was downloaded from
+
+    :return: A dict, empty if nothing is recorded for this URL
+    """
+
+    try:
+        with open(archive_meta_path(dest)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return meta if meta.get('url') == url else {}
+
+
+def _write_archive_meta(dest, url, validators, checked):
+    meta = {
+        'url': url,
+        'etag': validators.get('etag'),
+        'last_modified': validators.get('last_modified'),
+        'checked': checked,
+    }
+    with open(archive_meta_path(dest), 'w') as f:
+        json.dump(meta, f)
+
+    return meta
+
+
+def fetch_archive(url, dest, desc=None, session=None, segments=None, ttl=None, timeout=60):
+    """
+    Download a file kept between calls, or check that the kept copy is still the current version.
+
+    The ETag and Last-Modified headers of the response the body was read from
+    are saved next to the file. Within ttl seconds of the last check the kept
+    copy is used without contacting the server. After that, a conditional
+    request with If-None-Match / If-Modified-Since is sent. A 304 answer keeps
+    the copy. A new version is streamed from the body of that same response
+    into the place of the copy, without segments. If the server cannot be
+    reached, the kept copy is used.
+
+    :param url: URL of the file
+    :param dest: Path where the file is kept
+    :param desc: Description shown on the progress bar
+    :param session: requests.Session used for the requests, or None for the one set with using_session or a new connection
+    :param segments: If greater than 1, download the file as this many concurrent byte ranges (see download_segments)
+    :param ttl: Seconds the kept copy is used without a check, defaults to the global setting (see set_revalidate_ttl)
+    :param timeout: Seconds to wait for the server
+
+    :return: True if the file was downloaded, False if the kept copy was used
+    """
+
+    ttl = _revalidate_ttl if ttl is None else ttl
+    http = session or default_session() or requests
+
+    if not os.path.exists(dest):
+        validators = {}
+        download_file(url, dest, desc=desc, session=session, segments=segments, timeout=timeout, validators=validators)
+        _write_archive_meta(dest, url, validators, time.time())
+        return True
+
+    meta = read_archive_meta(dest, url)
+    if time.time() - meta.get('checked', 0) < ttl:
+        return False
+
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    # Archives kept before validators were saved are compared by their modification time
+    headers['If-Modified-Since'] = meta.get('last_modified') or formatdate(os.path.getmtime(dest), usegmt=True)
+
+    try:
+        response = http.get(url, stream=True, headers=headers, timeout=timeout)
+        checked = time.time()
+    except _TRANSFER_ERRORS:
+        logger.warning("Could not check %s for a new version, using the kept copy", url)
+        return False
+
+    with response:
+        if response.status_code == 304:
+            if meta:
+                meta['checked'] = checked
+                with open(archive_meta_path(dest), 'w') as f:
+                    json.dump(meta, f)
+            else:
+                _write_archive_meta(dest, url, _validators(response), checked)
+            return False
+
+        if response.status_code != 200:
+            logger.warning("Could not check %s for a new version (status code %s), using the kept copy", url, response.status_code)
+            return False
+
+        logger.info("%s changed upstream, downloading the new version", url)
+        validators = {}
+        download_file(url, dest + '.new', desc=desc, session=session, timeout=timeout, response=response, validators=validators)
+
+    os.replace(dest + '.new', dest)
+    _write_archive_meta(dest, url, validators, checked)
+
+    return True
+
+
+def iter_adaptive(raw, block_size=MIN_BLOCK_SIZE):
+    """
+    Read a response body in blocks whose size adapts to the connection speed.
+
+    Each read returns the bytes already received, up to block_size. The block
+    size doubles whenever a read fills it, meaning data is arriving faster
+    than it is consumed, and halves when reads come back mostly empty, between
+    MIN_BLOCK_SIZE and MAX_BLOCK_SIZE. A fast link is read in a few large
+    blocks instead of millions of 1 KiB iterations, and the bytes received
+    before a dropped connection are never lost.
+
+    :param raw: The urllib3 response of a streamed request (response.raw)
+    :param block_size: Initial number of bytes per read
+
+    :return: An iterator of bytes objects
+    """
+
+    # urllib3 < 2 has no read1, a plain read waits for the block to fill
+    read = getattr(raw, 'read1', raw.read)
+
+    while True:
+        data = read(block_size, decode_content=True)
+        if not data:
+            return
+
+        yield data
+
+        if len(data) == block_size:
+            block_size = min(block_size * 2, MAX_BLOCK_SIZE)
+        elif len(data) < block_size // 4:
+            block_size = max(block_size // 2, MIN_BLOCK_SIZE)
+
+
+def _probe(http, url, timeout):
+    # Size, range support and validators of the remote file, from a HEAD request
+    response = http.head(url, timeout=timeout, allow_redirects=True)
+    if response.status_code != 200:
+        return 0, False, {}
+
+    size = int(response.headers.get('content-length', 0))
+    ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+    return size, ranges, _validators(response)
+
+
+def _download_segment(http, url, path, start, end, validator, t, retries, timeout):
+    # Fetch the bytes start..end (inclusive) into their place in the preallocated file
+    # and return the number of bytes written
+    position = start
+    attempt = 0
+
+    while position <= end:
+        headers = {'Range': f'bytes={position}-{end}'}
+        if validator:
+            headers['If-Range'] = validator
+
+        try:
+            with http.get(url, stream=True, headers=headers, timeout=timeout) as response:
+                if response.status_code != 206:
+                    raise ValueError(f"Failed to download a segment of {url}: the file changed or ranges are not supported. Status code: {response.status_code}")
+
+                with open(path, 'r+b') as f:
+                    f.seek(position)
+                    for data in iter_adaptive(response.raw):
+                        data = data[:end + 1 - position]
+                        f.write(data)
+                        position += len(data)
+                        t.update(len(data))
+                        if position > end:
+                            break
+
+            if position <= end:
+                raise IncompleteDownload(f"Segment {start}-{end} of {url} stopped at byte {position}")
+
+        except _TRANSFER_ERRORS + (IncompleteDownload,) as e:
+            attempt += 1
+            if attempt > retries:
+                raise IncompleteDownload(f"Download of {url} failed after {retries} retries: {e}") from e
+            time.sleep(min(RETRY_BACKOFF * 2 ** (attempt - 1), 30))
+
+    return position - start
+
+
+def download_segments(url, dest, segments, desc=None, session=None, retries=None, timeout=60, validators=None):
+    """
+    Download a file as several byte ranges fetched concurrently.
+
+    The file is preallocated at ``dest + '.segments'`` and every range is
+    written in place by its own thread, resuming on its own after a dropped
+    connection. The size is verified before the file is renamed to ``dest``.
+
+    :param url: URL of the file to download
+    :param dest: Path where the downloaded file is written
+    :param segments: Number of concurrent ranges
+    :param desc: Description shown on the progress bar
+    :param session: requests.Session used for the requests, or None for the one set with using_session or new connections
+    :param retries: Number of times an interrupted range is resumed, defaults to DOWNLOAD_RETRIES
+    :param timeout: Seconds to wait for the server before a transfer counts as interrupted
+    :param validators: If provided, a dict filled with the ETag and Last-Modified of the file, every range being requested with If-Range on them
+
+    :return: The path of the downloaded file, or None if the server does not support ranges
+    """
+
+    http = session or default_session() or requests
+    retries = DOWNLOAD_RETRIES if retries is None else retries
+
+    size, ranges, probed = _probe(http, url, timeout)
+    if not ranges or not size:
+        return None
+    validator = probed['etag'] or probed['last_modified']
+
+    segments = max(1, min(segments, size // MIN_BLOCK_SIZE or 1))
+    bounds = [size * i // segments for i in range(segments + 1)]
+
+    part_path = dest + '.segments'
+    with open(part_path, 'wb') as f:
+        f.truncate(size)
+
+    t = tqdm(total=size, unit='iB', unit_scale=True, desc=desc)
+    try:
+        with ThreadPoolExecutor(segments) as pool:
+            futures = [pool.submit(_download_segment, http, url, part_path, bounds[i], bounds[i + 1] - 1,
+                                   validator, t, retries, timeout)
+                       for i in range(segments)]
+            received = sum(future.result() for future in futures)
+    except BaseException:
+        os.remove(part_path)
+        raise
+    finally:
+        t.close()
+
+    if received != size:
+        os.remove(part_path)
+        raise IncompleteDownload(f"Expected {size} bytes from {url}, got {received}")
+
+    os.replace(part_path, dest)
+    if validators is not None:
+        validators.update(probed)
+
+    return dest
+
+
+def download_file(url, dest, desc=None, session=None, retries=None, timeout=60, segments=None, response=None, validators=None):
+    """
+    Download a file over HTTP straight to disk, resuming after interruptions.
+
+    The body is written to ``dest + '.part'`` and only renamed to ``dest``
+    once it is complete, so a file found at ``dest`` is always a finished
+    download. When the connection drops, the transfer continues from the end
+    of the partial file with an HTTP Range request. A partial file left by an
+    earlier call is resumed as well; its ETag / Last-Modified validator is
+    kept next to it and sent as If-Range, so a file that changed upstream is
+    downloaded again from the start instead of being stitched together.
+
+    :param url: URL of the file to download
+    :param dest: Path where the downloaded file is written
+    :param desc: Description shown on the progress bar
+    :param session: requests.Session used for the requests, or None for the one set with using_session or a new connection
+    :param retries: Number of times an interrupted transfer is resumed, defaults to DOWNLOAD_RETRIES
+    :param timeout: Seconds to wait for the server before the transfer counts as interrupted
+    :param segments: If greater than 1, fetch this many byte ranges concurrently when the server supports it (see download_segments)
+    :param response: If provided, a streamed 200 response already received for url, whose body is read first instead of sending a new request
+    :param validators: If provided, a dict filled with the ETag and Last-Modified of the response the body was read from
+
+    :return: The path of the downloaded file
+    """
+
+    session = session or default_session()
+    if response is None and segments and segments > 1 and not os.path.exists(dest + '.part'):
+        if download_segments(url, dest, segments, desc=desc, session=session, retries=retries, timeout=timeout, validators=validators):
+            return dest
+
+    http = session or requests
+    retries = DOWNLOAD_RETRIES if retries is None else retries
+    part_path = dest + '.part'
+    # The validators of the response the partial file comes from, only trusted if it belongs to the same URL
+    meta_path = archive_meta_path(part_path)
+    meta = read_archive_meta(part_path, url)
+    validator = meta.get('etag') or meta.get('last_modified')
+    attempt = 0
+
+    while True:
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {}
+        if offset:
+            headers['Range'] = f'bytes={offset}-'
+            if validator:
+                headers['If-Range'] = validator
+
+        try:
+            if response is None:
+                response = http.get(url, stream=True, headers=headers, timeout=timeout)
+            with response:
+                if response.status_code == 416:
+                    if response.headers.get('Content-Range') != f'bytes */{offset}':
+                        # The partial file is not a prefix of the remote file any more
+                        os.remove(part_path)
+                        continue
+
+                    # The partial file was already complete, it only has to be renamed
+                    total_size = offset
+                else:
+                    if response.status_code not in (200, 206):
+                        raise ValueError(f"Failed to download dataset from {url}. Status code: {response.status_code}")
+
+                    if response.status_code == 200:
+                        # The server ignored the range or the file changed, start over
+                        offset = 0
+                        meta = _write_meta(meta_path, url, response)
+                        validator = meta['etag'] or meta['last_modified']
+
+                    total_size = offset + int(response.headers.get('content-length', 0))
+                    t = tqdm(total=total_size or None, initial=offset, unit='iB', unit_scale=True, desc=desc)
+                    try:
+                        with open(part_path, 'ab' if offset else 'wb') as f:
+                            for data in iter_adaptive(response.raw):
+                                t.update(len(data))
+                                f.write(data)
+                    finally:
+                        t.close()
+
+            if total_size and os.path.getsize(part_path) != total_size:
+                raise IncompleteDownload(f"Received {os.path.getsize(part_path)} of {total_size} bytes from {url}")
+
+        except _TRANSFER_ERRORS + (IncompleteDownload,) as e:
+            attempt += 1
+            if attempt > retries:
+                raise IncompleteDownload(f"Download of {url} failed after {retries} retries: {e}") from e
+            time.sleep(min(RETRY_BACKOFF * 2 ** (attempt - 1), 30))
+            continue
+        finally:
+            # A response given by the caller only serves the first attempt
+            response = None
+
+        os.replace(part_path, dest)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        if validators is not None:
+            validators.update({'etag': meta.get('etag'), 'last_modified': meta.get('last_modified')})
+
+        return dest
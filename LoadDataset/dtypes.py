@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+
+# Named dtype policies accepted by the loaders, besides an explicit {column: dtype} mapping
+DTYPE_POLICIES = ('float32', 'compact')
+
+
+def check_dtype_policy(dtype_policy):
+    """
+    Validate a dtype policy.
+
+    :param dtype_policy: None, 'float32', 'compact' or a {column: dtype} mapping
+
+    :return: The dtype policy
+    """
+
+    if dtype_policy is None or isinstance(dtype_policy, dict) or dtype_policy in DTYPE_POLICIES:
+        return dtype_policy
+
+    raise ValueError(f"Unknown dtype policy {dtype_policy!r}. Choose one of {list(DTYPE_POLICIES)} or pass a mapping")
+
+
+def _explicit(dtype_policy, col):
+    # Mapping keys may be given as the column label or as its string form
+    if isinstance(dtype_policy, dict):
+        for key in (col, str(col)):
+            if key in dtype_policy:
+                return dtype_policy[key]
+
+    return None
+
+
+def parse_dtypes(dtype_policy, columns, float_columns=(), target=None):
+    """
+    Build the dtype argument of read_csv for a dtype policy.
+
+    Float columns are parsed straight into float32 (or the float type given
+    by a mapping), so a float64 copy of the dataset never exists when a
+    smaller type was requested. Other conversions cannot be applied to the
+    raw text safely and are left to apply_dtype_policy.
+
+    :param dtype_policy: None, 'float32', 'compact' or a {column: dtype} mapping
+    :param columns: Labels of the columns the policy may be applied to
+    :param float_columns: Labels of the columns known to hold floats
+    :param target: Label of the target column, matched by the 'target' key of a mapping
+
+    :return: A {column: dtype} mapping, or None if nothing has to change
+    """
+
+    if dtype_policy is None:
+        return None
+
+    dtypes = {}
+    for col in columns:
+        if col not in float_columns:
+            continue
+
+        explicit = _explicit(dtype_policy, 'target' if col == target else col)
+        if explicit is not None:
+            if pd.api.types.is_float_dtype(pd.api.types.pandas_dtype(explicit)):
+                dtypes[col] = explicit
+        elif dtype_policy in DTYPE_POLICIES:
+            dtypes[col] = 'float32'
+
+    return dtypes or None
+
+
+def smallest_integer(series):
+    """
+    Smallest integer dtype able to hold every value of an integer Series.
+    """
+
+    if series.empty:
+        return np.dtype('uint8')
+
+    low, high = series.min(), series.max()
+    if low >= 0:
+        return np.min_scalar_type(high)
+
+    return np.result_type(np.min_scalar_type(low), np.min_scalar_type(-high - 1))
+
+
+def _new_dtype(series, dtype_policy, downcast_integers, name):
+    # dtype a Series has to be converted to, or None if it keeps its type
+    current = series.dtype
+    new = _explicit(dtype_policy, name)
+
+    if new is None and dtype_policy in DTYPE_POLICIES and pd.api.types.is_float_dtype(current):
+        new = 'float32'
+    elif (new is None and dtype_policy == 'compact' and downcast_integers
+          and pd.api.types.is_integer_dtype(current) and not pd.api.types.is_extension_array_dtype(current)):
+        new = smallest_integer(series)
+
+    if new is None or pd.api.types.pandas_dtype(new) == current:
+        return None
+
+    return new
+
+
+def apply_dtype_policy(obj, dtype_policy, downcast_integers=True, target=None):
+    """
+    Convert the columns of a DataFrame (or a Series) according to a dtype policy.
+
+    - 'float32': float columns become float32
+    - 'compact': as 'float32', and integer columns become the smallest integer type that holds their values
+    - mapping: the listed columns ('target' for the target) are converted to the given dtypes
+
+    Columns are converted one at a time, so at most one extra column is allocated.
+
+    :param obj: DataFrame or Series to convert
+    :param dtype_policy: None, 'float32', 'compact' or a {column: dtype} mapping
+    :param downcast_integers: If False, integer columns keep their type under 'compact', which keeps the dtypes of streamed batches identical
+    :param target: Label of the target column of a DataFrame, matched by the 'target' key of a mapping
+
+    :return: The converted DataFrame or Series
+    """
+
+    if dtype_policy is None:
+        return obj
+
+    if isinstance(obj, pd.Series):
+        new = _new_dtype(obj, dtype_policy, downcast_integers, obj.name)
+        return obj if new is None else obj.astype(new)
+
+    for col in obj.columns:
+        new = _new_dtype(obj[col], dtype_policy, downcast_integers, 'target' if col == target else col)
+        if new is not None:
+            obj[col] = obj[col].astype(new)
+
+    return obj
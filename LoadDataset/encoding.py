@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from .instrument import span
+
+
+def codes_dtype(n_categories, dtype_policy=None):
+    """
+    dtype of the codes of a column with n_categories categories.
+
+    Codes are int64, as LabelEncoder returns them, unless the 'compact'
+    policy asks for the smallest unsigned type that holds them.
+    """
+
+    if dtype_policy == 'compact':
+        return np.min_scalar_type(max(n_categories - 1, 0))
+
+    return np.dtype('int64')
+
+
+def _plain(value):
+    # Categories as JSON friendly Python values, with None for a missing value
+    if pd.isna(value):
+        return None
+
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def encode_column(values, categories=None, dtype=None):
+    """
+    Replace the values of a column with integer codes in a single vectorized pass.
+
+    Without categories the sorted unique values become the categories, which
+    gives the same codes as LabelEncoder, including a missing value sorted
+    last. With categories, values are looked up in them and unknown ones get
+    the code -1.
+
+    :param values: Series or array to encode
+    :param categories: Known categories, in code order
+    :param dtype: dtype of the codes, defaults to int64
+
+    :return: A tuple with the array of codes and the list of categories
+    """
+
+    with span('encode', columns=1) as the_span:
+        the_span.set(rows=len(values))
+        return _encode(values, categories, dtype)
+
+
+def _encode(values, categories=None, dtype=None):
+    if categories is None:
+        codes, uniques = pd.factorize(values, sort=True, use_na_sentinel=False)
+        categories = [_plain(value) for value in uniques]
+    else:
+        lookup = pd.Index([np.nan if value is None else value for value in categories], dtype=object)
+        codes = lookup.get_indexer(values)
+
+    return codes.astype(dtype or np.int64, copy=False), categories
+
+
+def categorical_columns(df):
+    """
+    Labels of the columns of a DataFrame holding text rather than numbers.
+    """
+
+    return [col for col in df.columns
+            if not pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])]
+
+
+def encode_columns(df, columns=None, categories=None, dtype_policy=None):
+    """
+    Encode the categorical columns of a DataFrame in place.
+
+    :param df: DataFrame to encode
+    :param columns: Labels of the columns to encode, defaults to the columns holding text
+    :param categories: {column: categories} of columns whose categories are already known, as returned by an earlier call
+    :param dtype_policy: 'compact' stores the codes in the smallest integer type
+
+    :return: The {str(column): categories} mapping used to encode the columns
+    """
+
+    columns = categorical_columns(df) if columns is None else columns
+    categories = categories or {}
+
+    mappings = {}
+    with span('encode', columns=len(columns)) as the_span:
+        the_span.set(rows=len(df))
+        for col in columns:
+            known = categories.get(str(col), categories.get(col))
+            codes, mappings[str(col)] = _encode(df[col], known)
+            df[col] = codes.astype(codes_dtype(len(mappings[str(col)]), dtype_policy), copy=False)
+
+    return mappings
+
+
+def decode_column(codes, categories):
+    """
+    Map integer codes back to their categories.
+
+    :param codes: Series or array of codes
+    :param categories: Categories of the column, in code order
+
+    :return: A Series (or an array) with the original values
+    """
+
+    values = np.array([np.nan if value is None else value for value in categories], dtype=object)
+    decoded = values[np.asarray(codes)]
+
+    if isinstance(codes, pd.Series):
+        return pd.Series(decoded, index=codes.index, name=codes.name)
+
+    return decoded
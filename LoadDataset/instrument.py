@@ -0,0 +1,291 @@
+import io
+import os
+import sys
+import time
+import logging
+import resource
+import functools
+import contextvars
+from contextlib import contextmanager
+
+
+# Phases reported by the loaders
+PHASES = ('load', 'download', 'decompress', 'parse', 'encode', 'cache_write', 'cache_read')
+
+# Spans are also logged at DEBUG level on this logger
+logger = logging.getLogger('LoadDataset')
+
+# Callbacks receiving every finished span
+_listeners = []
+
+# Innermost open span of the current thread, so nested spans know their dataset
+_current = contextvars.ContextVar('LoadDataset_span', default=None)
+
+
+def add_listener(listener):
+    """
+    Register a callback called with every finished Span.
+
+    :param listener: Callable taking a Span
+    """
+
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener):
+    """
+    Unregister a callback added with add_listener.
+
+    :param listener: Callable given to add_listener
+    """
+
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+@contextmanager
+def recording():
+    """
+    Collect the spans emitted inside the block.
+
+    :return: A list filled with the finished spans, in the order they end
+    """
+
+    spans = []
+    add_listener(spans.append)
+    try:
+        yield spans
+    finally:
+        remove_listener(spans.append)
+
+
+def enabled():
+    """
+    Tell whether spans are recorded, i.e. a listener is registered or DEBUG logging is on for the LoadDataset logger.
+
+    :return: True if spans are recorded
+    """
+
+    return bool(_listeners) or logger.isEnabledFor(logging.DEBUG)
+
+
+def _rss():
+    # Current resident set size; only the peak is available outside Linux
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Span:
+    """
+    Timing of one phase of a load.
+
+    :ivar phase: Name of the phase, one of PHASES
+    :ivar dataset: Name of the dataset being loaded, or None outside a loader
+    :ivar parent: Phase of the enclosing span, or None
+    :ivar start: Wall clock time the phase started, in seconds since the epoch
+    :ivar duration: Seconds spent in the phase
+    :ivar bytes: Number of bytes downloaded, decompressed, written or read, if known
+    :ivar rows: Number of rows parsed, encoded, written or read, if known
+    :ivar memory_delta: Change of the resident set size over the phase, in bytes
+    :ivar extra: Further details of the phase, such as the parse engine or cache format
+    """
+
+    __slots__ = ('phase', 'dataset', 'start', 'duration', 'bytes', 'rows', 'memory_delta', 'extra', 'parent')
+
+    def __init__(self, phase, dataset=None, parent=None, **extra):
+        self.phase = phase
+        self.dataset = dataset
+        self.parent = parent
+        self.start = time.time()
+        self.duration = None
+        self.bytes = None
+        self.rows = None
+        self.memory_delta = None
+        self.extra = extra
+
+    def set(self, bytes=None, rows=None, **extra):
+        """
+        Record the amount of data processed by the phase.
+        """
+
+        if bytes is not None:
+            self.bytes = bytes
+        if rows is not None:
+            self.rows = rows
+        self.extra.update(extra)
+
+    def as_dict(self):
+        """
+        :return: The span as a plain dict, ready to be serialized
+        """
+
+        return {'phase': self.phase, 'dataset': self.dataset, 'start': self.start, 'duration': self.duration,
+                'bytes': self.bytes, 'rows': self.rows, 'memory_delta': self.memory_delta, **self.extra}
+
+    def __repr__(self):
+        return f"Span({', '.join(f'{k}={v!r}' for k, v in self.as_dict().items() if v is not None)})"
+
+
+class _NullSpan:
+    # Stand-in yielded when nothing records spans, so instrumented code costs a function call
+
+    def set(self, bytes=None, rows=None, **extra):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def emit(span):
+    """
+    Hand a finished span to the listeners and to the logger.
+
+    :param span: Finished Span
+    """
+
+    for listener in list(_listeners):
+        listener(span)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", span)
+
+
+@contextmanager
+def span(phase, dataset=None, **extra):
+    """
+    Time a phase of a load and emit it as a Span when the block exits.
+
+    The dataset defaults to the one of the enclosing span. Nothing is measured
+    when no listener is registered and DEBUG logging is off.
+
+    :param phase: Name of the phase, one of PHASES
+    :param dataset: Name of the dataset, defaults to the one of the enclosing span
+    :param extra: Further details stored on the span
+
+    :return: The Span, whose bytes and rows can be filled in with set
+    """
+
+    if not enabled():
+        yield _NULL_SPAN
+        return
+
+    parent = _current.get()
+    if dataset is None and parent is not None:
+        dataset = parent.dataset
+
+    the_span = Span(phase, dataset, parent.phase if parent is not None else None, **extra)
+    token = _current.set(the_span)
+    memory = _rss()
+    start = time.perf_counter()
+    try:
+        yield the_span
+    finally:
+        the_span.duration = time.perf_counter() - start
+        the_span.memory_delta = _rss() - memory
+        _current.reset(token)
+        emit(the_span)
+
+
+def instrumented(dataset):
+    """
+    Decorator wrapping a loader in a 'load' span, the parent of the spans of its phases.
+
+    :param dataset: Name of the dataset loaded by the function
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return function(*args, **kwargs)
+
+            with span('load', dataset) as the_span:
+                result = function(*args, **kwargs)
+                if isinstance(result, tuple) and result and hasattr(result[0], 'shape'):
+                    the_span.set(rows=result[0].shape[0])
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+class _TimedReader(io.RawIOBase):
+    """
+    Count the bytes read from a file and the time spent reading them.
+
+    Decompression happens lazily inside the reads of the parser, so its cost
+    is only known by timing the reads themselves.
+    """
+
+    def __init__(self, raw, phase, extra):
+        self.raw = raw
+        self.phase = phase
+        self.extra = extra
+        self.elapsed = 0.0
+        self.count = 0
+        self.parent = _current.get()
+        self.start = time.time()
+        self.memory = _rss()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        # Rewinding is left to the wrapped file, the KDD99 batches read it twice
+        return self.raw.seekable()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.raw.seek(offset, whence)
+
+    def tell(self):
+        return self.raw.tell()
+
+    def readinto(self, b):
+        start = time.perf_counter()
+        data = self.raw.read(len(b))
+        self.elapsed += time.perf_counter() - start
+        b[:len(data)] = data
+        self.count += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            parent = self.parent
+            the_span = Span(self.phase, parent.dataset if parent is not None else None,
+                            parent.phase if parent is not None else None, **self.extra)
+            the_span.start = self.start
+            the_span.duration = self.elapsed
+            the_span.bytes = self.count
+            the_span.memory_delta = _rss() - self.memory
+            emit(the_span)
+        super().close()
+
+
+@contextmanager
+def timed_reader(the_file, phase='decompress', **extra):
+    """
+    Wrap a file so the time spent reading it is emitted as a span when the block exits.
+
+    :param the_file: Binary file object
+    :param phase: Name of the phase the reads belong to
+    :param extra: Further details stored on the span
+
+    :return: A buffered binary file object reading the_file, or the_file itself when spans are not recorded
+    """
+
+    if not enabled():
+        yield the_file
+        return
+
+    reader = _TimedReader(the_file, phase, extra)
+    try:
+        yield io.BufferedReader(reader)
+    finally:
+        reader.close()
@@ -0,0 +1,195 @@
+import os
+import json
+import inspect
+import functools
+import threading
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+
+
+# Arguments that do not change what a loader returns, or that are applied around it (see splittable)
+_IGNORED_ARGUMENTS = ('debug', 'split', 'seed')
+
+_budget = int(os.environ.get('LOADDATASET_MEMORY_BUDGET', '0') or 0)
+_entries = OrderedDict()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_lock = threading.RLock()
+
+
+def set_memory_budget(budget):
+    """
+    Set the number of bytes the in-process cache of loaded datasets may hold.
+
+    The cache is off until a budget is set. The initial value is read from
+    the LOADDATASET_MEMORY_BUDGET environment variable. Least recently used
+    datasets are evicted to stay within the budget.
+
+    :param budget: Number of bytes, or 0 / None to turn the cache off and empty it
+    """
+
+    global _budget
+
+    with _lock:
+        _budget = int(budget or 0)
+        _evict(0)
+
+
+def get_memory_budget():
+    """
+    :return: The byte budget of the in-process cache, 0 when it is off
+    """
+
+    return _budget
+
+
+def clear_memory_cache():
+    """
+    Drop every dataset held by the in-process cache and reset its statistics.
+    """
+
+    with _lock:
+        _entries.clear()
+        _stats.update(hits=0, misses=0, evictions=0)
+
+
+def memory_cache_info():
+    """
+    Statistics of the in-process cache.
+
+    :return: A dict with the hits, misses and evictions counts, the number of entries, the bytes they hold and the budget
+    """
+
+    with _lock:
+        return {**_stats, 'entries': len(_entries), 'bytes': sum(size for _, size in _entries.values()), 'budget': _budget}
+
+
+def _copy_on_write():
+    return int(pd.__version__.split('.')[0]) >= 3 or pd.options.mode.copy_on_write is True
+
+
+def _readonly(series):
+    # A read-only view of the values of a column, writes through it raise
+    if not isinstance(series.dtype, np.dtype):
+        return series.array
+    values = series.to_numpy()
+    values.flags.writeable = False
+    return values
+
+
+def _freeze(result):
+    # Without copy-on-write the cached frames are rebuilt over read-only views
+    # of their arrays, so a write by the caller raises instead of reaching them
+    if _copy_on_write():
+        return result
+
+    frozen = []
+    for obj in result:
+        if isinstance(obj, pd.Series):
+            view = pd.Series(_readonly(obj), index=obj.index, name=obj.name, copy=False)
+        else:
+            view = pd.DataFrame({i: _readonly(obj.iloc[:, i]) for i in range(obj.shape[1])}, index=obj.index, copy=False)
+            view.columns = obj.columns
+        view.attrs = obj.attrs
+        frozen.append(view)
+
+    return tuple(frozen)
+
+
+def _protect(result):
+    # Shallow copies share the cached arrays: copy-on-write or their read-only
+    # flag keeps the caller's writes away from them. Only columns that cannot
+    # be flagged read-only, such as extension arrays, are copied
+    served = []
+    for obj in result:
+        view = obj.copy(deep=False)
+        if not _copy_on_write():
+            if isinstance(view, pd.Series):
+                if not isinstance(view.dtype, np.dtype):
+                    view = view.copy()
+            else:
+                for i, dtype in enumerate(view.dtypes):
+                    if not isinstance(dtype, np.dtype):
+                        view.isetitem(i, view.iloc[:, i].copy())
+        served.append(view)
+
+    return tuple(served)
+
+
+def _nbytes(result):
+    return int(sum(np.sum(obj.memory_usage(deep=True, index=True)) for obj in result))
+
+
+def _evict(size):
+    # Drop least recently used entries until size more bytes fit in the budget
+    used = sum(entry_size for _, entry_size in _entries.values())
+    while _entries and used + size > _budget:
+        _, (_, entry_size) = _entries.popitem(last=False)
+        used -= entry_size
+        _stats['evictions'] += 1
+
+
+def call_key(name, function, args, kwargs):
+    """
+    Key identifying what a call of a loader returns.
+
+    :param name: Name of the dataset
+    :param function: Loader
+    :param args: Positional arguments of the call
+    :param kwargs: Keyword arguments of the call
+
+    :return: A (name, options) tuple, or None if the call saves the dataset or returns batches
+    """
+
+    arguments = inspect.signature(function).bind(*args, **kwargs)
+    arguments.apply_defaults()
+    options = {key: value for key, value in arguments.arguments.items() if key not in _IGNORED_ARGUMENTS}
+    if options.get('save_path') or options.get('chunksize'):
+        # Saving has side effects and batches are consumed once, neither is memoized
+        return None
+
+    return name, json.dumps(options, sort_keys=True, default=repr)
+
+
+def memoized(name):
+    """
+    Decorator serving repeated calls of a loader with the same arguments from the in-process cache.
+
+    :param name: Name of the dataset loaded by the function
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _budget:
+                return function(*args, **kwargs)
+
+            key = call_key(name, function, args, kwargs)
+            if key is None:
+                return function(*args, **kwargs)
+
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None:
+                    _entries.move_to_end(key)
+                    _stats['hits'] += 1
+                    return _protect(entry[0])
+                _stats['misses'] += 1
+
+            result = function(*args, **kwargs)
+
+            size = _nbytes(result)
+            with _lock:
+                if size > _budget:
+                    return result
+                result = _freeze(result)
+                _entries.pop(key, None)
+                _evict(size)
+                _entries[key] = (result, size)
+
+            return _protect(result)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,168 @@
+import io
+import os
+import importlib.util
+import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .instrument import span
+
+
+# Engines accepted by read_csv
+PARSE_ENGINES = ('c', 'pyarrow', 'parallel')
+
+# Size of the blocks of decompressed CSV handed to each worker of the parallel engine
+PARALLEL_BLOCK_SIZE = 32 * 1024 * 1024
+
+
+def check_engine(engine):
+    """
+    Validate the name of a parse engine.
+
+    :param engine: One of 'c', 'pyarrow' or 'parallel'
+
+    :return: The name of the parse engine
+    """
+
+    if engine not in PARSE_ENGINES:
+        raise ValueError(f"Unknown parse engine {engine!r}. Choose one of {list(PARSE_ENGINES)}")
+
+    return engine
+
+
+def iter_blocks(the_file, block_size=PARALLEL_BLOCK_SIZE):
+    """
+    Read a file in blocks of about block_size bytes that end on a line break.
+
+    :param the_file: Binary file object
+    :param block_size: Number of bytes read at a time
+
+    :return: An iterator of bytes objects holding whole lines
+    """
+
+    rest = b''
+    while True:
+        chunk = the_file.read(block_size)
+        if not chunk:
+            break
+
+        chunk = rest + chunk
+        cut = chunk.rfind(b'\n') + 1
+        if cut == 0:
+            rest = chunk
+            continue
+
+        yield chunk[:cut]
+        rest = chunk[cut:]
+
+    if rest:
+        yield rest
+
+
+def _parse_block(block, kwargs):
+    return pd.read_csv(io.BytesIO(block), **kwargs)
+
+
+def parallel_read_csv(the_file, workers=None, block_size=None, **kwargs):
+    """
+    Parse a CSV stream by handing blocks of lines to a pool of threads.
+
+    The C parser releases the GIL while it tokenizes and converts numbers, so
+    blocks are parsed concurrently while the next ones are still being read
+    and decompressed. Frames are concatenated in the original row order, so
+    the result matches a single read_csv call whenever every block infers
+    the same column types, as is the case for the datasets loaded here. At
+    most two blocks per worker are in flight, which bounds the memory used
+    by raw text.
+
+    :param the_file: Binary file object with the CSV
+    :param workers: Number of parsing threads, defaults to the number of CPUs
+    :param block_size: Number of bytes per block, defaults to PARALLEL_BLOCK_SIZE
+    :param kwargs: Further arguments passed to pd.read_csv
+
+    :return: A DataFrame
+    """
+
+    workers = workers or os.cpu_count() or 1
+    block_size = block_size or PARALLEL_BLOCK_SIZE
+
+    # Only the first block holds the header, the others get the column names
+    if kwargs.get('header', 'infer') is not None and kwargs.get('names') is None:
+        kwargs['names'] = the_file.readline().decode().rstrip('\r\n').split(kwargs.get('sep', ','))
+    kwargs['header'] = None
+
+    frames = []
+    with ThreadPoolExecutor(workers) as pool:
+        pending = deque()
+        for block in iter_blocks(the_file, block_size):
+            pending.append(pool.submit(_parse_block, block, kwargs))
+            if len(pending) >= 2 * workers:
+                frames.append(pending.popleft().result())
+        frames.extend(future.result() for future in pending)
+
+    if not frames:
+        return pd.read_csv(io.BytesIO(b''), **kwargs)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_csv(the_file, engine='c', workers=None, **kwargs):
+    """
+    Parse a CSV file with the selected engine.
+
+    - 'c': a single pd.read_csv call, on one core
+    - 'pyarrow': pyarrow's multithreaded reader; floats are correctly rounded, which may differ from the C parser in the last bit
+    - 'parallel': the C parser run on blocks of lines by a pool of threads, identical to 'c'
+
+    When nrows is given, the C parser is used whatever the engine.
+
+    :param the_file: Binary file object with the CSV
+    :param engine: One of 'c', 'pyarrow' or 'parallel'
+    :param workers: Number of threads of the 'parallel' engine, defaults to the number of CPUs
+    :param kwargs: Further arguments passed to pd.read_csv
+
+    :return: A DataFrame
+    """
+
+    engine = check_engine(engine)
+
+    with span('parse', engine=engine) as the_span:
+        df = _read_csv(the_file, engine, workers, **kwargs)
+        the_span.set(rows=len(df))
+
+    return df
+
+
+def _read_csv(the_file, engine, workers, **kwargs):
+    if kwargs.get('nrows') is not None:
+        # Only the C parser stops reading once it has the rows
+        return pd.read_csv(the_file, **kwargs)
+
+    if engine == 'parallel':
+        return parallel_read_csv(the_file, workers=workers, **kwargs)
+
+    if engine == 'pyarrow':
+        # pandas imports pyarrow itself, it only has to be installed
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("The pyarrow parse engine requires pyarrow. Install it with 'pip install pyarrow'")
+
+        if kwargs.get('usecols') is not None and kwargs.get('names') is not None:
+            return _pyarrow_usecols(the_file, **kwargs)
+
+        return pd.read_csv(the_file, engine='pyarrow', **kwargs)
+
+    return pd.read_csv(the_file, **kwargs)
+
+
+def _pyarrow_usecols(the_file, names, usecols, dtype=None, **kwargs):
+    # pandas cannot combine names with usecols on the pyarrow engine, so the
+    # positions are read unnamed and labelled afterwards
+    positions = sorted(usecols)
+    kwargs['header'] = None
+    df = pd.read_csv(the_file, engine='pyarrow', usecols=positions, **kwargs)
+    df.columns = [names[i] for i in positions]
+
+    if dtype:
+        df = df.astype({col: t for col, t in dtype.items() if col in df.columns})
+
+    return df
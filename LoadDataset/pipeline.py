@@ -0,0 +1,296 @@
+import io
+import gzip
+import queue
+import zipfile
+import threading
+import contextvars
+import requests
+from contextlib import contextmanager
+
+from .download import default_session
+from .instrument import span
+from .stream import STREAM_BLOCK_SIZE, zip_member_stream
+
+
+# Number of buffers a stage of the pipeline may hold before it waits for the next stage
+PIPELINE_BUFFERS = 16
+
+# Number of decompressed bytes handed to the parser at a time
+PIPELINE_BLOCK_SIZE = 1024 * 1024
+
+# Marks the end of the data of a stage
+END = object()
+
+
+class Failure:
+    """
+    Exception raised by a stage, raised again by the stage reading its output.
+    """
+
+    def __init__(self, error):
+        self.error = error
+
+
+class Channel:
+    """
+    Bounded queue of byte buffers between two stages of a pipeline.
+
+    A producer blocks once ``size`` buffers are waiting, so a fast stage
+    cannot run ahead of a slow one, and at most ``size`` buffers are held in
+    memory. Closing the channel from the consumer side stops the producer.
+
+    :ivar peak: Largest number of bytes waiting in the channel at any time
+    """
+
+    def __init__(self, size=None):
+        self.queue = queue.Queue(size or PIPELINE_BUFFERS)
+        self.closed = threading.Event()
+        self.lock = threading.Lock()
+        self.buffered = 0
+        self.peak = 0
+
+    def put(self, item):
+        """
+        Wait for room and add a buffer (or the end marker).
+
+        :return: False if the channel was closed by the consumer, so the producer should stop
+        """
+
+        size = len(item) if isinstance(item, bytes) else 0
+        with self.lock:
+            self.buffered += size
+            self.peak = max(self.peak, self.buffered)
+
+        while not self.closed.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    def get(self):
+        """
+        Wait for the next buffer.
+
+        :return: A bytes object, or the end marker once the data ends or the channel is closed
+        """
+
+        while True:
+            try:
+                item = self.queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                if self.closed.is_set():
+                    return END
+
+        if isinstance(item, bytes):
+            with self.lock:
+                self.buffered -= len(item)
+
+        return item
+
+    def items(self):
+        """
+        Iterate over the buffers until the end marker, raising the error of a failed producer.
+        """
+
+        while True:
+            item = self.get()
+            if item is END:
+                return
+            if isinstance(item, Failure):
+                raise item.error
+            yield item
+
+    def close(self):
+        self.closed.set()
+
+
+class ChannelReader(io.RawIOBase):
+    """
+    Read the buffers of a channel as a binary stream.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.buffer = memoryview(b'')
+        self.done = False
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self.buffer:
+            if self.done:
+                return 0
+
+            item = self.channel.get()
+            if item is END:
+                self.done = True
+                return 0
+            if isinstance(item, Failure):
+                self.done = True
+                raise item.error
+            self.buffer = memoryview(item)
+
+        size = min(len(b), len(self.buffer))
+        b[:size] = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return size
+
+    def close(self):
+        self.channel.close()
+        super().close()
+
+
+def _stage(blocks, channel):
+    # Run a stage: move the blocks of an iterator into its output channel
+    try:
+        for block in blocks:
+            if not channel.put(block):
+                return
+        channel.put(END)
+    except BaseException as e:
+        channel.put(Failure(e))
+    finally:
+        close = getattr(blocks, 'close', None)
+        if close is not None:
+            close()
+
+
+def network_blocks(url, session=None, timeout=60):
+    """
+    Read the body of a remote file as it arrives.
+
+    :param url: URL of the file
+    :param session: requests.Session used for the request, or None for the one set with using_session or a new connection
+    :param timeout: Seconds to wait for the server
+
+    :return: An iterator of bytes objects
+    """
+
+    http = session or default_session() or requests
+    with span('download', url=url, pipelined=True) as the_span:
+        with http.get(url, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                raise ValueError(f"Failed to download dataset from {url}. Status code: {response.status_code}")
+
+            received = 0
+            while True:
+                data = response.raw.read(STREAM_BLOCK_SIZE, decode_content=True)
+                if not data:
+                    break
+                received += len(data)
+                yield data
+
+        the_span.set(bytes=received)
+
+
+def decompressed_blocks(opener, block_size=None):
+    """
+    Decompress a gzip stream in blocks.
+
+    :param opener: Context manager factory giving the binary stream of gzip data, called in the thread running the stage
+    :param block_size: Number of decompressed bytes per block, defaults to PIPELINE_BLOCK_SIZE
+
+    :return: An iterator of bytes objects
+    """
+
+    block_size = block_size or PIPELINE_BLOCK_SIZE
+    with span('decompress', pipelined=True) as the_span:
+        produced = 0
+        with opener() as compressed, gzip.GzipFile(fileobj=compressed) as the_file:
+            while True:
+                block = the_file.read(block_size)
+                if not block:
+                    break
+                produced += len(block)
+                yield block
+
+        the_span.set(bytes=produced)
+
+
+def run_stage(blocks, channel, name='LoadDataset-pipeline'):
+    """
+    Move the blocks of an iterator into a channel from a background thread.
+
+    The stage runs in the context of the caller, so its spans belong to the
+    current load. The end of the blocks is marked with END, and an exception
+    is passed on as a Failure, raised again by the consumer. Closing the
+    channel stops the thread.
+
+    :param blocks: Iterator of the items to produce, closed when the stage stops
+    :param channel: Channel receiving the items
+    :param name: Name of the thread
+
+    :return: The started thread
+    """
+
+    thread = threading.Thread(target=contextvars.copy_context().run, args=(_stage, blocks, channel),
+                              name=name, daemon=True)
+    thread.start()
+
+    return thread
+
+
+@contextmanager
+def open_pipeline(source, member=None, session=None, buffers=None, block_size=None, timeout=60):
+    """
+    Open the CSV inside an archive through a pipeline of threads.
+
+    A network thread reads the body of a remote archive, a decompression
+    thread inflates it, and the caller parses what comes out, so the three
+    run at the same time and a load takes about as long as its slowest stage.
+    The stages exchange buffers through bounded channels of ``buffers``
+    entries: a stage waits when the next one falls behind, which bounds the
+    memory held between them. A local archive skips the network thread.
+
+    :param source: URL of the archive, or path of a downloaded archive
+    :param member: Name of the gzip member inside a zip archive, or None if the archive is a plain gzip file
+    :param session: requests.Session used for the request, or None for the one set with using_session or a new connection
+    :param buffers: Number of buffers each channel holds, defaults to PIPELINE_BUFFERS
+    :param block_size: Number of decompressed bytes per buffer, defaults to PIPELINE_BLOCK_SIZE
+    :param timeout: Seconds to wait for the server
+
+    :return: A binary file object with the decompressed CSV, whose ``channels`` attribute lists the channels between the stages
+    """
+
+    threads = []
+    channels = []
+    remote = source.startswith(('http://', 'https://'))
+
+    if remote:
+        compressed = Channel(buffers)
+        channels.append(compressed)
+        threads.append(run_stage(network_blocks(source, session=session, timeout=timeout), compressed))
+
+        @contextmanager
+        def opener():
+            with io.BufferedReader(ChannelReader(compressed), STREAM_BLOCK_SIZE) as body:
+                yield zip_member_stream(body, member) if member is not None else body
+    elif member is not None:
+        @contextmanager
+        def opener():
+            with zipfile.ZipFile(source) as the_zip, the_zip.open(member) as gz_file:
+                yield gz_file
+    else:
+        def opener():
+            return open(source, 'rb')
+
+    decompressed = Channel(buffers)
+    channels.append(decompressed)
+    threads.append(run_stage(decompressed_blocks(opener, block_size), decompressed))
+
+    the_file = io.BufferedReader(ChannelReader(decompressed), STREAM_BLOCK_SIZE)
+    the_file.channels = channels
+    try:
+        yield the_file
+    finally:
+        # Stop the stages still running when the reader exits early
+        for channel in channels:
+            channel.close()
+        for thread in threads:
+            thread.join()
+        the_file.close()
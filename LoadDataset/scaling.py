@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+from .stats import frame_stats
+
+
+# Transforms accepted by the scale option of the loaders
+SCALE_METHODS = ('standard', 'minmax')
+
+
+def check_scale(scale):
+    """
+    Validate the name of a scaling transform.
+
+    :param scale: One of 'standard' or 'minmax', or None
+
+    :return: The name of the transform
+    """
+
+    if scale is not None and scale not in SCALE_METHODS:
+        raise ValueError(f"Unknown scaling {scale!r}. Choose one of {list(SCALE_METHODS)}")
+
+    return scale
+
+
+def fit_scale(stats, scale, columns=None):
+    """
+    Scaling parameters of the features of a dataset, from its statistics.
+
+    - 'standard': (x - mean) / std
+    - 'minmax': (x - min) / (max - min)
+
+    A constant column is only shifted.
+
+    :param stats: Statistics of the dataset, see frame_stats and describe
+    :param scale: One of 'standard' or 'minmax'
+    :param columns: Labels of the columns to scale, defaults to every numeric feature of stats
+
+    :return: A dict with the transform, the labels of the scaled columns (as strings) and the offset and scale of each, so that x' = (x - offset) / scale
+    """
+
+    check_scale(scale)
+    labels = [str(col) for col in columns] if columns is not None else list(stats['columns'])
+
+    params = {'method': scale, 'columns': [], 'offset': [], 'scale': []}
+    for col in labels:
+        column = stats['columns'].get(col)
+        if column is None:
+            continue
+
+        if scale == 'standard':
+            offset, spread = column['mean'], column['std']
+        else:
+            offset, spread = column['min'], column['max'] - column['min']
+
+        params['columns'].append(col)
+        params['offset'].append(offset)
+        params['scale'].append(spread or 1.0)
+
+    return params
+
+
+def apply_scale(df, params, copy=True):
+    """
+    Scale the columns of a DataFrame with parameters fitted by fit_scale, e.g. to transform test data like the training data.
+
+    Float columns are transformed one at a time and written back in place,
+    keeping their type, so a frame that does not share its memory is scaled
+    without a copy when copy is False. Integer columns are replaced by
+    float64 columns. Columns absent from params are left as they are.
+
+    :param df: DataFrame, whose column labels are matched as strings
+    :param params: Scaling parameters, see fit_scale (loaders return them in data.attrs['scale'])
+    :param copy: If False, scale df itself
+
+    :return: The scaled DataFrame
+    """
+
+    if copy:
+        df = df.copy()
+
+    positions = {str(col): i for i, col in enumerate(df.columns)}
+    for col, offset, scale in zip(params['columns'], params['offset'], params['scale']):
+        if col not in positions:
+            continue
+
+        # No view of the column may outlive the read, or writing it back copies every column sharing its block
+        i = positions[col]
+        if pd.api.types.is_float_dtype(df.dtypes.iloc[i]):
+            values = df.iloc[:, i].to_numpy(copy=True)
+            values -= values.dtype.type(offset)
+            values /= values.dtype.type(scale)
+            df.iloc[:, i] = values
+        else:
+            df.isetitem(i, (df.iloc[:, i].to_numpy(dtype=np.float64) - offset) / scale)
+
+    return df
+
+
+def scale_features(df, scale, stats=None, target_column=0, categories=None):
+    """
+    Fit a scaling transform on the features of a DataFrame and scale them in place.
+
+    The loaders call it on the frame they just built, before the target is
+    split off, so the features are scaled without a copy of the dataset.
+
+    :param df: DataFrame holding the target and the features
+    :param scale: One of 'standard' or 'minmax'
+    :param stats: Statistics of the dataset (see frame_stats), computed from df if None
+    :param target_column: Position of the target column, or None if df only holds features
+    :param categories: Mappings of the label encoded columns, which are not scaled
+
+    :return: The fitted parameters, see fit_scale
+    """
+
+    if target_column is not None:
+        target_column = target_column % df.shape[1]
+    encoded = {str(col) for col in categories or {}}
+    columns = [str(col) for i, col in enumerate(df.columns) if i != target_column and str(col) not in encoded]
+
+    params = fit_scale(stats or frame_stats(df, target_column), scale, columns)
+    apply_scale(df, params, copy=False)
+
+    return params
+
+
+def with_scale(obj, params):
+    """
+    Attach scaling parameters to a DataFrame as attrs['scale'].
+    """
+
+    if params:
+        obj.attrs['scale'] = params
+
+    return obj
@@ -0,0 +1,336 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from .cache import cache_size, find_cache_file, iter_frames, read_categories, with_categories, write_categories
+from .pipeline import Channel, run_stage
+
+
+# Version of the layout of a shard directory, bumped on incompatible changes
+SHARD_VERSION = 1
+
+# Number of rows of a shard
+SHARD_ROWS = 65536
+
+# Number of shards a sampler shuffles together
+SAMPLER_BUFFER_SHARDS = 4
+
+# Number of minibatches a sampler prepares ahead of the training loop
+SAMPLER_PREFETCH = 4
+
+
+def shard_dir(path, name):
+    """
+    Path of the shard directory of a dataset saved in path.
+    """
+
+    return os.path.join(path, name + '.shards')
+
+
+def _shard_files(directory, i):
+    return os.path.join(directory, f'features-{i:05d}.npy'), os.path.join(directory, f'target-{i:05d}.npy')
+
+
+def _source_stamp(path, name):
+    # Size and modification time of the cache the shards were written from, None if there is none
+    try:
+        file, _ = find_cache_file(path, name)
+    except FileNotFoundError:
+        return None
+
+    return [cache_size(file), os.stat(file).st_mtime_ns]
+
+
+def read_shard_index(path, name):
+    """
+    Index of the shard directory of a dataset saved in path.
+
+    :return: A dict with the columns, their types, the shard size and the offsets of the shards
+        (the first row of every shard, then the number of rows), or None if there are no valid shards
+    """
+
+    try:
+        with open(os.path.join(shard_dir(path, name), 'index.json')) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if index.get('version') != SHARD_VERSION:
+        return None
+    if index.get('source') is not None and index['source'] != _source_stamp(path, name):
+        # The cache was written again after the shards
+        return None
+
+    return index
+
+
+class ShardWriter:
+    """
+    Write a dataset as shards of a fixed number of rows, one DataFrame at a time.
+
+    Every shard is a features.npy matrix (rows x features, C order, in the
+    common type of the columns) and a target.npy vector. The index.json file
+    records the columns and the offset of every shard, so any row can be
+    found without reading the others. Memory holds at most one shard and the
+    DataFrame being written. The directory is published once complete.
+    """
+
+    def __init__(self, path, name, shard_rows=None):
+        self.path = path
+        self.name = name
+        self.shard_rows = shard_rows or SHARD_ROWS
+        os.makedirs(path, exist_ok=True)
+        self.tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=path)
+        self.pending = []
+        self.pending_rows = 0
+        self.offsets = [0]
+        self.index = None
+
+    def write(self, df):
+        """
+        :param df: DataFrame holding the target in its first column and the features
+        """
+
+        if self.index is None:
+            features = df.iloc[:, 1:]
+            self.index = {
+                'version': SHARD_VERSION,
+                'name': self.name,
+                'columns': [str(col) for col in features.columns],
+                'dtypes': [str(dtype) for dtype in features.dtypes],
+                'dtype': str(np.result_type(*features.dtypes)) if features.shape[1] else 'float64',
+                'target_dtype': str(df.dtypes.iloc[0]),
+                'shard_rows': self.shard_rows,
+            }
+
+        self.pending.append(df)
+        self.pending_rows += len(df)
+        while self.pending_rows >= self.shard_rows:
+            self._flush(self.shard_rows)
+
+    def _flush(self, rows):
+        df = pd.concat(self.pending) if len(self.pending) > 1 else self.pending[0]
+        shard, rest = df.iloc[:rows], df.iloc[rows:]
+        self.pending = [rest] if len(rest) else []
+        self.pending_rows = len(rest)
+
+        features_file, target_file = _shard_files(self.tmp_dir, len(self.offsets) - 1)
+        np.save(features_file, np.ascontiguousarray(shard.iloc[:, 1:].to_numpy(dtype=self.index['dtype'])))
+        np.save(target_file, shard.iloc[:, 0].to_numpy(dtype=self.index['target_dtype']))
+        self.offsets.append(self.offsets[-1] + len(shard))
+
+    def write_categories(self, categories):
+        write_categories(self.tmp_dir, self.name, categories)
+
+    def close(self, source=None):
+        """
+        Write the last shard and the index, and publish the directory.
+
+        :param source: Stamp of the cache the shards were written from, see read_shard_index
+        :return: The shard directory
+        """
+
+        if self.pending_rows:
+            self._flush(self.pending_rows)
+
+        index = dict(self.index or {'version': SHARD_VERSION, 'name': self.name, 'columns': [], 'dtypes': [],
+                                    'dtype': 'float64', 'target_dtype': 'float64', 'shard_rows': self.shard_rows})
+        index.update(offsets=self.offsets, source=source)
+        with open(os.path.join(self.tmp_dir, 'index.json'), 'w') as f:
+            json.dump(index, f, indent=2)
+
+        directory = shard_dir(self.path, self.name)
+        shutil.rmtree(directory, ignore_errors=True)
+        try:
+            os.rename(self.tmp_dir, directory)
+        except OSError:
+            # Another process published the shards first
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+        return directory
+
+    def abort(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+def write_shards(path, name, shard_rows=None):
+    """
+    Write the shards of a dataset saved in path (by save_path or the local dataset cache), reading the cache in shard_rows batches.
+
+    :param path: Directory of the cache
+    :param name: Name of the dataset
+    :param shard_rows: Number of rows per shard, defaults to SHARD_ROWS
+
+    :return: The shard directory
+    """
+
+    writer = ShardWriter(path, name, shard_rows)
+    try:
+        categories = read_categories(path, name)
+        if categories:
+            writer.write_categories(categories)
+        for df in iter_frames(path, name, writer.shard_rows):
+            writer.write(df)
+    except BaseException:
+        writer.abort()
+        raise
+
+    return writer.close(_source_stamp(path, name))
+
+
+class ShardedDataset:
+    """
+    Random access to the rows of a dataset written as shards.
+
+    The shards are memory-mapped: reading rows only touches the shards they
+    are in, and nothing is held in memory between reads.
+    """
+
+    def __init__(self, path, name):
+        self.index = read_shard_index(path, name)
+        if self.index is None:
+            raise FileNotFoundError(f"No shards of the {name} dataset found in {path}")
+
+        self.path = path
+        self.name = name
+        self.directory = shard_dir(path, name)
+        self.offsets = np.asarray(self.index['offsets'], dtype=np.int64)
+        self.columns = self.index['columns']
+        self.categories = read_categories(self.directory, name)
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    @property
+    def n_shards(self):
+        return len(self.offsets) - 1
+
+    def shard(self, i):
+        """
+        :return: The read-only memory-mapped features and target arrays of shard i
+        """
+
+        features_file, target_file = _shard_files(self.directory, i)
+        return np.load(features_file, mmap_mode='r'), np.load(target_file, mmap_mode='r')
+
+    def frames(self, features, target, rows):
+        """
+        Wrap the features and target of some rows as a (data, target) tuple, indexed by the row numbers.
+        """
+
+        index = pd.Index(rows)
+        data = pd.DataFrame(features, columns=self.columns, index=index, copy=False)
+        target = pd.Series(target, name='target', index=index, copy=False)
+
+        # Columns whose type differs from the shared matrix type get it back
+        dtypes = {col: dtype for col, dtype in zip(self.columns, self.index['dtypes']) if dtype != self.index['dtype']}
+        if dtypes:
+            data = data.astype(dtypes)
+
+        return with_categories(data, self.categories), with_categories(target, self.categories)
+
+    def take(self, rows):
+        """
+        Read rows anywhere in the dataset, in the given order.
+
+        :param rows: Row numbers
+        :return: A (data, target) tuple
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) and (rows.min() < 0 or rows.max() >= len(self)):
+            raise IndexError(f"Rows must be between 0 and {len(self) - 1}")
+
+        shards = np.searchsorted(self.offsets, rows, side='right') - 1
+        features = np.empty((len(rows), len(self.columns)), dtype=self.index['dtype'])
+        target = np.empty(len(rows), dtype=self.index['target_dtype'])
+        for i in np.unique(shards):
+            selected = shards == i
+            shard_features, shard_target = self.shard(i)
+            local = rows[selected] - self.offsets[i]
+            features[selected] = shard_features[local]
+            target[selected] = shard_target[local]
+
+        return self.frames(features, target, rows)
+
+
+class MinibatchSampler:
+    """
+    Shuffled minibatches of a sharded dataset, prepared on a background thread.
+
+    Every epoch visits the shards in a random order. They are read
+    buffer_shards at a time and the rows of the buffer are shuffled together,
+    so a minibatch mixes rows from several parts of the file. A background
+    thread reads the next buffer and slices minibatches while the caller
+    trains on the previous ones; at most prefetch minibatches wait for it.
+    Memory holds one buffer, the prefetched minibatches and the rows left
+    over from the previous buffer, whatever the size of the dataset.
+
+    Each iteration is one epoch. The order depends on the seed and the epoch
+    number, so a run can be reproduced.
+
+    :ivar epoch: Number of the next epoch
+    """
+
+    def __init__(self, dataset, batch_size, seed=0, buffer_shards=None, prefetch=None, drop_last=False):
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, not {batch_size}")
+
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.seed = seed
+        self.buffer_shards = buffer_shards or SAMPLER_BUFFER_SHARDS
+        self.prefetch = prefetch or SAMPLER_PREFETCH
+        self.drop_last = drop_last
+        self.epoch = 0
+
+    def __len__(self):
+        if self.drop_last:
+            return len(self.dataset) // self.batch_size
+
+        return -(-len(self.dataset) // self.batch_size)
+
+    def _batches(self, rng):
+        # Arrays (features, target, rows) of every minibatch of an epoch
+        dataset = self.dataset
+        order = rng.permutation(dataset.n_shards)
+        left = None
+        for start in range(0, len(order), self.buffer_shards):
+            parts = [left] if left is not None else []
+            for i in order[start:start + self.buffer_shards]:
+                features, target = dataset.shard(i)
+                parts.append((features, target, np.arange(dataset.offsets[i], dataset.offsets[i + 1])))
+
+            # The buffer is read once; every minibatch is gathered from it in shuffled order
+            features = np.concatenate([part[0] for part in parts])
+            target = np.concatenate([part[1] for part in parts])
+            rows = np.concatenate([part[2] for part in parts])
+            shuffled = rng.permutation(len(rows))
+
+            full = len(rows) - len(rows) % self.batch_size
+            for begin in range(0, full, self.batch_size):
+                batch = shuffled[begin:begin + self.batch_size]
+                yield features[batch], target[batch], rows[batch]
+
+            rest = shuffled[full:]
+            left = (features[rest], target[rest], rows[rest]) if len(rest) else None
+
+        if left is not None and not self.drop_last:
+            yield left
+
+    def __iter__(self):
+        rng = np.random.default_rng([self.seed, self.epoch])
+        self.epoch += 1
+
+        channel = Channel(self.prefetch)
+        thread = run_stage(self._batches(rng), channel, name='LoadDataset-sampler')
+        try:
+            for item in channel.items():
+                yield self.dataset.frames(*item)
+        finally:
+            # Stop the thread when the loop exits early
+            channel.close()
+            thread.join()
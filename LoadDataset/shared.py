@@ -0,0 +1,300 @@
+import os
+import atexit
+import shutil
+import hashlib
+import tempfile
+import functools
+import threading
+import pandas as pd
+from contextlib import contextmanager
+
+from .cache import read_dataset, write_frame
+from .memo import call_key
+
+
+def _default_shared_dir():
+    # /dev/shm is backed by memory on Linux, elsewhere the page cache of a temporary file is shared instead
+    root = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(root, 'LoadDataset')
+
+
+_shared_dir = os.environ.get('LOADDATASET_SHARED_DIR') or _default_shared_dir()
+_shared_enabled = os.environ.get('LOADDATASET_SHARED', '0').lower() in ('1', 'true', 'yes', 'on')
+
+# Entries this process holds a reference to
+_attached = set()
+_lock = threading.Lock()
+
+
+def set_shared_dir(path):
+    """
+    Set the directory where shared datasets are published.
+
+    The initial value is read from the LOADDATASET_SHARED_DIR environment
+    variable and defaults to /dev/shm/LoadDataset (or the temporary directory
+    where /dev/shm does not exist). Every process sharing datasets must use
+    the same directory.
+
+    :param path: Directory of the shared datasets
+    """
+
+    global _shared_dir
+    _shared_dir = os.path.expanduser(path)
+
+
+def get_shared_dir():
+    """
+    :return: The directory where shared datasets are published
+    """
+
+    return _shared_dir
+
+
+def enable_shared_memory(enabled=True):
+    """
+    Turn sharing of loaded datasets between the processes of the host on or off.
+
+    When on, the first process loading a dataset publishes it to the shared
+    directory and later load_* calls with the same arguments, in any process,
+    map that copy instead of loading their own. The initial value is read from
+    the LOADDATASET_SHARED environment variable and defaults to off.
+
+    :param enabled: True to share datasets
+    """
+
+    global _shared_enabled
+    _shared_enabled = bool(enabled)
+
+
+def entry_path(key):
+    """
+    Directory of the shared copy of a dataset.
+
+    :param key: (name, options) tuple returned by call_key, or a name
+    """
+
+    if isinstance(key, tuple):
+        name, options = key
+        return os.path.join(_shared_dir, f"{name}-{hashlib.sha1(options.encode()).hexdigest()[:16]}")
+
+    return os.path.join(_shared_dir, key)
+
+
+def _name(entry):
+    return os.path.basename(entry).split('-')[0]
+
+
+@contextmanager
+def _entry_lock(entry):
+    # Serializes publishing and cleanup of an entry between processes
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    path = entry + '.lock'
+    while True:
+        f = open(path, 'a')
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            # The holder before us may have removed the file, then it no longer guards anything
+            if os.path.samestat(os.fstat(f.fileno()), os.stat(path)):
+                break
+        except FileNotFoundError:
+            pass
+        f.close()
+
+    try:
+        yield
+    finally:
+        # The lock files do not pile up in the shared directory: a process
+        # waiting for this one finds the file gone and locks a new one
+        os.remove(path)
+        fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+    return True
+
+
+def references(entry):
+    """
+    Processes holding a reference to a shared dataset, dead processes excluded.
+
+    :param entry: Directory of the shared dataset
+
+    :return: The sorted list of process ids
+    """
+
+    refs = os.path.join(entry, 'refs')
+    if not os.path.isdir(refs):
+        return []
+
+    return sorted(pid for pid in (int(ref) for ref in os.listdir(refs) if ref.isdigit()) if _alive(pid))
+
+
+def _register(entry):
+    os.makedirs(os.path.join(entry, 'refs'), exist_ok=True)
+    open(os.path.join(entry, 'refs', str(os.getpid())), 'w').close()
+    with _lock:
+        _attached.add(entry)
+
+
+def _collect(entry):
+    # Remove an entry nobody references any more; mappings already open stay valid
+    if os.path.isdir(entry) and not references(entry):
+        shutil.rmtree(entry, ignore_errors=True)
+        return True
+
+    return False
+
+
+def publish_frame(entry, df, categories=None, scale=None):
+    """
+    Publish a DataFrame (target in the first column) as a shared dataset.
+
+    The frame is written in the npy layout to a temporary directory and
+    renamed into place, so other processes never see a partial copy. The
+    publishing process holds the first reference to it.
+
+    :param entry: Directory of the shared dataset, see entry_path
+    :param df: DataFrame with the target in the first column
+    :param categories: If provided, the {column: categories} mappings of the encoded columns
+    :param scale: If provided, the parameters the features were scaled with (see fit_scale)
+
+    :return: The directory of the shared dataset
+    """
+
+    os.makedirs(_shared_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=_shared_dir)
+    try:
+        write_frame(df, tmp_dir, _name(entry), 'npy', categories, scale)
+        os.makedirs(os.path.join(tmp_dir, 'refs'))
+        open(os.path.join(tmp_dir, 'refs', str(os.getpid())), 'w').close()
+        os.rename(tmp_dir, entry)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    with _lock:
+        _attached.add(entry)
+
+    return entry
+
+
+def attach(entry):
+    """
+    Map a shared dataset and take a reference to it.
+
+    :param entry: Directory of the shared dataset, see entry_path
+
+    :return: A tuple containing the data and target variables, read-only views of the shared copy, or None if it is not published
+    """
+
+    with _entry_lock(entry):
+        if not os.path.isdir(entry):
+            return None
+        _register(entry)
+
+    return read_dataset(entry, _name(entry), 'npy')
+
+
+def release(entry=None):
+    """
+    Drop the reference of this process to a shared dataset, removing it once no process references it.
+
+    Frames already returned stay usable until they are garbage collected.
+    References are released automatically when the process exits, and those
+    of processes that died are ignored.
+
+    :param entry: Directory of the shared dataset, or None for every dataset attached by this process
+
+    :return: The list of entries that were removed
+    """
+
+    with _lock:
+        entries = [entry] if entry is not None else list(_attached)
+        _attached.difference_update(entries)
+
+    removed = []
+    for entry in entries:
+        with _entry_lock(entry):
+            try:
+                os.remove(os.path.join(entry, 'refs', str(os.getpid())))
+            except FileNotFoundError:
+                pass
+            if _collect(entry):
+                removed.append(entry)
+
+    return removed
+
+
+atexit.register(release)
+
+
+def collect_shared():
+    """
+    Remove the shared datasets no live process references, such as those left by crashed workers.
+
+    :return: The list of entries that were removed
+    """
+
+    if not os.path.isdir(_shared_dir):
+        return []
+
+    removed = []
+    for entry in sorted(os.listdir(_shared_dir)):
+        path = os.path.join(_shared_dir, entry)
+        if entry.startswith('.') or not os.path.isdir(path):
+            continue
+        with _entry_lock(path):
+            if _collect(path):
+                removed.append(path)
+
+    return removed
+
+
+def shared(name):
+    """
+    Decorator making a loader publish its result to, or attach it from, the shared directory when sharing is on.
+
+    :param name: Name of the dataset loaded by the function
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _shared_enabled:
+                return function(*args, **kwargs)
+
+            key = call_key(name, function, args, kwargs)
+            if key is None:
+                return function(*args, **kwargs)
+
+            entry = entry_path(key)
+            with _entry_lock(entry + '.load'):
+                # Only one process loads a dataset, the others wait and attach it
+                result = attach(entry)
+                if result is not None:
+                    return result
+
+                data, target = function(*args, **kwargs)
+                publish_frame(entry, pd.concat([target, data], axis=1), data.attrs.get('categories'), data.attrs.get('scale'))
+
+                # The publishing process maps the shared copy too, so its own copy can be freed
+                return attach(entry)
+
+        return wrapper
+
+    return decorator
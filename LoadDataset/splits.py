@@ -0,0 +1,273 @@
+import os
+import json
+import hashlib
+import inspect
+import functools
+import numpy as np
+import pandas as pd
+
+from .stats import MAX_TARGET_CLASSES
+from .store import cache_enabled, cached_entry
+
+
+# Number of rows of the official test set, the last rows of the file, of the datasets that have one
+OFFICIAL_TEST_ROWS = {'higgs': 500000, 'susy': 500000}
+
+# Names of the parts of a split given as a tuple of fractions
+SPLIT_PARTS = {2: ('train', 'test'), 3: ('train', 'validation', 'test')}
+
+
+def check_split(split, name=None):
+    """
+    Validate the split argument of a loader.
+
+    :param split: None, 'official', a tuple of 2 (train, test) or 3 (train, validation, test) fractions, or a {part: fraction} dict
+    :param name: Name of the dataset, for the official split
+
+    :return: None, 'official' or a {part: fraction} dict
+    """
+
+    if split is None:
+        return None
+
+    if split == 'official':
+        if name not in OFFICIAL_TEST_ROWS:
+            raise ValueError(f"{name} has no official split. Datasets with one: {sorted(OFFICIAL_TEST_ROWS)}")
+        return split
+
+    if isinstance(split, (tuple, list)) and len(split) in SPLIT_PARTS:
+        split = dict(zip(SPLIT_PARTS[len(split)], split))
+
+    if not isinstance(split, dict) or not split or any(not 0 < fraction <= 1 for fraction in split.values()):
+        raise ValueError(f"Unknown split {split!r}. Use 'official', (train, test) or (train, validation, test) fractions, or a {{part: fraction}} dict")
+    if abs(sum(split.values()) - 1) > 1e-9:
+        raise ValueError(f"The fractions of split {split!r} must add up to 1")
+
+    return {str(part): float(fraction) for part, fraction in split.items()}
+
+
+def _strata(target):
+    # Class codes of the rows, or None if the target is not a class label
+    codes, classes = pd.factorize(np.asarray(target), sort=True)
+    if len(classes) > MAX_TARGET_CLASSES:
+        return None
+
+    # Missing labels form a class of their own
+    codes[codes < 0] = len(classes)
+    return codes
+
+
+def split_indices(target, split, seed=0, name=None):
+    """
+    Row indices of the parts of a dataset.
+
+    A split given as fractions is stratified: the rows of every class are
+    shuffled with the seed and dealt to the parts in proportion, so every
+    part has the class balance of the dataset and the same seed always gives
+    the same parts. A target that is not a class label is split at random.
+    The official split of HIGGS and SUSY takes the last rows as the test set.
+
+    :param target: Target of the dataset
+    :param split: 'official' or fractions, see check_split
+    :param seed: Seed of the shuffle
+    :param name: Name of the dataset, for the official split
+
+    :return: A {part: indices} dict of sorted int32 arrays (int64 past 2**31 rows)
+    """
+
+    split = check_split(split, name)
+    rows = len(target)
+    dtype = np.int32 if rows < 2**31 else np.int64
+
+    if split == 'official':
+        test_rows = OFFICIAL_TEST_ROWS[name]
+        if rows <= test_rows:
+            raise ValueError(f"The official split of {name} needs the whole dataset, only {rows} rows were loaded")
+        return {'train': np.arange(rows - test_rows, dtype=dtype), 'test': np.arange(rows - test_rows, rows, dtype=dtype)}
+
+    # Shuffle every row, then group the rows of each class without changing their shuffled order
+    order = np.random.default_rng(seed).permutation(rows).astype(dtype)
+    codes = _strata(target)
+    if codes is None:
+        groups = [order]
+    else:
+        order = order[np.argsort(codes[order], kind='stable')]
+        groups = np.split(order, np.cumsum(np.bincount(codes))[:-1])
+
+    fractions = np.cumsum(list(split.values()))
+    parts = {part: [] for part in split}
+    for group in groups:
+        bounds = np.round(fractions * len(group)).astype(np.int64)
+        for part, rows_of_part in zip(split, np.split(group, bounds[:-1])):
+            parts[part].append(rows_of_part)
+
+    return {part: np.sort(np.concatenate(chunks)) for part, chunks in parts.items()}
+
+
+def split_file(path, name, split, seed, rows):
+    """
+    Path of the file holding the indices of a split of a dataset saved in path.
+    """
+
+    key = json.dumps({'split': split, 'seed': seed if split != 'official' else None, 'rows': rows}, sort_keys=True)
+    return os.path.join(path, f"{name}.split-{hashlib.sha1(key.encode()).hexdigest()[:16]}.npz")
+
+
+def _encode(part, indices, rows):
+    # A run of rows is kept as its bounds, other indices as whichever of a bitmap or an int32 array is smaller
+    if not len(indices) or indices[-1] - indices[0] + 1 == len(indices):
+        bounds = [int(indices[0]), int(indices[-1]) + 1] if len(indices) else [0, 0]
+        return {f'{part}.range': np.array(bounds, dtype=np.int64)}
+
+    if (rows + 7) // 8 < indices.nbytes:
+        bitmap = np.zeros(rows, dtype=bool)
+        bitmap[indices] = True
+        return {f'{part}.bitmap': np.packbits(bitmap)}
+
+    return {f'{part}.index': indices}
+
+
+def write_split(file, parts, rows):
+    """
+    Save the indices of a split, see split_indices.
+
+    :param file: Path of the file, see split_file
+    :param parts: A {part: indices} dict
+    :param rows: Number of rows of the dataset
+    """
+
+    arrays = {'rows': np.array(rows, dtype=np.int64)}
+    for part, indices in parts.items():
+        arrays.update(_encode(part, indices, rows))
+
+    tmp_file = f'{file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_file, file)
+
+
+def read_split(file, rows):
+    """
+    Load the indices of a split saved with write_split.
+
+    :return: A {part: indices} dict, or None if the file is missing, unreadable or belongs to a dataset of another size
+    """
+
+    dtype = np.int32 if rows < 2**31 else np.int64
+    try:
+        with np.load(file) as arrays:
+            if int(arrays['rows']) != rows:
+                return None
+
+            parts = {}
+            for key in arrays.files:
+                if key == 'rows':
+                    continue
+                part, kind = key.rsplit('.', 1)
+                if kind == 'range':
+                    parts[part] = np.arange(*arrays[key], dtype=dtype)
+                elif kind == 'bitmap':
+                    parts[part] = np.flatnonzero(np.unpackbits(arrays[key], count=rows)).astype(dtype)
+                else:
+                    parts[part] = arrays[key].astype(dtype, copy=False)
+    except (OSError, ValueError, KeyError):
+        return None
+
+    return parts
+
+
+def take_split(data, target, indices):
+    """
+    Rows of a part of a split.
+
+    A run of rows, like the official test set, is sliced without a copy.
+    Pandas has no view of scattered rows, so the other parts, like the
+    stratified ones, are gathered into a copy: the parts of a split hold a
+    second copy of the dataset beside the loaded frame. Where that does not
+    fit in memory, take the indices from load_split and gather the rows as
+    they are used.
+
+    :return: A (data, target) tuple
+    """
+
+    if len(indices) and indices[-1] - indices[0] + 1 == len(indices):
+        rows = slice(int(indices[0]), int(indices[-1]) + 1)
+        return data.iloc[rows], target.iloc[rows]
+
+    return data.take(indices), target.take(indices)
+
+
+def _split_dir(name, options):
+    # Where the indices of a split are kept: next to the dataset, unless only part of it was loaded
+    if options.get('nrows') is not None:
+        return None
+    if options.get('save_path'):
+        return options['save_path']
+    if options.get('load_path') and os.path.exists(options['load_path']):
+        return options['load_path']
+    if cache_enabled(options.get('cache')):
+        return cached_entry(name)
+
+    return None
+
+
+def load_split(name, target, split, seed=0, path=None):
+    """
+    Indices of a split of a dataset, read from path if they were saved there, otherwise computed and saved there.
+
+    :param name: Name of the dataset
+    :param target: Target of the dataset
+    :param split: 'official' or fractions, see check_split
+    :param seed: Seed of the shuffle
+    :param path: Directory of the dataset, or None to compute the indices without saving them
+
+    :return: A {part: indices} dict, see split_indices
+    """
+
+    split = check_split(split, name)
+    file = split_file(path, name, split, seed, len(target)) if path else None
+
+    parts = read_split(file, len(target)) if file else None
+    if parts is None:
+        parts = split_indices(target, split, seed, name)
+        if file:
+            write_split(file, parts, len(target))
+
+    return parts
+
+
+def splittable(name):
+    """
+    Decorator returning the parts of a split when a loader is called with split=.
+
+    The loader itself runs without the split, so its in-memory, shared and
+    local caches hold the whole dataset once, whatever the split.
+
+    :param name: Name of the dataset loaded by the function
+    """
+
+    def decorator(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            arguments = inspect.signature(function).bind(*args, **kwargs)
+            arguments.apply_defaults()
+            options = arguments.arguments
+
+            split = check_split(options.get('split'), name)
+            if split is None:
+                return function(*args, **kwargs)
+            if options.get('chunksize'):
+                raise ValueError("split cannot be combined with chunksize")
+            if split == 'official' and options.get('nrows') is not None:
+                raise ValueError(f"The official split of {name} needs the whole dataset, it cannot be combined with nrows")
+
+            options['split'] = None
+            data, target = function(*arguments.args, **arguments.kwargs)
+
+            parts = load_split(name, target, split, options.get('seed', 0), _split_dir(name, options))
+            return {part: take_split(data, target, indices) for part, indices in parts.items()}
+
+        return wrapper
+
+    return decorator
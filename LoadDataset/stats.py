@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+
+# A target with more distinct values than this is not a class label, and its values are not counted
+MAX_TARGET_CLASSES = 1000
+
+
+def _moments(values):
+    # Count, min, max, mean and sum of squared deviations of a float64 array, NaN excluded
+    if np.isnan(values).any():
+        values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+
+    mean = values.mean()
+    return [len(values), values.min(), values.max(), mean, np.square(values - mean).sum()]
+
+
+def _merge(a, b):
+    # Combine the moments of two sets of rows (Chan, Golub and LeVeque), without a second pass over either
+    if a is None or b is None:
+        return a if b is None else b
+
+    count = a[0] + b[0]
+    delta = b[3] - a[3]
+    mean = a[3] + delta * b[0] / count
+    m2 = a[4] + b[4] + delta * delta * a[0] * b[0] / count
+
+    return [count, min(a[1], b[1]), max(a[2], b[2]), mean, m2]
+
+
+class StatsAccumulator:
+    """
+    Statistics of a dataset computed batch by batch, while it is written to a cache.
+
+    For every numeric feature it keeps the count of values, min, max, mean and
+    sum of squared deviations, and for the target the number of rows of every
+    class. Batches are merged exactly, so the result does not depend on how
+    the rows were split.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.moments = {}
+        self.target = None
+        self.classes = {}
+
+    def update(self, df, target_column=0):
+        """
+        Add the rows of a DataFrame.
+
+        :param df: DataFrame holding the target and the features
+        :param target_column: Position of the target column, or None if df only holds features
+        """
+
+        self.rows += len(df)
+        if target_column is not None:
+            target_column = target_column % df.shape[1]
+            self.target = str(df.columns[target_column])
+
+        for i, col in enumerate(df.columns):
+            if i == target_column:
+                continue
+            series = df.iloc[:, i]
+            if not pd.api.types.is_numeric_dtype(series.dtype):
+                self.moments.setdefault(str(col), None)
+                continue
+            moments = _moments(series.to_numpy(dtype=np.float64, na_value=np.nan))
+            self.moments[str(col)] = _merge(self.moments.get(str(col)), moments)
+
+        if target_column is not None and self.classes is not None:
+            for value, count in df.iloc[:, target_column].value_counts().items():
+                value = value.item() if hasattr(value, 'item') else value
+                self.classes[value] = self.classes.get(value, 0) + int(count)
+            if len(self.classes) > MAX_TARGET_CLASSES:
+                self.classes = None
+
+    def result(self):
+        """
+        :return: The statistics as a JSON serializable dict, see frame_stats
+        """
+
+        columns = {}
+        for col, moments in self.moments.items():
+            if moments is None:
+                columns[col] = None
+                continue
+            count, low, high, mean, m2 = moments
+            columns[col] = {
+                'count': int(count),
+                'min': float(low),
+                'max': float(high),
+                'mean': float(mean),
+                # Sample standard deviation, as DataFrame.std
+                'std': float(np.sqrt(m2 / (count - 1))) if count > 1 else None,
+            }
+
+        target = {'column': self.target, 'classes': None, 'counts': None}
+        if self.target is not None and self.classes is not None:
+            classes = sorted(self.classes, key=lambda value: (str(type(value)), value))
+            target.update(classes=classes, counts=[self.classes[value] for value in classes])
+
+        return {'rows': self.rows, 'columns': columns, 'target': target}
+
+
+def frame_stats(df, target_column=0):
+    """
+    Statistics of a DataFrame holding the target and the features.
+
+    :param df: DataFrame holding the target and the features
+    :param target_column: Position of the target column, or None if df only holds features
+
+    :return: A dict with the number of rows, the count, min, max, mean and standard deviation of every numeric feature
+        (None for the other columns), and the classes of the target with their number of rows (None if the target has
+        more than MAX_TARGET_CLASSES distinct values)
+    """
+
+    accumulator = StatsAccumulator()
+    accumulator.update(df, target_column)
+    return accumulator.result()
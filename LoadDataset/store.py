@@ -0,0 +1,415 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+from .cache import CacheWriter, cache_file, cache_size, categories_file, find_cache_file, get_cache_format, read_schema, schema_file
+from .instrument import span
+
+
+# Version of the manifest layout, entries written by another version are rebuilt
+MANIFEST_VERSION = 1
+
+_cache_dir = os.environ.get('LOADDATASET_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'LoadDataset')
+_cache_enabled = os.environ.get('LOADDATASET_CACHE', '1').lower() not in ('0', 'false', 'no', 'off')
+_store_format = os.environ.get('LOADDATASET_STORE_FORMAT', 'npy')
+
+
+def set_cache_dir(path):
+    """
+    Set the root directory of the local dataset cache.
+
+    The initial value is read from the LOADDATASET_CACHE_DIR environment variable and defaults to ~/.cache/LoadDataset.
+
+    :param path: Directory holding one subdirectory per dataset
+    """
+
+    global _cache_dir
+    _cache_dir = path
+
+
+def get_cache_dir():
+    """
+    Root directory of the local dataset cache.
+    """
+
+    return _cache_dir
+
+
+def enable_cache(enabled=True):
+    """
+    Turn the local dataset cache on or off for loaders called without cache=.
+
+    The initial value is read from the LOADDATASET_CACHE environment variable ('0' turns it off) and defaults to on.
+
+    :param enabled: If True, loaders read and write the local cache by default
+    """
+
+    global _cache_enabled
+    _cache_enabled = enabled
+
+
+def set_store_format(cache_format):
+    """
+    Set the format of the local dataset cache when a loader is called without cache_format.
+
+    The initial value is read from the LOADDATASET_STORE_FORMAT environment variable and defaults to 'npy', which is
+    opened memory-mapped without parsing. It is independent of the save_path format set with set_cache_format.
+
+    :param cache_format: One of 'csv', 'parquet', 'feather' or 'npy'
+    """
+
+    global _store_format
+    _store_format = get_cache_format(cache_format)
+
+
+def get_store_format(cache_format=None):
+    """
+    Resolve the format of the local dataset cache, falling back to its own setting rather than the save_path one.
+
+    :param cache_format: One of 'csv', 'parquet', 'feather' or 'npy', or None for the setting of set_store_format
+
+    :return: The name of the cache format
+    """
+
+    return get_cache_format(cache_format or _store_format)
+
+
+def cache_enabled(cache=None):
+    """
+    Whether a loader called with cache= uses the local cache.
+    """
+
+    return _cache_enabled if cache is None else cache
+
+
+def _dataset_dir(name):
+    return os.path.join(get_cache_dir(), name)
+
+
+def _manifest_path(name):
+    return os.path.join(_dataset_dir(name), 'manifest.json')
+
+
+def _files(path):
+    # The files making up a cache file, which is a directory for the npy format
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, entry) for entry in os.listdir(path))
+
+    return [path]
+
+
+def _stat(path):
+    stats = [os.stat(file) for file in _files(path)]
+    return sum(s.st_size for s in stats), max(s.st_mtime_ns for s in stats)
+
+
+def checksum(path):
+    """
+    SHA-256 of a cache file, or of the files of a cache directory in name order.
+    """
+
+    digest = hashlib.sha256()
+    for file in _files(path):
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(16 * 1024 * 1024), b''):
+                digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _policy_key(dtype_policy):
+    # Comparable form of a dtype policy, mapping keys may mix labels and strings
+    if isinstance(dtype_policy, dict):
+        return {str(key): str(value) for key, value in dtype_policy.items()}
+
+    return dtype_policy
+
+
+def read_manifest(name):
+    """
+    Manifest of the cached copy of a dataset, or None if there is none.
+
+    It records the source, checksum, byte size, modification time, row count,
+    schema, statistics, dtype policy and format of the cached file.
+    """
+
+    try:
+        with open(_manifest_path(name)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _entry_file(name, manifest):
+    entry = os.path.join(_dataset_dir(name), manifest['checksum'][:16])
+    return entry, cache_file(entry, name, manifest['cache_format'])
+
+
+def cached_entry(name):
+    """
+    Directory of the current entry of a dataset in the local dataset cache, or None if there is none.
+    """
+
+    manifest = read_manifest(name)
+    if not manifest:
+        return None
+
+    entry, _ = _entry_file(name, manifest)
+    return entry if os.path.isdir(entry) else None
+
+
+def cached_path(name, source, cache=None, cache_format=None, dtype_policy=None):
+    """
+    Directory of a valid cached copy of a dataset, to be read like a load_path.
+
+    The entry is validated cheaply: the manifest must belong to the same
+    source and manifest version, and the file must still have the recorded
+    size and modification time. Use verify_cache for a full checksum.
+
+    :param name: Name of the dataset
+    :param source: URL (or other identifier) the dataset is built from
+    :param cache: If False, the cache is skipped; None uses the global setting
+    :param cache_format: If provided, only an entry in this format is accepted
+    :param dtype_policy: dtype policy of the request; an entry built with a different policy is not accepted
+
+    :return: The directory of the entry, or None if there is no valid entry
+    """
+
+    if not cache_enabled(cache):
+        return None
+
+    manifest = read_manifest(name)
+    if (manifest is None or manifest.get('version') != MANIFEST_VERSION or manifest.get('source') != source
+            or manifest.get('dtype_policy') not in (None, _policy_key(dtype_policy))):
+        return None
+
+    if cache_format and manifest['cache_format'] != get_cache_format(cache_format):
+        return None
+
+    entry, file = _entry_file(name, manifest)
+    try:
+        size, mtime = _stat(file)
+    except OSError:
+        return None
+
+    if size != manifest['size'] or mtime != manifest['mtime']:
+        return None
+
+    return entry
+
+
+def _publish(name, source, tmp_dir, cache_format, rows, schema, stats, dtype_policy):
+    # Rename a complete entry after its checksum and point the manifest at it
+    file = cache_file(tmp_dir, name, cache_format)
+    digest = checksum(file)
+    entry = os.path.join(_dataset_dir(name), digest[:16])
+
+    try:
+        os.rename(tmp_dir, entry)
+    except OSError:
+        # Another process published the same content first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    size, mtime = _stat(cache_file(entry, name, cache_format))
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'name': name,
+        'source': source,
+        'checksum': digest,
+        'size': size,
+        'mtime': mtime,
+        'rows': rows,
+        'schema': schema,
+        'stats': stats,
+        'dtype_policy': _policy_key(dtype_policy),
+        'cache_format': cache_format,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+    previous = read_manifest(name)
+
+    tmp_manifest = _manifest_path(name) + f'.{os.getpid()}.tmp'
+    with open(tmp_manifest, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_manifest, _manifest_path(name))
+
+    if previous and previous.get('checksum') and previous['checksum'][:16] != digest[:16]:
+        shutil.rmtree(os.path.join(_dataset_dir(name), previous['checksum'][:16]), ignore_errors=True)
+
+    return entry
+
+
+class CacheEntryWriter:
+    """
+    Build a new cached copy of a dataset and publish it atomically.
+
+    DataFrames are written to a temporary directory next to the cache. On
+    close the file is hashed, the directory is renamed after the checksum and
+    the manifest is replaced in a single rename, so readers only ever see a
+    complete entry. The previous entry is removed afterwards.
+    """
+
+    def __init__(self, name, source, cache_format=None, dtype_policy=None, stats=None):
+        self.name = name
+        self.source = source
+        self.cache_format = get_store_format(cache_format)
+        self.dtype_policy = dtype_policy
+        self.rows = 0
+        self.schema = None
+
+        os.makedirs(_dataset_dir(name), exist_ok=True)
+        self.tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=_dataset_dir(name))
+        self.writer = CacheWriter(self.tmp_dir, name, self.cache_format, stats)
+
+    def write(self, df):
+        if self.schema is None:
+            self.schema = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
+
+        self.writer.write(df)
+        self.rows += len(df)
+
+    def write_categories(self, categories):
+        self.writer.write_categories(categories)
+
+    def abort(self):
+        self.writer.abort()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def close(self):
+        self.writer.close()
+
+        return _publish(self.name, self.source, self.tmp_dir, self.cache_format, self.rows, self.schema,
+                        self.writer.schema['stats'] if self.writer.schema else None, self.dtype_policy)
+
+
+def _link(source, target):
+    # Hard link a file or the files of a directory, copying them on file systems without links
+    if os.path.isdir(source):
+        os.makedirs(target)
+        for entry in os.listdir(source):
+            _link(os.path.join(source, entry), os.path.join(target, entry))
+        return
+
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _store_saved(name, source, saved, dtype_policy):
+    # Publish a file written by write_frame as the entry, without serializing the dataset again
+    schema = read_schema(saved)
+    path = os.path.dirname(saved)
+    tmp_dir = tempfile.mkdtemp(prefix='.tmp-', dir=_dataset_dir(name))
+    try:
+        _link(saved, os.path.join(tmp_dir, os.path.basename(saved)))
+        # The small sidecars are copied, write_frame rewrites them in place
+        for file in [schema_file(saved), categories_file(path, name)]:
+            if os.path.exists(file):
+                shutil.copy2(file, os.path.join(tmp_dir, os.path.basename(file)))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return _publish(name, source, tmp_dir, schema['format'], schema['rows'], dict(zip(schema['columns'], schema['dtypes'])),
+                    schema.get('stats'), dtype_policy)
+
+
+def store_frame(name, source, df, cache_format=None, dtype_policy=None, categories=None, saved=None):
+    """
+    Publish a DataFrame (target in the first column) as the cached copy of a dataset.
+
+    :param saved: If provided, the file df was just written to by write_frame. When it is in the format of the local
+        cache, it is linked into the entry instead of writing df again; otherwise its statistics are reused
+
+    :return: The directory of the new entry
+    """
+
+    schema = read_schema(saved) if saved else None
+    with span('cache_write', cache='local') as the_span:
+        if schema is not None and schema['format'] == get_store_format(cache_format):
+            os.makedirs(_dataset_dir(name), exist_ok=True)
+            entry = _store_saved(name, source, saved, dtype_policy)
+            the_span.set(bytes=cache_size(cache_file(entry, name, schema['format'])), rows=schema['rows'],
+                         cache_format=schema['format'], linked=True)
+            return entry
+
+        writer = CacheEntryWriter(name, source, cache_format, dtype_policy, schema.get('stats') if schema else None)
+        try:
+            writer.write(df)
+            if categories:
+                writer.write_categories(categories)
+        except BaseException:
+            writer.abort()
+            raise
+
+        entry = writer.close()
+        the_span.set(bytes=cache_size(entry), rows=len(df), cache_format=writer.cache_format)
+
+    return entry
+
+
+def verify_cache(name):
+    """
+    Check the cached copy of a dataset against the checksum of its manifest.
+
+    A corrupt entry is removed, so the next load rebuilds it.
+
+    :param name: Name of the dataset
+
+    :return: True if the entry is intact, False if it was missing or corrupt
+    """
+
+    manifest = read_manifest(name)
+    if manifest is None:
+        return False
+
+    entry, file = _entry_file(name, manifest)
+    try:
+        intact = checksum(file) == manifest['checksum']
+    except OSError:
+        intact = False
+
+    if not intact:
+        os.remove(_manifest_path(name))
+        shutil.rmtree(entry, ignore_errors=True)
+
+    return intact
+
+
+def clear_cache(name=None):
+    """
+    Remove the cached copy of a dataset, or of every dataset if name is None.
+    """
+
+    shutil.rmtree(_dataset_dir(name) if name else get_cache_dir(), ignore_errors=True)
+
+
+def describe(name, load_path=None, cache_format=None):
+    """
+    Statistics of a dataset, computed while its cache was written.
+
+    Only a small JSON file is read, never the data, so scaling features or
+    weighting classes needs no extra pass over the dataset.
+
+    :param name: Name of the dataset
+    :param load_path: Directory of a save_path cache, or None for the local dataset cache
+    :param cache_format: Format of the save_path cache to look at first, if there are several
+
+    :return: A dict with the number of rows, the count, min, max, mean and standard deviation of every feature and the
+        class counts of the target (see frame_stats), or None if there is no cache or it was written without statistics
+    """
+
+    if load_path:
+        try:
+            file, _ = find_cache_file(load_path, name, cache_format)
+        except FileNotFoundError:
+            return None
+        schema = read_schema(file)
+        return schema.get('stats') if schema else None
+
+    manifest = read_manifest(name)
+    return manifest.get('stats') if manifest else None
@@ -0,0 +1,189 @@
+import io
+import gzip
+import zlib
+import struct
+import requests
+from contextlib import contextmanager
+
+from .download import default_session
+
+
+# Number of bytes asked from the connection at a time
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# Signature and layout of the local file header in front of every zip member
+_LOCAL_HEADER = struct.Struct('<IHHHHHIIIHH')
+_LOCAL_HEADER_SIGNATURE = 0x04034b50
+
+
+class _LimitedStream(io.RawIOBase):
+    """
+    Expose the next size bytes of a stream, the compressed data of a zip member.
+    """
+
+    def __init__(self, raw, size):
+        self.raw = raw
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self.remaining <= 0:
+            return 0
+
+        data = self.raw.read(min(len(b), self.remaining))
+        b[:len(data)] = data
+        self.remaining -= len(data)
+        return len(data)
+
+
+class _InflateStream(io.RawIOBase):
+    """
+    Inflate a raw deflate stream, the data of a deflated zip member, as it is read.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while True:
+            if self.inflater.eof:
+                return 0
+            elif self.inflater.unconsumed_tail:
+                data = self.inflater.decompress(self.inflater.unconsumed_tail, len(b))
+            else:
+                chunk = self.raw.read(STREAM_BLOCK_SIZE)
+                if not chunk:
+                    return 0
+                data = self.inflater.decompress(chunk, len(b))
+
+            if data:
+                b[:len(data)] = data
+                return len(data)
+
+
+class _ResponseStream(io.RawIOBase):
+    """
+    Read the decoded body of a streamed response as a file.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self.raw.read(len(b), decode_content=True)
+        b[:len(data)] = data
+        return len(data)
+
+
+def _read_exact(raw, size):
+    data = b''
+    while len(data) < size:
+        chunk = raw.read(size - len(data))
+        if not chunk:
+            raise EOFError("The archive ended in the middle of a zip header")
+        data += chunk
+
+    return data
+
+
+def _skip(raw, size):
+    while size > 0:
+        chunk = raw.read(min(size, STREAM_BLOCK_SIZE))
+        if not chunk:
+            raise EOFError("The archive ended in the middle of a zip member")
+        size -= len(chunk)
+
+
+def _zip64_compressed_size(extra, uncompressed_size):
+    # Members over 4 GiB keep their sizes in the Zip64 record of the extra field
+    position = 0
+    while position + 4 <= len(extra):
+        header_id, size = struct.unpack_from('<HH', extra, position)
+        if header_id == 0x0001:
+            offset = position + 4 + (8 if uncompressed_size == 0xFFFFFFFF else 0)
+            if offset + 8 <= position + 4 + size:
+                return struct.unpack_from('<Q', extra, offset)[0]
+            return None
+        position += 4 + size
+
+    return None
+
+
+def zip_member_stream(raw, member):
+    """
+    Find a member of a zip archive read front to back and return its data as a stream.
+
+    Only the local file headers are used, so nothing past the member has to be
+    read, unlike zipfile which starts from the central directory at the end of
+    the archive.
+
+    :param raw: Binary stream positioned at the start of the archive
+    :param member: Name of the member
+
+    :return: A binary stream with the uncompressed data of the member
+    """
+
+    while True:
+        header = _read_exact(raw, _LOCAL_HEADER.size)
+        signature, _, flags, method, _, _, _, compressed_size, uncompressed_size, name_length, extra_length = _LOCAL_HEADER.unpack(header)
+        if signature != _LOCAL_HEADER_SIGNATURE:
+            raise ValueError(f"{member} was not found in the zip archive")
+
+        name = _read_exact(raw, name_length).decode('utf-8', errors='replace')
+        extra = _read_exact(raw, extra_length)
+        if compressed_size == 0xFFFFFFFF:
+            compressed_size = _zip64_compressed_size(extra, uncompressed_size)
+
+        # Sizes are only known up front when the member is not followed by a data descriptor
+        sized = not flags & 0x08 and compressed_size is not None
+
+        if name == member:
+            data = _LimitedStream(raw, compressed_size) if sized else raw
+            if method == 0:
+                return data
+            if method == 8:
+                return _InflateStream(data)
+            raise ValueError(f"{member} uses zip compression method {method}, which cannot be streamed")
+
+        if not sized:
+            raise ValueError(f"Cannot skip over {name} to reach {member} without reading the whole zip archive")
+        _skip(raw, compressed_size)
+
+
+@contextmanager
+def open_remote_stream(url, member=None, session=None, timeout=60):
+    """
+    Open the CSV inside a remote archive as a stream, without downloading the archive first.
+
+    The body is decompressed while it arrives and the connection is closed on
+    exit, so reading the first rows only transfers the bytes they come from.
+
+    :param url: URL of the archive
+    :param member: Name of the gzip member inside a zip archive, or None if the archive is a plain gzip file
+    :param session: requests.Session used for the request, or None for the one set with using_session or a new connection
+    :param timeout: Seconds to wait for the server
+
+    :return: A binary file object with the decompressed CSV
+    """
+
+    http = session or default_session() or requests
+    with http.get(url, stream=True, timeout=timeout) as response:
+        if response.status_code != 200:
+            raise ValueError(f"Failed to download dataset from {url}. Status code: {response.status_code}")
+
+        body = io.BufferedReader(_ResponseStream(response.raw), STREAM_BLOCK_SIZE)
+        if member is not None:
+            body = zip_member_stream(body, member)
+
+        with gzip.GzipFile(fileobj=body) as the_file:
+            yield the_file
+
@@ -0,0 +1,106 @@
+import os
+import json
+import pickle
+from types import SimpleNamespace
+
+from .store import cache_enabled, get_cache_dir
+from .instrument import span
+
+
+# Function called to fetch a dataset from the UCI repository, None means ucimlrepo.fetch_ucirepo
+_fetch_function = None
+
+
+def set_fetch_function(fetch):
+    """
+    Set the function used to fetch the datasets hosted by ucimlrepo.
+
+    It is called as fetch(id=...) and must return an object with the
+    data.features and data.targets DataFrames of the dataset, as
+    ucimlrepo.fetch_ucirepo does. Useful to load from a mirror or offline.
+
+    :param fetch: The fetch function, or None to use ucimlrepo.fetch_ucirepo
+    """
+
+    global _fetch_function
+    _fetch_function = fetch
+
+
+def _default_fetch(id):
+    try:
+        from ucimlrepo import fetch_ucirepo
+    except ImportError as e:
+        raise ImportError("This dataset is fetched with ucimlrepo. Install it with 'pip install ucimlrepo'") from e
+
+    return fetch_ucirepo(id=id)
+
+
+def payload_path(id):
+    """
+    Path of the raw payload of a ucimlrepo dataset in the local cache.
+    """
+
+    return os.path.join(get_cache_dir(), 'ucimlrepo', f'{id}.pkl')
+
+
+def _read_payload(file):
+    try:
+        with open(file, 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    return payload
+
+
+def _write_payload(file, payload):
+    # Written next to the destination and renamed, so a reader never sees half a file
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    tmp_file = f'{file}.{os.getpid()}.tmp'
+    with open(tmp_file, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_file, file)
+
+
+def _namespace(payload):
+    # Same attributes as the object returned by ucimlrepo.fetch_ucirepo
+    return SimpleNamespace(data=SimpleNamespace(features=payload['features'], targets=payload['targets']),
+                           variables=payload['variables'], metadata=payload['metadata'])
+
+
+def fetch_uci(id, cache=None):
+    """
+    Fetch a dataset of the UCI repository, keeping the raw payload in the local cache.
+
+    The features, targets, variables and metadata returned by ucimlrepo are
+    pickled under <cache dir>/ucimlrepo/<id>.pkl on the first call, and later
+    calls are served from that file without any network round trip.
+
+    :param id: ucimlrepo id of the dataset
+    :param cache: If True, read and write the local cache; None uses the global setting, False skips it
+
+    :return: A namespace with data.features, data.targets, variables and metadata
+    """
+
+    file = payload_path(id)
+    if cache_enabled(cache):
+        payload = _read_payload(file) if os.path.exists(file) else None
+        if payload is not None and payload.get('id') == id:
+            return _namespace(payload)
+
+    with span('download', source='ucimlrepo', id=id) as the_span:
+        dataset = (_fetch_function or _default_fetch)(id=id)
+        the_span.set(rows=len(dataset.data.features))
+
+    payload = {
+        'id': id,
+        'features': dataset.data.features,
+        'targets': dataset.data.targets,
+        'variables': getattr(dataset, 'variables', None),
+        # Plain dicts, so the cached payload does not depend on ucimlrepo's classes
+        'metadata': json.loads(json.dumps(getattr(dataset, 'metadata', None) or {}, default=str)),
+    }
+    if cache_enabled(cache):
+        _write_payload(file, payload)
+
+    return _namespace(payload)
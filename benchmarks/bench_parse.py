@@ -0,0 +1,41 @@
+"""
+Compare the parse engines of LoadDataset on a synthetic HIGGS-like CSV.
+
+Usage: python benchmarks/bench_parse.py [rows] [workers]
+"""
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+import synthetic
+from LoadDataset.parsing import read_csv
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    raw = synthetic.numeric_csv(rows, 28)
+    names = [i for i in range(0, 29)]
+    print(f"{rows} rows, {len(raw) / 1e6:.1f} MB of CSV, {workers} workers")
+
+    reference = None
+    for engine in ['c', 'parallel', 'pyarrow']:
+        start = time.perf_counter()
+        df = read_csv(io.BytesIO(raw), engine=engine, workers=workers, names=names)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = df
+            baseline = elapsed
+        identical = df.equals(reference)
+        print(f"{engine:>8}: {elapsed:6.2f}s  speedup {baseline / elapsed:4.1f}x  identical to 'c': {identical}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Time every phase of loading synthetic SUSY, HIGGS, KDD99 and Covtype datasets
+served by a local HTTP server, without touching the UCI archive.
+
+The archives have the shapes and formats of the real downloads, scaled down
+by --scale. For each dataset the phases (download, decompress, parse, encode,
+save, warm load) are timed one by one in a fresh process, and a full cold
+load_<name>() is timed in another, so the peak RSS of each is its own.
+
+Usage: python benchmarks/bench_suite.py [--scale 0.01] [--datasets susy,higgs,kdd99,covtype]
+                                        [--cache-format csv] [--engine c] [--pipeline] [--output results.json]
+                                        [--compare previous.json]
+"""
+import io
+import os
+import sys
+import json
+import time
+import gzip
+import zipfile
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from types import SimpleNamespace
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tests'))
+
+# The benchmark never reads or fills the user's dataset cache
+os.environ['LOADDATASET_CACHE'] = '0'
+
+import LoadDataset.LoadDataset as loader
+from LoadDataset.download import download_file
+from LoadDataset.parsing import read_csv
+from LoadDataset.encoding import encode_column, encode_columns
+from LoadDataset.cache import write_frame
+import synthetic
+from localserver import LocalServer
+
+
+# Rows of the real datasets, multiplied by --scale
+FULL_ROWS = {'susy': 5000000, 'higgs': 11000000, 'kdd99': 4898431, 'covtype': 581012}
+
+# Archive layout of the datasets downloaded by LoadDataset itself
+ARCHIVES = {
+    'susy': {'url': 'SUSY_URL', 'file': 'susy.zip', 'member': 'SUSY.csv.gz', 'columns': 19},
+    'higgs': {'url': 'HIGGS_URL', 'file': 'higgs.zip', 'member': 'HIGGS.csv.gz', 'columns': 29},
+    'kdd99': {'url': 'KDD99_URL', 'file': 'kddcup.data.gz', 'member': None, 'columns': 42},
+}
+
+PHASES = ['download', 'decompress', 'parse', 'encode', 'save', 'warm_load']
+
+
+def covtype_payload(rows, seed=0):
+    """Stand-in for the ucimlrepo payload of Covertype: 54 integer features and 7 cover types."""
+    rng = np.random.default_rng(seed)
+    features = pd.DataFrame(rng.integers(0, 4000, size=(rows, 54)), columns=[f'feature{i}' for i in range(54)])
+    targets = pd.DataFrame({'Cover_Type': rng.integers(1, 8, size=rows)})
+    return SimpleNamespace(data=SimpleNamespace(features=features, targets=targets),
+                           variables=pd.DataFrame({'name': list(features.columns) + ['Cover_Type']}),
+                           metadata={'uci_id': 31, 'name': 'Covertype'})
+
+
+def archive(name, rows):
+    if name == 'kdd99':
+        return synthetic.gzip_bytes(synthetic.kdd99_csv(rows), compresslevel=6)
+
+    payload = synthetic.numeric_csv(rows, ARCHIVES[name]['columns'] - 1)
+    return synthetic.zipped_gzip(ARCHIVES[name]['member'], payload, compresslevel=6)
+
+
+def peak_rss():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Timer:
+
+    def __init__(self):
+        self.phases = {}
+
+    def __call__(self, phase, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        self.phases[phase] = time.perf_counter() - start
+        return result
+
+
+def _read_member(path, member):
+    if member is None:
+        with gzip.open(path) as the_file:
+            return the_file.read()
+    with zipfile.ZipFile(path) as the_zip:
+        with the_zip.open(member) as gz_file:
+            with gzip.open(gz_file) as the_file:
+                return the_file.read()
+
+
+def run_phases(name, url, rows, cache_format, engine):
+    """Time the phases of one dataset one by one. Runs in a child process."""
+    timer = Timer()
+    load = getattr(loader, f'load_{name}')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        save_path = os.path.join(tmp, 'cache')
+        if name == 'covtype':
+            loader.set_fetch_function(lambda id: covtype_payload(rows))
+            payload = timer('download', loader.fetch_uci, 31, cache=False)
+            df = payload.data.features
+            timer.phases['decompress'] = timer.phases['parse'] = None
+            target, _ = timer('encode', encode_column, payload.data.targets.values.ravel())
+            df.insert(0, 'target', target)
+        else:
+            spec = ARCHIVES[name]
+            path = os.path.join(tmp, spec['file'])
+            timer('download', download_file, url, path)
+            raw = timer('decompress', _read_member, path, spec['member'])
+            names = list(range(0, spec['columns']))
+            df = timer('parse', read_csv, io.BytesIO(raw), engine=engine, names=names)
+            del raw
+            if name == 'kdd99':
+                timer('encode', encode_columns, df, loader.KDD99_CATEGORICAL)
+            else:
+                timer.phases['encode'] = None
+
+        timer('save', write_frame, df, save_path, name, cache_format)
+        del df
+        timer('warm_load', load, load_path=save_path, cache_format=cache_format, cache=False)
+
+    return {'phases': timer.phases, 'peak_rss_phases': peak_rss()}
+
+
+def run_cold_load(name, url, rows, engine, pipeline=False):
+    """Time a full load_<name>() from the local server. Runs in a child process."""
+    kwargs = {'cache': False}
+    if name == 'covtype':
+        loader.set_fetch_function(lambda id: covtype_payload(rows))
+    else:
+        setattr(loader, ARCHIVES[name]['url'], url)
+        kwargs['engine'] = engine
+        kwargs['pipeline'] = pipeline
+
+    start = time.perf_counter()
+    getattr(loader, f'load_{name}')(**kwargs)
+    return {'cold_load': time.perf_counter() - start, 'peak_rss_load': peak_rss()}
+
+
+def _in_child(function, *args):
+    # A fresh interpreter for every run, so peak RSS is not inherited from earlier runs
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(function, *args).result()
+
+
+def compare(results, previous):
+    """Print the ratio of every timing to the same timing in an earlier results file."""
+    before = {r['dataset']: r for r in previous['results']}
+    print(f"\nCompared with {previous.get('created', 'previous run')} (>1 is slower):")
+    for result in results['results']:
+        old = before.get(result['dataset'])
+        if old is None:
+            continue
+        timings = dict(result['phases'], cold_load=result['cold_load'])
+        old_timings = dict(old['phases'], cold_load=old['cold_load'])
+        ratios = [f"{phase} {timings[phase] / old_timings[phase]:.2f}x" for phase in timings
+                  if timings[phase] and old_timings.get(phase)]
+        print(f"{result['dataset']:>8}: {', '.join(ratios)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', type=float, default=0.01, help='Fraction of the real number of rows')
+    parser.add_argument('--datasets', default=','.join(FULL_ROWS), help='Comma separated list of datasets')
+    parser.add_argument('--cache-format', default='csv', help="Format used by the save and warm load phases")
+    parser.add_argument('--engine', default='c', help='Parse engine')
+    parser.add_argument('--pipeline', action='store_true', help='Overlap download, decompression and parsing in the cold load')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', help='Results file of an earlier run to compare with')
+    args = parser.parse_args()
+
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'scale': args.scale,
+        'cache_format': args.cache_format,
+        'engine': args.engine,
+        'pipeline': args.pipeline,
+        'results': [],
+    }
+
+    with LocalServer() as server:
+        for name in args.datasets.split(','):
+            rows = max(1, int(FULL_ROWS[name] * args.scale))
+            url, size = None, None
+            if name in ARCHIVES:
+                body = archive(name, rows)
+                url, size = server.add('/' + ARCHIVES[name]['file'], body), len(body)
+
+            result = {'dataset': name, 'rows': rows, 'archive_bytes': size}
+            result.update(_in_child(run_phases, name, url, rows, args.cache_format, args.engine))
+            result.update(_in_child(run_cold_load, name, url, rows, args.engine, args.pipeline))
+            results['results'].append(result)
+
+            phases = '  '.join(f"{phase} {result['phases'][phase]:.2f}s" for phase in PHASES if result['phases'][phase] is not None)
+            print(f"{name:>8}: {rows} rows  {phases}  cold load {result['cold_load']:.2f}s  "
+                  f"peak RSS {result['peak_rss_load'] / 2**20:.0f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
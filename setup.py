@@ -33,4 +33,8 @@ setuptools.setup(
     ],
     python_requires='>=3.6',
     install_requires=install_requires,
+    extras_require={
+        # Parquet and Feather caches, and the 'pyarrow' parse engine
+        'arrow': ['pyarrow>=10.0.1'],
+    },
 )
@@ -8,5 +8,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 # Adiciona o diretório src ao sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+# Os testes não usam o cache local de datasets, a menos que o habilitem
+os.environ.setdefault('LOADDATASET_CACHE', '0')
+
 # Importa tudo de LoadDataset.py
 from LoadDataset.LoadDataset import *
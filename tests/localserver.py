@@ -0,0 +1,209 @@
+# tests/localserver.py
+import re
+import time
+import threading
+from unittest import mock
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import synthetic
+
+
+# URL constant of each dataset, path of its archive and the archive builder for a number of rows
+_DATASETS = {
+    'susy': ('SUSY_URL', '/susy.zip', lambda rows: synthetic.zipped_gzip('SUSY.csv.gz', synthetic.numeric_csv(rows, 18))),
+    'higgs': ('HIGGS_URL', '/higgs.zip', lambda rows: synthetic.zipped_gzip('HIGGS.csv.gz', synthetic.numeric_csv(rows, 28))),
+    'kdd99': ('KDD99_URL', '/kddcup.data.gz', lambda rows: synthetic.gzip_bytes(synthetic.kdd99_csv(rows))),
+}
+
+
+def _etag(body):
+    return f'"{hash(body) & 0xffffffff:x}"'
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        body = self.server.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', _etag(body))
+        self.send_header('Last-Modified', formatdate(self.server.modified[self.path], usegmt=True))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+
+    def _write(self, data):
+        # Throttle every connection to server.rate bytes per second, and count
+        # the bytes sent before the client closes the connection
+        sent = 0
+        try:
+            for i in range(0, len(data), 16384):
+                self.wfile.write(data[i:i + 16384])
+                sent += len(data[i:i + 16384])
+                if self.server.rate:
+                    time.sleep(len(data[i:i + 16384]) / self.server.rate)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            with self.server.lock:
+                self.server.sent.append(sent)
+
+    def _not_modified(self, etag, modified):
+        # If-None-Match takes precedence over If-Modified-Since, as in RFC 9110
+        if not self.server.conditional:
+            return False
+        if 'If-None-Match' in self.headers:
+            return self.headers['If-None-Match'] == etag
+        if 'If-Modified-Since' in self.headers:
+            return int(modified) <= parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp()
+        return False
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.headers.append(dict(self.headers))
+            drop_after = server.drops.pop(0) if server.drops else None
+
+        body = server.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+
+        etag = _etag(body)
+        modified = server.modified[self.path]
+        if self._not_modified(etag, modified):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+            self.end_headers()
+            return
+
+        start, end = 0, len(body)
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if match and server.ranges and (if_range is None or if_range == etag):
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else len(body)
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(body)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end - 1}/{len(body)}')
+        else:
+            self.send_response(200)
+
+        if server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(modified, usegmt=True))
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+
+        if drop_after is not None:
+            # Send part of the body and cut the connection, like a dropped download
+            self._write(body[start:min(start + drop_after, end)])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+
+        self._write(body[start:end])
+
+
+class LocalServer:
+    """
+    Small HTTP server running on a background thread, used as a stand-in for
+    the UCI archive in the tests.
+
+    Files are registered with ``add`` and served from memory. Range requests
+    are honoured unless ``ranges`` is False, ``rate`` limits every
+    connection to a number of bytes per second, and ``drop`` makes the next
+    responses stop after a number of bytes. ``sent`` counts the body bytes of
+    every response written before the client went away. Conditional
+    requests (If-None-Match, If-Modified-Since) get a 304 answer when the file
+    did not change, unless ``conditional`` is False.
+    """
+
+    def __init__(self, ranges=True, rate=None, conditional=True):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.files = {}
+        self.httpd.modified = {}
+        self.httpd.requests = []
+        self.httpd.headers = []
+        self.httpd.drops = []
+        self.httpd.sent = []
+        self.httpd.ranges = ranges
+        self.httpd.rate = rate
+        self.httpd.conditional = conditional
+        self.httpd.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def headers(self):
+        return self.httpd.headers
+
+    @property
+    def sent(self):
+        """Number of body bytes written for every response, in order."""
+        return self.httpd.sent
+
+    def add(self, path, body, modified=None):
+        """Serve body at path, last modified at the given time (now by default)."""
+        self.httpd.files[path] = body
+        self.httpd.modified[path] = time.time() if modified is None else modified
+        return self.url(path)
+
+    def drop(self, *sizes):
+        """Cut the next responses after the given numbers of bytes."""
+        self.httpd.drops.extend(sizes)
+
+    def url(self, path):
+        host, port = self.httpd.server_address
+        return f'http://{host}:{port}{path}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def serve_dataset(testcase, name, rows, server=None):
+    """
+    Serve a synthetic archive of SUSY, HIGGS or KDD99 and point its loader at it until the test ends.
+
+    A LocalServer is started for the test, and stopped by its cleanups, unless
+    one is given. Returns the server and the URL of the archive.
+    """
+    if server is None:
+        server = LocalServer()
+        server.__enter__()
+        testcase.addCleanup(server.__exit__, None, None, None)
+
+    constant, path, archive = _DATASETS[name]
+    url = server.add(path, archive(rows))
+    patcher = mock.patch(f'LoadDataset.LoadDataset.{constant}', url)
+    patcher.start()
+    testcase.addCleanup(patcher.stop)
+
+    return server, url
@@ -0,0 +1,58 @@
+# tests/synthetic.py
+import io
+import gzip
+import mmap
+import zipfile
+import numpy as np
+import pandas as pd
+
+
+def numeric_csv(rows, features, seed=0):
+    """CSV text with a 0/1 target in the first column followed by float features."""
+    rng = np.random.default_rng(seed)
+    target = rng.integers(0, 2, size=rows).astype(float)
+    values = rng.normal(size=(rows, features))
+    # Written in one call, so that the benchmarks can generate millions of rows
+    buffer = io.BytesIO()
+    np.savetxt(buffer, np.column_stack([target, values]), fmt='%.18e', delimiter=',')
+    return buffer.getvalue()
+
+
+def kdd99_csv(rows, seed=0):
+    """CSV text shaped like kddcup.data: 41 features with 3 categorical ones and a label."""
+    rng = np.random.default_rng(seed)
+    protocols = np.array(['tcp', 'udp', 'icmp'])
+    services = np.array(['http', 'smtp', 'ftp_data', 'private', 'ecr_i', 'domain_u'])
+    flags = np.array(['SF', 'S0', 'REJ', 'RSTO'])
+    labels = np.array(['normal.', 'smurf.', 'neptune.', 'back.', 'satan.'])
+    counts = rng.integers(0, 1000, size=(rows, 20))
+    rates = rng.random(size=(rows, 15))
+    columns = [rng.integers(0, 100, size=rows), rng.choice(protocols, size=rows), rng.choice(services, size=rows),
+               rng.choice(flags, size=rows)]
+    columns += list(counts.T) + list(rates[:, :7].T) + list(rng.integers(0, 256, size=(rows, 2)).T) + list(rates[:, 7:].T)
+    columns.append(rng.choice(labels, size=rows))
+    return pd.DataFrame(dict(enumerate(columns))).to_csv(header=False, index=False, float_format='%.2f').encode()
+
+
+def zipped_gzip(member, payload, compresslevel=9):
+    """Zip archive holding a single gzip member, like the SUSY and HIGGS downloads."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as the_zip:
+        the_zip.writestr(member, gzip.compress(payload, compresslevel=compresslevel))
+    return buffer.getvalue()
+
+
+def gzip_bytes(payload, compresslevel=9):
+    """Plain gzip file, like the KDD99 download."""
+    return gzip.compress(payload, compresslevel=compresslevel)
+
+
+def is_memory_mapped(array):
+    """Whether an array is a view of a memory-mapped file."""
+    # Walk the chain of views down to the buffer that owns the memory
+    base = array
+    while base is not None:
+        if isinstance(base, mmap.mmap):
+            return True
+        base = getattr(base, 'base', None)
+    return False
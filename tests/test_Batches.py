@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+import context as LoadDataset
+from localserver import serve_dataset
+
+
+class TestBatches(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_higgs_batches_match_full_load(self):
+
+        serve_dataset(self, 'higgs', 250)
+        data, target = LoadDataset.load_higgs()
+        batches = list(LoadDataset.iter_batches('higgs', chunksize=100, save_path=self.tmp.name))
+
+        self.assertEqual([len(d) for d, t in batches], [100, 100, 50])
+        pd.testing.assert_frame_equal(pd.concat([d for d, t in batches]), data)
+        pd.testing.assert_series_equal(pd.concat([t for d, t in batches]), target)
+
+        # The batches written while streaming can be iterated again from the cache
+        cached = list(LoadDataset.load_higgs(load_path=self.tmp.name, chunksize=100))
+        self.assertEqual([len(d) for d, t in cached], [100, 100, 50])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'higgs.csv')))
+
+    def test_kdd99_encoding_is_consistent_across_batches(self):
+
+        serve_dataset(self, 'kdd99', 300)
+        data, target = LoadDataset.load_kdd99()
+        batches = list(LoadDataset.load_kdd99(chunksize=70))
+
+        self.assertEqual(len(batches), 5)
+        pd.testing.assert_frame_equal(pd.concat([d for d, t in batches]), data)
+        pd.testing.assert_series_equal(pd.concat([t for d, t in batches]), target)
+
+    def test_unknown_dataset(self):
+
+        with self.assertRaises(ValueError):
+            LoadDataset.iter_batches('iris')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+import synthetic
+from localserver import serve_dataset
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(LoadDataset.set_cache_format, 'csv')
+
+        serve_dataset(self, 'susy', 300)
+
+    def test_binary_formats_round_trip(self):
+
+        csv_path = os.path.join(self.tmp.name, 'csv')
+        LoadDataset.load_susy(save_path=csv_path)
+        expected_data, expected_target = LoadDataset.load_susy(load_path=csv_path)
+
+        for cache_format in ['parquet', 'feather']:
+            path = os.path.join(self.tmp.name, cache_format)
+            LoadDataset.load_susy(save_path=path, cache_format=cache_format)
+            self.assertEqual(sorted(os.listdir(path)), [f'susy.{cache_format}', f'susy.{cache_format}.schema.json'])
+
+            data, target = LoadDataset.load_susy(load_path=path, cache_format=cache_format)
+            pd.testing.assert_frame_equal(data, expected_data)
+            pd.testing.assert_series_equal(target, expected_target)
+
+            batches = list(LoadDataset.load_susy(load_path=path, chunksize=128))
+            self.assertEqual([len(d) for d, t in batches], [128, 128, 44])
+            pd.testing.assert_frame_equal(pd.concat([d for d, t in batches]), expected_data)
+
+    def test_npy_cache_is_memory_mapped(self):
+
+        csv_path = os.path.join(self.tmp.name, 'csv')
+        LoadDataset.load_susy(save_path=csv_path)
+        expected_data, expected_target = LoadDataset.load_susy(load_path=csv_path)
+
+        # Written batch by batch while streaming
+        for batch in LoadDataset.load_susy(save_path=self.tmp.name, chunksize=128, cache_format='npy'):
+            pass
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp.name, 'susy.npy'))),
+                         ['features.npy', 'header.json', 'target.npy'])
+
+        features, target = LoadDataset.load_numpy(self.tmp.name, 'susy')
+        self.assertIsInstance(features, np.memmap)
+        self.assertEqual(features.shape, (300, 18))
+        self.assertFalse(features.flags.writeable)
+
+        data, target = LoadDataset.load_susy(load_path=self.tmp.name, cache_format='npy')
+        pd.testing.assert_frame_equal(data, expected_data)
+        pd.testing.assert_series_equal(target, expected_target)
+        self.assertTrue(synthetic.is_memory_mapped(data[1].to_numpy()))
+        self.assertTrue(synthetic.is_memory_mapped(target.to_numpy()))
+
+        batches = list(LoadDataset.load_susy(load_path=self.tmp.name, chunksize=128, cache_format='npy'))
+        pd.testing.assert_frame_equal(pd.concat([d for d, t in batches]), expected_data)
+
+    def test_npy_cache_keeps_column_types(self):
+
+        df = pd.DataFrame({'target': [0, 1, 2], 'a': [1, 2, 3], 'b': [0.5, 1.5, 2.5]})
+        LoadDataset.write_frame(df, self.tmp.name, 'mixed', 'npy')
+
+        data, target = LoadDataset.read_dataset(self.tmp.name, 'mixed')
+        pd.testing.assert_frame_equal(data, df[['a', 'b']])
+        pd.testing.assert_series_equal(target, df['target'])
+
+        with self.assertRaises(ValueError):
+            LoadDataset.write_frame(pd.DataFrame({'target': [0], 'a': ['x']}), self.tmp.name, 'text', 'npy')
+
+    def test_streamed_save_in_binary_format(self):
+
+        for batch in LoadDataset.load_susy(save_path=self.tmp.name, chunksize=100, cache_format='parquet'):
+            pass
+
+        data, target = LoadDataset.load_susy(load_path=self.tmp.name)
+        self.assertEqual(data.shape, (300, 18))
+
+    def test_global_format_and_migration(self):
+
+        LoadDataset.load_susy(save_path=self.tmp.name)
+        expected_data, _ = LoadDataset.load_susy(load_path=self.tmp.name)
+
+        written = LoadDataset.migrate_cache(self.tmp.name, 'feather', remove=True)
+        self.assertEqual(written, [os.path.join(self.tmp.name, 'susy.feather')])
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['susy.feather', 'susy.feather.schema.json'])
+
+        # The migrated file is found even though csv is the global format
+        data, _ = LoadDataset.load_susy(load_path=self.tmp.name)
+        pd.testing.assert_frame_equal(data, expected_data)
+
+        LoadDataset.set_cache_format('parquet')
+        path = os.path.join(self.tmp.name, 'global')
+        LoadDataset.load_susy(save_path=path)
+        self.assertEqual(sorted(os.listdir(path)), ['susy.parquet', 'susy.parquet.schema.json'])
+
+        with self.assertRaises(ValueError):
+            LoadDataset.set_cache_format('xlsx')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+import synthetic
+from localserver import serve_dataset
+
+
+class TestColumns(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        serve_dataset(self, 'higgs', 250)
+
+        self.data, self.target = LoadDataset.load_higgs(save_path=self.tmp.name)
+
+    def test_feature_groups_while_parsing(self):
+
+        for engine in ['c', 'parallel', 'pyarrow']:
+            with self.subTest(engine=engine):
+                data, target = LoadDataset.load_higgs(columns='high_level', engine=engine)
+
+                self.assertEqual(list(data.columns), list(range(22, 29)))
+                np.testing.assert_allclose(data.to_numpy(), self.data.iloc[:, 21:].to_numpy())
+                np.testing.assert_array_equal(target.to_numpy(), self.target.to_numpy())
+
+    def test_columns_in_batches(self):
+
+        batches = list(LoadDataset.iter_batches('higgs', chunksize=100, columns=['low_level', 28]))
+
+        self.assertEqual([len(d) for d, t in batches], [100, 100, 50])
+        self.assertEqual(list(batches[0][0].columns), list(range(1, 22)) + [28])
+        np.testing.assert_array_equal(pd.concat([d for d, t in batches])[28].to_numpy(), self.data[28].to_numpy())
+
+    def test_columns_from_load_path(self):
+
+        for cache_format in ['csv', 'parquet', 'feather', 'npy']:
+            with self.subTest(cache_format=cache_format):
+                path = f'{self.tmp.name}/{cache_format}'
+                LoadDataset.write_frame(pd.concat([self.target, self.data], axis=1), path, 'higgs', cache_format)
+
+                data, target = LoadDataset.load_higgs(load_path=path, cache_format=cache_format, columns=['3', 1])
+                self.assertEqual(list(data.columns), [1, 3])
+                np.testing.assert_allclose(data.to_numpy(), self.data[[1, 3]].to_numpy())
+                np.testing.assert_array_equal(target.to_numpy(), self.target.to_numpy())
+
+                batches = list(LoadDataset.load_higgs(load_path=path, cache_format=cache_format, columns='high_level', chunksize=100))
+                self.assertEqual([d.shape for d, t in batches], [(100, 7), (100, 7), (50, 7)])
+
+    def test_npy_feature_group_stays_mapped(self):
+
+        LoadDataset.write_frame(pd.concat([self.target, self.data], axis=1), self.tmp.name, 'higgs', 'npy')
+        data, target = LoadDataset.load_higgs(load_path=self.tmp.name, cache_format='npy', columns='low_level')
+
+        self.assertEqual(data.shape, (250, 21))
+        self.assertTrue(synthetic.is_memory_mapped(data[1].to_numpy()))
+
+    def test_invalid_columns(self):
+
+        with self.assertRaises(ValueError):
+            LoadDataset.load_higgs(columns='raw')
+        with self.assertRaises(ValueError):
+            LoadDataset.load_susy(columns=19)
+        with self.assertRaises(ValueError):
+            LoadDataset.load_higgs(columns='low_level', save_path=self.tmp.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+import context as LoadDataset
+from localserver import LocalServer, serve_dataset
+from LoadDataset import download
+
+
+class TestDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dest = os.path.join(self.tmp.name, 'archive.zip')
+        self.body = os.urandom(300000)
+
+        patcher = mock.patch('LoadDataset.download.RETRY_BACKOFF', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_load_susy_spools_to_download_path(self):
+
+        server, _ = serve_dataset(self, 'susy', 200)
+        data, target = LoadDataset.load_susy(download_path=self.tmp.name)
+
+        # The archive is kept and reused, so no second request is made
+        data, target = LoadDataset.load_susy(download_path=self.tmp.name)
+
+        self.assertEqual(data.shape, (200, 18))
+        self.assertEqual(target.shape, (200,))
+        self.assertEqual(server.requests, ['/susy.zip'])
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['susy.zip', 'susy.zip.json'])
+
+    def test_load_kdd99_without_download_path(self):
+
+        serve_dataset(self, 'kdd99', 100)
+        data, target = LoadDataset.load_kdd99()
+
+        self.assertEqual(data.shape, (100, 41))
+        self.assertEqual(target.shape, (100,))
+
+    def test_download_failure_raises(self):
+
+        with LocalServer() as server:
+            with mock.patch('LoadDataset.LoadDataset.HIGGS_URL', server.url('/missing.zip')):
+                with self.assertRaises(ValueError):
+                    LoadDataset.load_higgs()
+
+    def test_resume_after_dropped_connections(self):
+
+        with LocalServer() as server:
+            url = server.add('/archive.zip', self.body)
+            server.drop(1000, 50000)
+            download.download_file(url, self.dest)
+
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertEqual(len(server.requests), 3)
+        self.assertEqual(server.headers[1]['Range'], 'bytes=1000-')
+        self.assertEqual(server.headers[2]['Range'], 'bytes=51000-')
+        self.assertIn('If-Range', server.headers[2])
+        self.assertEqual(os.listdir(self.tmp.name), ['archive.zip'])
+
+    def test_restart_when_ranges_are_not_supported(self):
+
+        with LocalServer(ranges=False) as server:
+            url = server.add('/archive.zip', self.body)
+            server.drop(1000)
+            download.download_file(url, self.dest)
+
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+
+    def test_resume_partial_file_of_earlier_call(self):
+
+        with LocalServer() as server:
+            url = server.add('/archive.zip', self.body)
+
+            # An earlier process was interrupted after 2000 bytes
+            server.drop(2000)
+            with self.assertRaises(download.IncompleteDownload):
+                download.download_file(url, self.dest, retries=0)
+            self.assertEqual(os.path.getsize(self.dest + '.part'), 2000)
+
+            download.download_file(url, self.dest)
+
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertEqual(server.headers[-1]['Range'], 'bytes=2000-')
+
+    def test_complete_partial_file_is_renamed(self):
+
+        with open(self.dest + '.part', 'wb') as f:
+            f.write(self.body)
+
+        with LocalServer() as server:
+            url = server.add('/archive.zip', self.body)
+            self.assertEqual(download.download_file(url, self.dest), self.dest)
+
+        # The server answers 416 to a range starting at the end of the file
+        self.assertEqual(server.headers[-1]['Range'], f'bytes={len(self.body)}-')
+        self.assertEqual(server.sent, [])
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertFalse(os.path.exists(self.dest + '.part'))
+
+    def test_stale_partial_file_is_discarded(self):
+
+        with open(self.dest + '.part', 'wb') as f:
+            f.write(b'x' * 5000)
+
+        with LocalServer() as server:
+            url = server.add('/archive.zip', self.body)
+            with open(self.dest + '.part.json', 'w') as f:
+                json.dump({'url': url, 'etag': '"outdated"', 'last_modified': None}, f)
+
+            download.download_file(url, self.dest)
+
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+
+    def test_give_up_after_retries(self):
+
+        with LocalServer() as server:
+            url = server.add('/archive.zip', self.body)
+            server.drop(10, 10, 10)
+            with self.assertRaises(download.IncompleteDownload):
+                download.download_file(url, self.dest, retries=2)
+
+        self.assertFalse(os.path.exists(self.dest))
+
+    def test_segmented_download(self):
+
+        with LocalServer() as server:
+            url = server.add('/archive.zip', self.body)
+            # Two of the four ranges are cut and have to be resumed
+            server.drop(5000, 20000)
+            download.download_file(url, self.dest, segments=4)
+
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+        ranges = sorted(headers['Range'] for headers in server.headers if 'Range' in headers)
+        self.assertEqual(len(ranges), 6)
+        self.assertEqual(os.listdir(self.tmp.name), ['archive.zip'])
+
+    def test_segmented_download_falls_back_to_single_stream(self):
+
+        with LocalServer(ranges=False) as server:
+            url = server.add('/archive.zip', self.body)
+            download.download_file(url, self.dest, segments=4)
+
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), self.body)
+        self.assertEqual(len(server.requests), 1)
+
+    def test_segmented_download_is_faster_on_throttled_connections(self):
+
+        body = os.urandom(1600000)
+        with LocalServer(rate=2000000) as server:
+            url = server.add('/archive.zip', body)
+
+            start = time.perf_counter()
+            download.download_file(url, self.dest)
+            single = time.perf_counter() - start
+            os.remove(self.dest)
+
+            start = time.perf_counter()
+            download.download_file(url, self.dest, segments=4)
+            segmented = time.perf_counter() - start
+
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), body)
+        self.assertLess(segmented, single * 0.6)
+
+    def test_load_higgs_with_segments(self):
+
+        serve_dataset(self, 'higgs', 300)
+        data, target = LoadDataset.load_higgs(segments=3)
+
+        self.assertEqual(data.shape, (300, 28))
+
+
+if __name__ == '__main__':
+    unittest.main()
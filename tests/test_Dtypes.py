@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+from localserver import serve_dataset
+
+
+class TestDtypes(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        server, _ = serve_dataset(self, 'susy', 200)
+        serve_dataset(self, 'kdd99', 200, server)
+
+    def test_susy_float32(self):
+
+        expected, _ = LoadDataset.load_susy()
+        data, target = LoadDataset.load_susy(dtype_policy='float32', save_path=self.tmp.name)
+
+        self.assertEqual(set(data.dtypes), {np.dtype('float32')})
+        self.assertEqual(target.dtype, np.float32)
+        np.testing.assert_allclose(data.to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+        # Applied again when reading the cache, and per batch
+        data, target = LoadDataset.load_susy(load_path=self.tmp.name, dtype_policy='float32')
+        self.assertEqual(set(data.dtypes), {np.dtype('float32')})
+        for data, target in LoadDataset.load_susy(load_path=self.tmp.name, chunksize=64, dtype_policy='float32'):
+            self.assertEqual(set(data.dtypes), {np.dtype('float32')})
+
+    def test_kdd99_compact(self):
+
+        data, target = LoadDataset.load_kdd99(dtype_policy='compact')
+
+        self.assertEqual(data[24].dtype, np.float32)
+        self.assertEqual(data[1].dtype, np.uint8)
+        self.assertEqual(data[4].dtype, np.uint16)
+        self.assertEqual(target.dtype, np.uint8)
+
+        # Batches encode categories with the same type as the full load
+        expected, _ = LoadDataset.load_kdd99()
+        for batch, _ in LoadDataset.load_kdd99(chunksize=50, dtype_policy='compact'):
+            self.assertEqual(batch[1].dtype, np.uint8)
+            self.assertEqual(batch[24].dtype, np.float32)
+            pd.testing.assert_frame_equal(batch[[1, 2, 3]], expected.loc[batch.index, [1, 2, 3]], check_dtype=False)
+
+    def test_explicit_mapping(self):
+
+        data, target = LoadDataset.load_susy(dtype_policy={'target': 'int8', 1: 'float32'})
+
+        self.assertEqual(target.dtype, np.int8)
+        self.assertEqual(data[1].dtype, np.float32)
+        self.assertEqual(data[2].dtype, np.float64)
+
+    def test_compact_integer_columns(self):
+
+        df = pd.DataFrame({'flag': [0, 1, 1], 'small': [-3, 0, 100], 'wide': [0, 70000, 5]})
+        df = LoadDataset.apply_dtype_policy(df, 'compact')
+
+        self.assertEqual(list(df.dtypes), [np.uint8, np.int8, np.uint32])
+
+    def test_unknown_policy(self):
+
+        with self.assertRaises(ValueError):
+            LoadDataset.load_susy(dtype_policy='float16')
+
+
+if __name__ == '__main__':
+    unittest.main()
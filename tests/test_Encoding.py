@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+import context as LoadDataset
+from localserver import serve_dataset
+
+
+class TestEncoding(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_codes_match_label_encoder(self):
+
+        values = pd.Series(['tcp', 'udp', np.nan, 'icmp', 'tcp', 'udp'], dtype=object)
+        codes, categories = LoadDataset.encode_column(values)
+
+        np.testing.assert_array_equal(codes, LabelEncoder().fit_transform(values))
+        self.assertEqual(categories, ['icmp', 'tcp', 'udp', None])
+        self.assertEqual(codes.dtype, np.dtype('int64'))
+
+    def test_known_categories(self):
+
+        codes, categories = LoadDataset.encode_column(pd.Series(['b', 'z', 'a']), ['a', 'b'], np.int8)
+
+        self.assertEqual(codes.tolist(), [1, -1, 0])
+        self.assertEqual(codes.dtype, np.dtype('int8'))
+        self.assertEqual(categories, ['a', 'b'])
+
+    def test_decode(self):
+
+        values = pd.Series(['x', None, 'y', 'x'], name='col')
+        codes, categories = LoadDataset.encode_column(values)
+        decoded = LoadDataset.decode_column(pd.Series(codes, name='col'), categories)
+
+        self.assertEqual(decoded.tolist()[::2], ['x', 'y'])
+        self.assertTrue(pd.isna(decoded[1]))
+
+    def test_kdd99_categories_are_saved_and_reloaded(self):
+
+        serve_dataset(self, 'kdd99', 200)
+        data, target = LoadDataset.load_kdd99(save_path=self.tmp.name, cache_format='parquet', dtype_policy='compact')
+        batches = list(LoadDataset.iter_batches('kdd99', chunksize=64))
+
+        categories = data.attrs['categories']
+        self.assertEqual(sorted(categories), ['1', '2', '3', 'target'])
+        self.assertEqual(categories['1'], ['icmp', 'tcp', 'udp'])
+        self.assertEqual(data[1].dtype, np.dtype('uint8'))
+        self.assertEqual(target.attrs['categories'], categories)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'kdd99.categories.json')))
+
+        # The same mappings decode the cached copy and every streamed batch
+        cached_data, cached_target = LoadDataset.load_kdd99(load_path=self.tmp.name, cache_format='parquet')
+        self.assertEqual(cached_data.attrs['categories'], categories)
+        self.assertEqual(LoadDataset.decode_column(cached_target, categories['target']).tolist(),
+                         LoadDataset.decode_column(target, categories['target']).tolist())
+        for batch_data, batch_target in batches:
+            self.assertEqual(batch_data.attrs['categories'], categories)
+
+    def test_adult_targets_are_cleaned(self):
+
+        features = pd.DataFrame({'age': [39, 50, 38], 'workclass': ['State-gov', np.nan, 'Private']})
+        targets = pd.DataFrame({'income': ['<=50K', '>50K.', '<=50K.']})
+        adult = SimpleNamespace(data=SimpleNamespace(features=features, targets=targets), variables=None, metadata={})
+
+        with mock.patch('LoadDataset.uci._fetch_function', lambda id: adult):
+            data, target = LoadDataset.load_adult(save_path=self.tmp.name)
+
+        self.assertEqual(target.tolist(), [0, 1, 0])
+        self.assertEqual(data['workclass'].tolist(), [1, 2, 0])
+        self.assertEqual(data.attrs['categories'], {'workclass': ['Private', 'State-gov', None], 'target': ['<=50K', '>50K']})
+
+        cached_data, cached_target = LoadDataset.load_adult(load_path=self.tmp.name)
+        self.assertEqual(cached_target.attrs['categories']['target'], ['<=50K', '>50K'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+import synthetic
+from localserver import LocalServer, serve_dataset
+
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.server = LocalServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+
+    def _phases(self, spans):
+        return {span.phase: span for span in spans}
+
+    def test_spans_of_a_cold_and_a_warm_load(self):
+
+        serve_dataset(self, 'higgs', 250, self.server)
+        archive = self.server.httpd.files['/higgs.zip']
+        with LoadDataset.recording() as spans:
+            LoadDataset.load_higgs(save_path=self.tmp.name, cache_format='parquet')
+
+        phases = self._phases(spans)
+        self.assertEqual([span.phase for span in spans], ['download', 'parse', 'decompress', 'cache_write', 'load'])
+        self.assertTrue(all(span.dataset == 'higgs' for span in spans))
+        self.assertEqual(phases['download'].bytes, len(archive))
+        self.assertEqual(phases['decompress'].bytes, len(synthetic.numeric_csv(250, 28)))
+        self.assertEqual(phases['decompress'].parent, 'load')
+        self.assertEqual(phases['parse'].rows, 250)
+        self.assertEqual(phases['parse'].extra['engine'], 'c')
+        self.assertEqual(phases['cache_write'].extra['cache_format'], 'parquet')
+        self.assertEqual(phases['load'].rows, 250)
+        self.assertLessEqual(phases['parse'].duration, phases['load'].duration)
+        self.assertIsInstance(phases['parse'].memory_delta, int)
+
+        with LoadDataset.recording() as spans:
+            LoadDataset.load_higgs(load_path=self.tmp.name, cache_format='parquet')
+
+        self.assertEqual([span.phase for span in spans], ['cache_read', 'load'])
+        self.assertEqual(spans[0].rows, 250)
+        self.assertGreater(spans[0].bytes, 0)
+
+    def test_encode_span(self):
+
+        serve_dataset(self, 'kdd99', 100, self.server)
+        with LoadDataset.recording() as spans:
+            LoadDataset.load_kdd99()
+
+        encode = [span for span in spans if span.phase == 'encode']
+        self.assertEqual(len(encode), 1)
+        self.assertEqual(encode[0].rows, 100)
+        self.assertEqual(encode[0].dataset, 'kdd99')
+
+    def test_kdd99_batches_while_recording(self):
+
+        serve_dataset(self, 'kdd99', 300, self.server)
+        data, target = LoadDataset.load_kdd99()
+        with LoadDataset.recording() as spans:
+            batches = list(LoadDataset.load_kdd99(chunksize=70))
+
+        # The archive is rewound after the vocabulary pass, through the timed reader
+        self.assertEqual(len(batches), 5)
+        pd.testing.assert_frame_equal(pd.concat([d for d, t in batches]), data)
+        decompress = [span for span in spans if span.phase == 'decompress']
+        self.assertEqual(len(decompress), 1)
+        self.assertEqual(decompress[0].bytes, 2 * len(synthetic.kdd99_csv(300)))
+
+    def test_listeners_and_logging(self):
+
+        received = []
+        LoadDataset.add_listener(received.append)
+        try:
+            with LoadDataset.span('parse', 'iris') as span:
+                span.set(rows=150, engine='c')
+        finally:
+            LoadDataset.remove_listener(received.append)
+
+        self.assertEqual(received[0].as_dict()['rows'], 150)
+        self.assertEqual(received[0].as_dict()['engine'], 'c')
+
+        with self.assertLogs('LoadDataset', 'DEBUG') as logs:
+            with LoadDataset.span('encode', 'adult'):
+                pass
+        self.assertIn("phase='encode'", logs.output[0])
+
+    def test_nothing_is_measured_when_disabled(self):
+
+        with mock.patch('LoadDataset.instrument._rss') as rss:
+            with LoadDataset.span('parse') as span:
+                span.set(rows=1)
+            LoadDataset.encode_column(np.array(['a', 'b'], dtype=object))
+
+        rss.assert_not_called()
+        self.assertNotIsInstance(span, LoadDataset.Span)
+
+
+if __name__ == '__main__':
+    unittest.main()
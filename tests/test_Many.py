@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+import threading
+from unittest import mock
+
+import requests
+
+import context as LoadDataset
+from localserver import serve_dataset
+
+
+class CountingSession(requests.Session):
+    """Session recording the URLs it fetched."""
+
+    def __init__(self):
+        super().__init__()
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def request(self, method, url, *args, **kwargs):
+        with self.lock:
+            self.urls.append(url)
+        return super().request(method, url, *args, **kwargs)
+
+
+class TestLoadMany(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.server, _ = serve_dataset(self, 'susy', 120)
+        serve_dataset(self, 'higgs', 80, self.server)
+        # KDD99 is not served, its load fails
+        patcher = mock.patch('LoadDataset.LoadDataset.KDD99_URL', self.server.url('/missing.gz'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_errors_are_reported_per_dataset(self):
+
+        session = CountingSession()
+        results = {name: (result, error) for name, result, error in
+                   LoadDataset.load_many(['susy', 'kdd99', 'higgs'], max_workers=2, session=session, engine='c')}
+
+        self.assertEqual(sorted(results), ['higgs', 'kdd99', 'susy'])
+        self.assertEqual(results['susy'][0][0].shape, (120, 18))
+        self.assertEqual(results['higgs'][0][0].shape, (80, 28))
+        self.assertIsNone(results['kdd99'][0])
+        self.assertIsInstance(results['kdd99'][1], ValueError)
+        self.assertIsNone(results['susy'][1])
+
+        # Every download went through the shared session
+        self.assertEqual(sorted(session.urls), sorted(self.server.url(path) for path in self.server.requests))
+
+    def test_arguments_per_dataset(self):
+
+        results = list(LoadDataset.load_many({'susy': {'nrows': 10}, 'higgs': {'columns': 'high_level'}},
+                                             max_workers=1, dtype_policy='float32'))
+
+        self.assertEqual([name for name, _, _ in results], ['susy', 'higgs'])
+        self.assertEqual(results[0][1][0].shape, (10, 18))
+        self.assertEqual(results[1][1][0].shape, (80, 7))
+        self.assertEqual(str(results[1][1][0].dtypes.iloc[0]), 'float32')
+
+    def test_unknown_dataset(self):
+
+        with self.assertRaises(ValueError):
+            LoadDataset.load_many(['susy', 'mnist'])
+
+
+if __name__ == '__main__':
+    unittest.main()
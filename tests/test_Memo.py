@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+import context as LoadDataset
+from LoadDataset.memo import _copy_on_write
+from localserver import serve_dataset
+
+
+class TestMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.server, _ = serve_dataset(self, 'higgs', 200)
+
+        LoadDataset.set_memory_budget(10 * 2**20)
+        self.addCleanup(LoadDataset.set_memory_budget, 0)
+        LoadDataset.clear_memory_cache()
+        self.addCleanup(LoadDataset.clear_memory_cache)
+
+    def test_repeated_load_is_served_from_memory(self):
+
+        data, target = LoadDataset.load_higgs()
+        again, again_target = LoadDataset.load_higgs(debug=True)
+
+        self.assertEqual(self.server.requests, ['/higgs.zip'])
+        self.assertTrue(again.equals(data))
+        info = LoadDataset.memory_cache_info()
+        self.assertEqual((info['hits'], info['misses'], info['entries']), (1, 1, 1))
+        self.assertGreater(info['bytes'], 200 * 28 * 8)
+
+    def test_options_are_part_of_the_key(self):
+
+        LoadDataset.load_higgs()
+        small, _ = LoadDataset.load_higgs(dtype_policy='float32')
+        group, _ = LoadDataset.load_higgs(columns='high_level')
+
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(str(small.dtypes.iloc[0]), 'float32')
+        self.assertEqual(group.shape, (200, 7))
+        self.assertEqual(LoadDataset.memory_cache_info()['entries'], 3)
+
+    def test_cached_copy_cannot_be_modified(self):
+
+        data, target = LoadDataset.load_higgs()
+        again, again_target = LoadDataset.load_higgs()
+        first = data.iloc[0, 0]
+
+        # Neither the miss nor the hit copies the data
+        self.assertTrue(np.shares_memory(again[again.columns[0]].to_numpy(), data[data.columns[0]].to_numpy()))
+
+        if _copy_on_write():
+            data.iloc[0, 0] = 1000.0
+            target.iloc[0] = 5
+        else:
+            # Without copy-on-write the served frames are read-only views of the cached arrays
+            with self.assertRaises(ValueError):
+                data.iloc[0, 0] = 1000.0
+            with self.assertRaises(ValueError):
+                target.iloc[0] = 5
+
+        again, again_target = LoadDataset.load_higgs()
+        self.assertEqual(again.iloc[0, 0], first)
+        self.assertNotEqual(again_target.iloc[0], 5)
+
+    def test_least_recently_used_is_evicted(self):
+
+        data, _ = LoadDataset.load_higgs()
+        size = LoadDataset.memory_cache_info()['bytes']
+        LoadDataset.set_memory_budget(int(size * 1.5))
+
+        LoadDataset.load_higgs(nrows=150)
+        info = LoadDataset.memory_cache_info()
+        self.assertEqual((info['entries'], info['evictions']), (1, 1))
+
+        LoadDataset.load_higgs(nrows=150)
+        self.assertEqual(LoadDataset.memory_cache_info()['hits'], 1)
+
+    def test_off_by_default_and_for_saves(self):
+
+        LoadDataset.set_memory_budget(0)
+        LoadDataset.load_higgs()
+        LoadDataset.load_higgs()
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(LoadDataset.memory_cache_info()['misses'], 0)
+
+        LoadDataset.set_memory_budget(10 * 2**20)
+        batches = LoadDataset.load_higgs(chunksize=50)
+        self.assertEqual(len(list(batches)), 4)
+        self.assertEqual(LoadDataset.memory_cache_info()['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
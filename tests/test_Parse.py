@@ -0,0 +1,54 @@
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+import synthetic
+from localserver import serve_dataset
+from LoadDataset import parsing
+
+
+class TestParse(unittest.TestCase):
+
+    def test_parallel_engine_matches_c_engine(self):
+
+        raw = synthetic.kdd99_csv(500)
+        expected = pd.read_csv(io.BytesIO(raw), header=None)
+
+        # Small blocks so the file is split between many workers
+        df = parsing.parallel_read_csv(io.BytesIO(raw), workers=4, block_size=4096, header=None)
+        pd.testing.assert_frame_equal(df, expected)
+
+        # A header row is only read once
+        raw = expected.to_csv(index=False).encode()
+        df = parsing.parallel_read_csv(io.BytesIO(raw), workers=3, block_size=1000)
+        pd.testing.assert_frame_equal(df, pd.read_csv(io.BytesIO(raw)))
+
+    def test_loaders_with_engines(self):
+
+        server, _ = serve_dataset(self, 'higgs', 300)
+        serve_dataset(self, 'kdd99', 300, server)
+        with mock.patch('LoadDataset.parsing.PARALLEL_BLOCK_SIZE', 8192):
+
+            expected, _ = LoadDataset.load_higgs()
+            data, _ = LoadDataset.load_higgs(engine='parallel', workers=4)
+            pd.testing.assert_frame_equal(data, expected)
+
+            data, _ = LoadDataset.load_higgs(engine='pyarrow')
+            np.testing.assert_allclose(data.to_numpy(), expected.to_numpy(), rtol=1e-15)
+
+            expected, _ = LoadDataset.load_kdd99()
+            data, _ = LoadDataset.load_kdd99(engine='parallel', workers=2)
+            pd.testing.assert_frame_equal(data, expected)
+
+    def test_unknown_engine(self):
+
+        with self.assertRaises(ValueError):
+            LoadDataset.load_susy(engine='python')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+from urllib3.exceptions import ProtocolError
+
+import context as LoadDataset
+import synthetic
+from localserver import LocalServer, serve_dataset
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.payload = synthetic.numeric_csv(3000, 28)
+        self.server, self.url = serve_dataset(self, 'higgs', 3000)
+
+    def test_same_result_as_a_sequential_load(self):
+
+        data, target = LoadDataset.load_higgs()
+        for engine in ['c', 'parallel']:
+            with self.subTest(engine=engine):
+                piped, piped_target = LoadDataset.load_higgs(pipeline=True, engine=engine, workers=2)
+                np.testing.assert_array_equal(piped.to_numpy(), data.to_numpy())
+                np.testing.assert_array_equal(piped_target.to_numpy(), target.to_numpy())
+
+        batches = list(LoadDataset.load_higgs(chunksize=1000, pipeline=True))
+        self.assertEqual([len(batch) for batch, _ in batches], [1000, 1000, 1000])
+
+        kept, _ = LoadDataset.load_higgs(pipeline=True, download_path=self.tmp.name)
+        np.testing.assert_array_equal(kept.to_numpy(), data.to_numpy())
+        self.assertIn('higgs.zip', os.listdir(self.tmp.name))
+
+    def test_kdd99(self):
+
+        serve_dataset(self, 'kdd99', 500, self.server)
+        data, target = LoadDataset.load_kdd99()
+        piped, piped_target = LoadDataset.load_kdd99(pipeline=True)
+
+        self.assertTrue(piped.equals(data))
+        self.assertTrue(piped_target.equals(target))
+
+    def test_stages_overlap(self):
+
+        slow = LocalServer(rate=400000)
+        with slow:
+            url = slow.add('/higgs.zip', synthetic.zipped_gzip('HIGGS.csv.gz', synthetic.numeric_csv(6000, 28)))
+            with mock.patch('LoadDataset.LoadDataset.HIGGS_URL', url), LoadDataset.recording() as spans:
+                LoadDataset.load_higgs(pipeline=True)
+
+        phases = {span.phase: span for span in spans if span.dataset == 'higgs'}
+        download, decompress, parse = phases['download'], phases['decompress'], phases['parse']
+        self.assertTrue(download.extra['pipelined'])
+
+        # Parsing starts long before the download ends
+        self.assertLess(parse.start, download.start + download.duration / 2)
+        self.assertLess(decompress.start, download.start + download.duration / 2)
+        self.assertLess(parse.duration, download.duration + decompress.duration)
+
+    def test_buffered_bytes_are_bounded(self):
+
+        with LoadDataset.open_pipeline(self.url, member='HIGGS.csv.gz', buffers=2, block_size=4096) as the_file:
+            # A slow consumer makes the stages wait for it
+            first = the_file.read(10)
+            time.sleep(0.3)
+            rest = the_file.read()
+
+        self.assertEqual(first + rest, self.payload)
+        compressed, decompressed = the_file.channels
+        self.assertLessEqual(decompressed.peak, 3 * 4096)
+        self.assertLessEqual(compressed.peak, 3 * 64 * 1024)
+
+    def test_early_exit_stops_the_stages(self):
+
+        def stages():
+            return [thread for thread in threading.enumerate() if thread.name == 'LoadDataset-pipeline']
+
+        with LoadDataset.open_pipeline(self.url, member='HIGGS.csv.gz', buffers=1, block_size=1024) as the_file:
+            the_file.read(100)
+
+        self.assertEqual(stages(), [])
+
+        batches = LoadDataset.load_higgs(chunksize=100, pipeline=True)
+        next(batches)
+        batches.close()
+        self.assertEqual(stages(), [])
+
+    def test_errors_reach_the_parser(self):
+
+        # A connection dropped by the network thread is raised by read_csv
+        self.server.drop(2000)
+        with self.assertRaisesRegex(ProtocolError, 'IncompleteRead'):
+            LoadDataset.load_higgs(pipeline=True)
+
+        url = self.server.url('/missing.zip')
+        with self.assertRaisesRegex(ValueError, 'Status code: 404'):
+            with LoadDataset.open_pipeline(url, member='HIGGS.csv.gz') as the_file:
+                the_file.read()
+
+
+if __name__ == '__main__':
+    unittest.main()
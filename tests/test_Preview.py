@@ -0,0 +1,114 @@
+import io
+import gzip
+import time
+import zipfile
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import context as LoadDataset
+import synthetic
+from localserver import LocalServer, serve_dataset
+from LoadDataset.stream import zip_member_stream
+
+
+class TestPreview(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Large enough that the whole archive does not fit in the socket buffers. The
+        # repeated block is longer than the gzip window, so it does not compress away
+        cls.payload = synthetic.numeric_csv(1000, 28) * 40
+        cls.archive = synthetic.zipped_gzip('HIGGS.csv.gz', cls.payload, compresslevel=1)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _wait_for_response(self, server):
+        # The server only notices the closed connection on its next write
+        deadline = time.time() + 10
+        while not server.sent and time.time() < deadline:
+            time.sleep(0.05)
+
+    def test_higgs_preview_stops_the_download(self):
+
+        with LocalServer() as server:
+            url = server.add('/higgs.zip', self.archive)
+            with mock.patch('LoadDataset.LoadDataset.HIGGS_URL', url):
+                data, target = LoadDataset.preview('higgs', nrows=100)
+            self._wait_for_response(server)
+
+        full = pd.read_csv(io.BytesIO(self.payload), header=None, nrows=100)
+        self.assertEqual(data.shape, (100, 28))
+        pd.testing.assert_series_equal(target, full[0].rename('target'))
+        self.assertEqual(server.requests, ['/higgs.zip'])
+        self.assertLess(server.sent[0], len(self.archive) // 2)
+
+    def test_kdd99_nrows(self):
+
+        serve_dataset(self, 'kdd99', 500)
+        data, target = LoadDataset.load_kdd99(nrows=50, engine='pyarrow')
+        batches = list(LoadDataset.load_kdd99(nrows=50, chunksize=20))
+
+        self.assertEqual(data.shape, (50, 41))
+        self.assertEqual([len(d) for d, t in batches], [20, 20, 10])
+        pd.testing.assert_frame_equal(pd.concat([d for d, t in batches]), data)
+
+    def test_nrows_from_load_path(self):
+
+        serve_dataset(self, 'higgs', 300)
+        data, target = LoadDataset.load_higgs(save_path=self.tmp.name, cache_format='parquet')
+
+        head, head_target = LoadDataset.load_higgs(load_path=self.tmp.name, nrows=120, cache_format='parquet')
+        batches = list(LoadDataset.load_higgs(load_path=self.tmp.name, nrows=120, chunksize=50, cache_format='parquet'))
+
+        self.assertEqual(head.shape, (120, 28))
+        self.assertTrue((head.to_numpy() == data.iloc[:120].to_numpy()).all())
+        self.assertEqual([len(d) for d, t in batches], [50, 50, 20])
+
+    def test_zero_rows(self):
+
+        serve_dataset(self, 'susy', 200)
+        with mock.patch('LoadDataset.store._cache_dir', self.tmp.name), mock.patch('LoadDataset.store._cache_enabled', True):
+            data, target = LoadDataset.load_susy(nrows=0)
+            batches = list(LoadDataset.load_susy(nrows=0, chunksize=50))
+            # No rows is still only part of the dataset, it is not cached
+            self.assertIsNone(LoadDataset.read_manifest('susy'))
+
+        self.assertEqual(data.shape, (0, 18))
+        self.assertEqual(len(target), 0)
+        self.assertEqual(batches, [])
+
+        LoadDataset.load_susy(save_path=self.tmp.name, cache_format='npy', cache=False)
+        head, head_target = LoadDataset.load_susy(load_path=self.tmp.name, nrows=0, cache_format='npy')
+        self.assertEqual(head.shape, (0, 18))
+        self.assertEqual(list(head.columns), list(data.columns))
+
+    def test_nrows_is_not_saved(self):
+
+        with self.assertRaises(ValueError):
+            LoadDataset.load_susy(nrows=10, save_path=self.tmp.name)
+        with self.assertRaises(ValueError):
+            LoadDataset.preview('iris')
+
+    def test_zip_member_after_another_member(self):
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as the_zip:
+            the_zip.writestr('README.txt', b'readme' * 1000)
+            the_zip.writestr('SUSY.csv.gz', gzip.compress(b'1,2,3\n'))
+        buffer.seek(0)
+
+        with gzip.GzipFile(fileobj=zip_member_stream(buffer, 'SUSY.csv.gz')) as the_file:
+            self.assertEqual(the_file.read(), b'1,2,3\n')
+
+        buffer.seek(0)
+        with self.assertRaises(ValueError):
+            zip_member_stream(buffer, 'HIGGS.csv.gz')
+
+
+if __name__ == '__main__':
+    unittest.main()
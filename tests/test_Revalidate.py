@@ -0,0 +1,131 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+import context as LoadDataset
+import synthetic
+from localserver import LocalServer, serve_dataset
+from LoadDataset import download
+
+
+class TestRevalidate(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dest = os.path.join(self.tmp.name, 'archive.zip')
+
+        self.server = LocalServer()
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__, None, None, None)
+        self.url = self.server.add('/archive.zip', b'first version', modified=1000000000)
+
+    def test_validators_are_kept(self):
+
+        # The validators come from the response of the body, not from another request
+        with mock.patch('LoadDataset.download.requests.head') as head:
+            self.assertTrue(LoadDataset.fetch_archive(self.url, self.dest))
+        head.assert_not_called()
+
+        meta = LoadDataset.read_archive_meta(self.dest, self.url)
+        self.assertEqual(meta['last_modified'], 'Sun, 09 Sep 2001 01:46:40 GMT')
+        self.assertTrue(meta['etag'])
+        self.assertEqual(LoadDataset.read_archive_meta(self.dest, 'http://other/archive.zip'), {})
+
+    def test_no_request_within_the_ttl(self):
+
+        LoadDataset.fetch_archive(self.url, self.dest)
+        self.assertFalse(LoadDataset.fetch_archive(self.url, self.dest))
+        self.assertEqual(self.server.requests, ['/archive.zip'])
+
+    def test_not_modified_keeps_the_copy(self):
+
+        LoadDataset.fetch_archive(self.url, self.dest)
+        checked = LoadDataset.read_archive_meta(self.dest, self.url)['checked']
+        time.sleep(0.01)
+
+        self.assertFalse(LoadDataset.fetch_archive(self.url, self.dest, ttl=0))
+        self.assertEqual(self.server.requests, ['/archive.zip', '/archive.zip'])
+        self.assertEqual(self.server.headers[1]['If-None-Match'], LoadDataset.read_archive_meta(self.dest, self.url)['etag'])
+        self.assertEqual(self.server.sent[1:], [])
+        self.assertGreater(LoadDataset.read_archive_meta(self.dest, self.url)['checked'], checked)
+
+    def test_changed_archive_is_downloaded_again(self):
+
+        LoadDataset.fetch_archive(self.url, self.dest)
+        etag = LoadDataset.read_archive_meta(self.dest, self.url)['etag']
+        self.server.add('/archive.zip', b'second version')
+
+        with self.assertLogs('LoadDataset', 'INFO') as logs:
+            self.assertTrue(LoadDataset.fetch_archive(self.url, self.dest, ttl=0))
+        self.assertIn('changed upstream', logs.output[0])
+
+        # The new version is read from the body of the conditional request
+        self.assertEqual(self.server.requests, ['/archive.zip', '/archive.zip'])
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), b'second version')
+        self.assertNotEqual(LoadDataset.read_archive_meta(self.dest, self.url)['etag'], etag)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['archive.zip', 'archive.zip.json'])
+
+    def test_copy_without_validators_uses_its_modification_time(self):
+
+        with open(self.dest, 'wb') as f:
+            f.write(b'first version')
+
+        self.assertFalse(LoadDataset.fetch_archive(self.url, self.dest))
+        self.assertNotIn('If-None-Match', self.server.headers[0])
+        self.assertIn('If-Modified-Since', self.server.headers[0])
+        self.assertTrue(LoadDataset.read_archive_meta(self.dest, self.url)['etag'])
+
+    def test_unreachable_server_keeps_the_copy(self):
+
+        LoadDataset.fetch_archive(self.url, self.dest)
+        with mock.patch('LoadDataset.download.requests.get', side_effect=download.requests.exceptions.ConnectionError), \
+                self.assertLogs('LoadDataset', 'WARNING'):
+            self.assertFalse(LoadDataset.fetch_archive(self.url, self.dest, ttl=0))
+
+        self.server.httpd.files.pop('/archive.zip')
+        self.assertFalse(LoadDataset.fetch_archive(self.url, self.dest, ttl=0))
+        with open(self.dest, 'rb') as f:
+            self.assertEqual(f.read(), b'first version')
+
+    def test_ttl_setting(self):
+
+        LoadDataset.fetch_archive(self.url, self.dest)
+        self.addCleanup(LoadDataset.set_revalidate_ttl, download._revalidate_ttl)
+        LoadDataset.set_revalidate_ttl(0)
+
+        LoadDataset.fetch_archive(self.url, self.dest)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_upstream_change_rebuilds_the_cache(self):
+
+        archive_dir = os.path.join(self.tmp.name, 'archives')
+        _, url = serve_dataset(self, 'higgs', 100, self.server)
+        with mock.patch('LoadDataset.store._cache_dir', os.path.join(self.tmp.name, 'cache')), \
+                mock.patch('LoadDataset.store._cache_enabled', True), \
+                mock.patch('LoadDataset.download._revalidate_ttl', 0):
+            LoadDataset.load_higgs(download_path=archive_dir)
+
+            # Not modified: the cached copy is used
+            data, target = LoadDataset.load_higgs(download_path=archive_dir)
+            self.assertEqual(data.shape, (100, 28))
+            self.assertEqual(self.server.requests, ['/higgs.zip', '/higgs.zip'])
+            self.assertEqual(len(self.server.sent), 1)
+
+            self.server.add('/higgs.zip', synthetic.zipped_gzip('HIGGS.csv.gz', synthetic.numeric_csv(120, 28)))
+            data, target = LoadDataset.load_higgs(download_path=archive_dir)
+            self.assertEqual(data.shape, (120, 28))
+
+            manifest = LoadDataset.read_manifest('higgs')
+            self.assertEqual(manifest['source'], url + '#' + LoadDataset.read_archive_meta(os.path.join(archive_dir, 'higgs.zip'), url)['etag'])
+
+            data, target = LoadDataset.load_higgs(download_path=archive_dir)
+            self.assertEqual(data.shape, (120, 28))
+            self.assertEqual(len(self.server.requests), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
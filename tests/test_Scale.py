@@ -0,0 +1,124 @@
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+from localserver import serve_dataset
+from test_Uci import fake_adult
+
+
+class TestScale(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.server, self.url = serve_dataset(self, 'higgs', 500)
+
+        self.data, self.target = LoadDataset.load_higgs()
+
+    def test_standard_and_minmax(self):
+
+        expected = {
+            'standard': (self.data - self.data.mean()) / self.data.std(),
+            'minmax': (self.data - self.data.min()) / (self.data.max() - self.data.min()),
+        }
+        for scale in ['standard', 'minmax']:
+            with self.subTest(scale=scale):
+                data, target = LoadDataset.load_higgs(scale=scale)
+                np.testing.assert_allclose(data.to_numpy(), expected[scale].to_numpy(), atol=1e-12)
+                np.testing.assert_array_equal(target.to_numpy(), self.target.to_numpy())
+
+                # The parameters transform other data the same way
+                params = data.attrs['scale']
+                self.assertEqual(params['method'], scale)
+                self.assertEqual(params['columns'], [str(col) for col in self.data.columns])
+                np.testing.assert_allclose(LoadDataset.apply_scale(self.data, params).to_numpy(), data.to_numpy())
+
+        float32, _ = LoadDataset.load_higgs(scale='standard', dtype_policy='float32')
+        self.assertTrue((float32.dtypes == np.float32).all())
+        np.testing.assert_allclose(float32.to_numpy(), expected['standard'].to_numpy(), atol=1e-5)
+
+    def test_warm_load_uses_the_saved_statistics(self):
+
+        scaled, _ = LoadDataset.load_higgs(scale='standard')
+        for cache_format in ['csv', 'parquet', 'npy']:
+            with self.subTest(cache_format=cache_format):
+                save_path = f"{self.tmp.name}/{cache_format}"
+                cold, _ = LoadDataset.load_higgs(save_path=save_path, cache_format=cache_format, scale='standard')
+
+                with mock.patch('LoadDataset.scaling.frame_stats') as frame_stats:
+                    warm, target = LoadDataset.load_higgs(load_path=save_path, cache_format=cache_format, scale='standard')
+                    head, _ = LoadDataset.load_higgs(load_path=save_path, cache_format=cache_format, scale='standard', nrows=50)
+                frame_stats.assert_not_called()
+
+                np.testing.assert_allclose(cold.to_numpy(), scaled.to_numpy())
+                np.testing.assert_allclose(warm.to_numpy(), scaled.to_numpy())
+                np.testing.assert_allclose(head.to_numpy(), scaled.iloc[:50].to_numpy())
+                self.assertEqual(warm.attrs['scale'], scaled.attrs['scale'])
+
+                # The cache keeps the raw values
+                raw, _ = LoadDataset.load_higgs(load_path=save_path, cache_format=cache_format)
+                np.testing.assert_allclose(raw.to_numpy(), self.data.to_numpy())
+                self.assertNotIn('scale', raw.attrs)
+
+    def test_encoded_columns_are_not_scaled(self):
+
+        serve_dataset(self, 'kdd99', 300, self.server)
+        data, _ = LoadDataset.load_kdd99()
+        scaled, _ = LoadDataset.load_kdd99(scale='minmax')
+
+        for col in data.columns:
+            if str(col) in data.attrs['categories']:
+                self.assertTrue(scaled[col].equals(data[col]))
+            else:
+                self.assertAlmostEqual(scaled[col].min(), 0 if data[col].nunique() > 1 else data[col].min())
+                self.assertLessEqual(scaled[col].max(), 1)
+
+        with mock.patch('LoadDataset.uci._fetch_function', fake_adult), \
+                mock.patch('LoadDataset.store._cache_dir', self.tmp.name + '/cache'), \
+                mock.patch('LoadDataset.store._cache_enabled', True):
+            cold, _ = LoadDataset.load_adult(scale='standard')
+            LoadDataset.clear_memory_cache()
+            warm, _ = LoadDataset.load_adult(scale='standard')
+            raw, _ = LoadDataset.load_adult()
+
+        self.assertEqual(cold.attrs['scale']['columns'], ['age', 'hours-per-week'])
+        self.assertTrue(cold['workclass'].equals(raw['workclass']))
+        np.testing.assert_allclose(cold['age'], (raw['age'] - raw['age'].mean()) / raw['age'].std())
+        np.testing.assert_allclose(warm.to_numpy(dtype=float), cold.to_numpy(dtype=float))
+
+    def test_invalid_options(self):
+
+        with self.assertRaisesRegex(ValueError, 'Unknown scaling'):
+            LoadDataset.load_higgs(scale='robust')
+
+        with self.assertRaisesRegex(ValueError, 'apply_scale'):
+            LoadDataset.load_higgs(scale='standard', chunksize=100)
+
+    def test_features_are_scaled_in_place(self):
+
+        df = pd.DataFrame(np.random.default_rng(0).normal(size=(200000, 10)))
+        df.insert(0, 'target', 0.0)
+        stats = LoadDataset.frame_stats(df)
+        addresses = [df.iloc[:, i].to_numpy().ctypes.data for i in range(df.shape[1])]
+
+        tracemalloc.start()
+        params = LoadDataset.scale_features(df, 'standard', stats)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # One column at a time is allocated, never a copy of the dataset
+        self.assertLess(peak, df.memory_usage().sum() / 4)
+        self.assertEqual([df.iloc[:, i].to_numpy().ctypes.data for i in range(df.shape[1])], addresses)
+        self.assertEqual(len(params['columns']), 10)
+        np.testing.assert_allclose(df.iloc[:, 1:].mean(), 0, atol=1e-12)
+        np.testing.assert_allclose(df.iloc[:, 1:].std(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+from LoadDataset.cache import cache_file, read_schema, schema_file
+
+
+class TestSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.df = pd.DataFrame({
+            'target': np.array([0, 1, 2, 1], dtype='uint8'),
+            'codes': np.array([3, 0, 200, 7], dtype='uint8'),
+            'count': np.array([10, -4, 8, 0], dtype='int32'),
+            'rate': np.array([0.5, 1.0, 2.0, 3.0], dtype='float32'),
+            'whole': np.array([1.0, 2.0, 3.0, 4.0]),
+        })
+
+    def test_csv_keeps_the_saved_types(self):
+
+        file = LoadDataset.write_frame(self.df, self.tmp.name, 'iris', 'csv')
+        schema = read_schema(file)
+
+        self.assertEqual(schema['dataset'], 'iris')
+        self.assertEqual(schema['rows'], 4)
+        self.assertEqual(schema['columns'], ['target', 'codes', 'count', 'rate', 'whole'])
+
+        data, target = LoadDataset.read_dataset(self.tmp.name, 'iris', 'csv')
+        self.assertEqual(target.dtype, np.uint8)
+        self.assertEqual(list(data.dtypes.astype(str)), ['uint8', 'int32', 'float32', 'float64'])
+        pd.testing.assert_frame_equal(data, self.df.iloc[:, 1:])
+
+        batches = list(LoadDataset.iter_frames(self.tmp.name, 'iris', 3, 'csv'))
+        self.assertEqual(list(batches[1].dtypes.astype(str)), ['uint8', 'uint8', 'int32', 'float32', 'float64'])
+
+    def test_file_of_another_dataset_is_refused(self):
+
+        for cache_format in ['csv', 'npy']:
+            with self.subTest(cache_format=cache_format):
+                path = os.path.join(self.tmp.name, cache_format)
+                file = LoadDataset.write_frame(self.df, path, 'iris', cache_format)
+                copy = cache_file(path, 'spambase', cache_format)
+                (shutil.copytree if cache_format == 'npy' else shutil.copy)(file, copy)
+                shutil.copy(schema_file(file), schema_file(copy))
+
+                with self.assertRaisesRegex(ValueError, 'holds the iris dataset'):
+                    LoadDataset.read_dataset(path, 'spambase', cache_format)
+
+    def test_truncated_cache_is_detected(self):
+
+        file = LoadDataset.write_frame(self.df, self.tmp.name, 'adult', 'csv')
+        with open(file) as f:
+            lines = f.readlines()
+        with open(file, 'w') as f:
+            f.writelines(lines[:-1])
+
+        with self.assertRaisesRegex(ValueError, 'incomplete'):
+            LoadDataset.read_dataset(self.tmp.name, 'adult', 'csv')
+
+    def test_batches_and_migration(self):
+
+        writer = LoadDataset.CacheWriter(self.tmp.name, 'kdd99', 'csv')
+        writer.write(self.df.iloc[:3])
+        writer.write(self.df.iloc[3:])
+        writer.close()
+        self.assertEqual(read_schema(writer.file)['rows'], 4)
+
+        written = LoadDataset.migrate_cache(self.tmp.name, 'parquet', remove=True)
+        self.assertEqual(read_schema(written[0])['dtypes'], ['uint8', 'uint8', 'int32', 'float32', 'float64'])
+        self.assertFalse(os.path.exists(schema_file(writer.file)))
+
+    def test_cache_without_schema(self):
+
+        file = LoadDataset.write_frame(self.df, self.tmp.name, 'iris', 'csv')
+        os.remove(schema_file(file))
+
+        data, target = LoadDataset.read_dataset(self.tmp.name, 'iris', 'csv')
+        self.assertEqual(data['codes'].dtype, np.int64)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import threading
+import tracemalloc
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+from localserver import serve_dataset
+
+
+class TestShards(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        self.server, _ = serve_dataset(self, 'higgs', 1000)
+
+        self.data, self.target = LoadDataset.load_higgs()
+
+    def test_random_access(self):
+
+        load_path = self.tmp.name + '/higgs'
+        shards = LoadDataset.open_shards('higgs', shard_rows=128, load_path=load_path, cache_format='parquet')
+
+        self.assertEqual(len(shards), 1000)
+        self.assertEqual(shards.n_shards, 8)
+        self.assertEqual(LoadDataset.read_shard_index(load_path, 'higgs')['offsets'], list(range(0, 1000, 128)) + [1000])
+
+        rows = [999, 0, 128, 127, 500, 500]
+        data, target = shards.take(rows)
+        self.assertEqual(data.index.tolist(), rows)
+        np.testing.assert_array_equal(data.to_numpy(), self.data.iloc[rows].to_numpy())
+        np.testing.assert_array_equal(target.to_numpy(), self.target.iloc[rows].to_numpy())
+        with self.assertRaises(IndexError):
+            shards.take([1000])
+
+        # Opening again reuses the shards, another shard size writes them again
+        with mock.patch('LoadDataset.LoadDataset.write_shards') as write_shards:
+            LoadDataset.open_shards('higgs', shard_rows=128, load_path=load_path)
+        write_shards.assert_not_called()
+        self.assertEqual(LoadDataset.open_shards('higgs', shard_rows=300, load_path=load_path).n_shards, 4)
+
+        with self.assertRaisesRegex(ValueError, 'load_path or the local dataset cache'):
+            LoadDataset.open_shards('higgs')
+
+    def test_sampler_epochs(self):
+
+        with mock.patch('LoadDataset.store._cache_dir', self.tmp.name + '/cache'), \
+                mock.patch('LoadDataset.store._cache_enabled', True):
+            sampler = LoadDataset.minibatch_sampler('higgs', batch_size=64, seed=1, shard_rows=100, buffer_shards=3, cache_format='parquet')
+            self.assertTrue(os.path.isdir(LoadDataset.shard_dir(LoadDataset.cached_entry('higgs'), 'higgs')))
+
+        epochs = []
+        for _ in range(2):
+            batches = list(sampler)
+            self.assertEqual(len(batches), len(sampler))
+            self.assertEqual([len(data) for data, _ in batches], [64] * 15 + [40])
+
+            # Every row once per epoch, with its own target
+            rows = np.concatenate([data.index.to_numpy() for data, _ in batches])
+            np.testing.assert_array_equal(np.sort(rows), np.arange(1000))
+            for data, target in batches:
+                np.testing.assert_array_equal(data.to_numpy(), self.data.loc[data.index].to_numpy())
+                np.testing.assert_array_equal(target.to_numpy(), self.target.loc[data.index].to_numpy())
+            epochs.append(rows)
+
+        # Minibatches mix shards, epochs are shuffled differently, and a seed reproduces them
+        self.assertGreater(len(np.unique(epochs[0][:64] // 100)), 1)
+        self.assertFalse(np.array_equal(epochs[0], epochs[1]))
+        again = LoadDataset.MinibatchSampler(sampler.dataset, batch_size=64, seed=1, buffer_shards=3)
+        np.testing.assert_array_equal(np.concatenate([data.index.to_numpy() for data, _ in again]), epochs[0])
+
+        dropped = LoadDataset.MinibatchSampler(sampler.dataset, batch_size=64, drop_last=True)
+        self.assertEqual(len(dropped), 15)
+        self.assertEqual(sum(len(data) for data, _ in dropped), 960)
+
+    def test_kdd99_types(self):
+
+        serve_dataset(self, 'kdd99', 300, self.server)
+        data, target = LoadDataset.load_kdd99()
+        shards = LoadDataset.open_shards('kdd99', shard_rows=64, load_path=self.tmp.name + '/kdd99', cache_format='npy')
+
+        batch, batch_target = shards.take(range(300))
+        self.assertTrue(batch.dtypes.equals(data.dtypes.set_axis(batch.columns)))
+        np.testing.assert_array_equal(batch.to_numpy(), data.to_numpy())
+        np.testing.assert_array_equal(batch_target.to_numpy(), target.to_numpy())
+        self.assertEqual(batch.attrs['categories'], data.attrs['categories'])
+
+    def test_memory_is_bounded(self):
+
+        df = pd.DataFrame(np.random.default_rng(0).normal(size=(200000, 10)))
+        df.insert(0, 'target', np.arange(len(df)) % 2)
+        writer = LoadDataset.ShardWriter(self.tmp.name, 'big', shard_rows=5000)
+        for start in range(0, len(df), 30000):
+            writer.write(df.iloc[start:start + 30000])
+        writer.close()
+        shards = LoadDataset.ShardedDataset(self.tmp.name, 'big')
+        size = df.memory_usage().sum()
+        del df
+
+        sampler = LoadDataset.MinibatchSampler(shards, batch_size=256, buffer_shards=2, prefetch=2)
+        tracemalloc.start()
+        rows = sum(len(data) for data, _ in sampler)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.assertEqual(rows, 200000)
+        self.assertLess(peak, size / 10)
+
+    def test_early_exit_stops_the_thread(self):
+
+        shards = LoadDataset.open_shards('higgs', shard_rows=100, load_path=self.tmp.name + '/higgs')
+        for _ in LoadDataset.MinibatchSampler(shards, batch_size=10, prefetch=1):
+            break
+
+        self.assertEqual([thread for thread in threading.enumerate() if thread.name == 'LoadDataset-sampler'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
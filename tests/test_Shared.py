@@ -0,0 +1,112 @@
+import os
+import tempfile
+import unittest
+import multiprocessing
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+from localserver import serve_dataset
+
+
+def anonymous_bytes():
+    """Memory of this process not backed by a file, where a private copy of the dataset would live."""
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Anonymous:'):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+def attach_and_sum(entry, barrier):
+    before = anonymous_bytes()
+    data, target = LoadDataset.attach(entry)
+    total = float(data.to_numpy().sum()) + float(target.sum())
+    grown = anonymous_bytes() - before
+    # Hold the reference until every worker has attached
+    barrier.wait()
+    return os.getpid(), total, grown
+
+
+class TestShared(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        patcher = mock.patch('LoadDataset.shared._shared_dir', self.tmp.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(LoadDataset.release)
+
+    def test_second_load_attaches_the_published_copy(self):
+
+        server, _ = serve_dataset(self, 'higgs', 150)
+        with mock.patch('LoadDataset.shared._shared_enabled', True):
+            data, target = LoadDataset.load_higgs()
+            again, again_target = LoadDataset.load_higgs()
+            group, _ = LoadDataset.load_higgs(columns='high_level')
+
+        self.assertEqual(server.requests, ['/higgs.zip', '/higgs.zip'])
+        self.assertEqual(again.shape, (150, 28))
+        self.assertTrue(np.array_equal(again.to_numpy(), data.to_numpy()))
+        self.assertFalse(again.to_numpy().flags.writeable)
+        self.assertEqual(group.shape, (150, 7))
+
+        entries = [entry for entry in os.listdir(self.tmp.name) if os.path.isdir(os.path.join(self.tmp.name, entry))]
+        self.assertEqual(len(entries), 2)
+        # The lock files are removed once the entries are published
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), sorted(entries))
+        entry = os.path.join(self.tmp.name, sorted(entries)[0])
+        self.assertEqual(LoadDataset.references(entry), [os.getpid()])
+
+        self.assertEqual(sorted(LoadDataset.release()), sorted(os.path.join(self.tmp.name, e) for e in entries))
+        self.assertFalse(os.path.exists(entry))
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+        # Frames stay usable after the entry is removed
+        self.assertEqual(float(again.to_numpy().sum()), float(data.to_numpy().sum()))
+
+    @unittest.skipUnless(os.path.exists('/proc/self/smaps_rollup'), "needs /proc/self/smaps_rollup")
+    def test_workers_share_one_copy(self):
+
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(rng.normal(size=(200000, 25)))
+        size = df.memory_usage(index=False).sum()
+        entry = LoadDataset.publish_frame(LoadDataset.entry_path('frame'), df)
+
+        workers = 3
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager:
+            barrier = manager.Barrier(workers)
+            with context.Pool(workers) as pool:
+                results = pool.starmap(attach_and_sum, [(entry, barrier)] * workers)
+
+        # Each worker reads the whole dataset without a private copy of it
+        self.assertEqual(len({pid for pid, _, _ in results}), workers)
+        for _, total, grown in results:
+            self.assertAlmostEqual(total, float(df.to_numpy().sum()), places=3)
+            self.assertLess(grown, size / 4)
+
+        # Workers that are gone do not keep the entry alive
+        self.assertEqual(LoadDataset.references(entry), [os.getpid()])
+        self.assertEqual(LoadDataset.release(entry), [entry])
+        self.assertEqual(LoadDataset.collect_shared(), [])
+
+    def test_dead_references_are_collected(self):
+
+        entry = LoadDataset.publish_frame(LoadDataset.entry_path('frame'), pd.DataFrame({'target': [0, 1], 'a': [1.0, 2.0]}))
+
+        process = multiprocessing.get_context('spawn').Process(target=os.getpid)
+        process.start()
+        process.join()
+        os.rename(os.path.join(entry, 'refs', str(os.getpid())), os.path.join(entry, 'refs', str(process.pid)))
+
+        self.assertEqual(LoadDataset.references(entry), [])
+        self.assertEqual(LoadDataset.collect_shared(), [entry])
+
+
+if __name__ == '__main__':
+    unittest.main()
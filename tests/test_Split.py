@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+from localserver import serve_dataset
+
+
+class TestSplit(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        serve_dataset(self, 'higgs', 1000)
+
+        patcher = mock.patch('LoadDataset.splits.OFFICIAL_TEST_ROWS', {'higgs': 300, 'susy': 300})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.data, self.target = LoadDataset.load_higgs()
+
+    def test_stratified_split(self):
+
+        parts = LoadDataset.load_higgs(split=(0.7, 0.2, 0.1), seed=3)
+        self.assertEqual(list(parts), ['train', 'validation', 'test'])
+        self.assertEqual([len(target) for _, target in parts.values()], [700, 200, 100])
+
+        # Every row is in exactly one part, and every part has the class balance of the dataset
+        rows = np.sort(np.concatenate([data.index.to_numpy() for data, _ in parts.values()]))
+        np.testing.assert_array_equal(rows, np.arange(1000))
+        share = self.target.mean()
+        for data, target in parts.values():
+            self.assertAlmostEqual(target.mean(), share, delta=0.01)
+            np.testing.assert_array_equal(data.to_numpy(), self.data.loc[data.index].to_numpy())
+
+        # The same seed gives the same split, another seed another one
+        again = LoadDataset.load_higgs(split={'train': 0.7, 'validation': 0.2, 'test': 0.1}, seed=3)
+        other = LoadDataset.load_higgs(split=(0.7, 0.2, 0.1), seed=4)
+        self.assertTrue(again['test'][1].index.equals(parts['test'][1].index))
+        self.assertFalse(other['test'][1].index.equals(parts['test'][1].index))
+
+    def test_official_split_is_a_view(self):
+
+        parts = LoadDataset.load_higgs(split='official')
+        train, test = parts['train'][0], parts['test'][0]
+
+        self.assertEqual((len(train), len(test)), (700, 300))
+        self.assertTrue(test.equals(self.data.iloc[700:]))
+        # Both parts are slices of the memory of the loaded frame
+        for col in train.columns:
+            self.assertEqual(test[col].to_numpy().ctypes.data - train[col].to_numpy().ctypes.data, 700 * 8)
+
+        with self.assertRaisesRegex(ValueError, 'no official split'):
+            LoadDataset.load_kdd99(split='official')
+        with self.assertRaisesRegex(ValueError, 'whole dataset'):
+            LoadDataset.load_higgs(split='official', nrows=500)
+
+    def test_indices_are_saved_beside_the_dataset(self):
+
+        save_path = self.tmp.name + '/saved'
+        parts = LoadDataset.load_higgs(save_path=save_path, split=(0.8, 0.2))
+        files = [name for name in os.listdir(save_path) if name.endswith('.npz')]
+        self.assertEqual(len(files), 1)
+
+        # A later call reads them instead of splitting again
+        with mock.patch('LoadDataset.splits.split_indices') as split_indices:
+            warm = LoadDataset.load_higgs(load_path=save_path, split=(0.8, 0.2))
+        split_indices.assert_not_called()
+        for part in parts:
+            self.assertTrue(warm[part][1].index.equals(parts[part][1].index))
+
+        with mock.patch('LoadDataset.store._cache_dir', self.tmp.name + '/cache'), \
+                mock.patch('LoadDataset.store._cache_enabled', True):
+            LoadDataset.load_higgs(split='official')
+            cached = LoadDataset.load_higgs(split=(0.8, 0.2))
+            entry = LoadDataset.cached_entry('higgs')
+        self.assertEqual(len([name for name in os.listdir(entry) if name.endswith('.npz')]), 2)
+        self.assertTrue(cached['test'][1].index.equals(parts['test'][1].index))
+
+    def test_compact_encoding(self):
+
+        rows = 100000
+        target = pd.Series(np.arange(rows) % 2)
+        file = os.path.join(self.tmp.name, 'split.npz')
+        for split in [(0.5, 0.5), (0.99, 0.01)]:
+            with self.subTest(split=split):
+                parts = LoadDataset.split_indices(target, split, seed=1)
+                self.assertEqual(parts['train'].dtype, np.int32)
+                LoadDataset.write_split(file, parts, rows)
+
+                # Large parts are kept as bitmaps, small ones as int32 indices
+                self.assertLess(os.path.getsize(file), 2 * rows / 8 + 2048)
+                read = LoadDataset.read_split(file, rows)
+                for part, indices in parts.items():
+                    np.testing.assert_array_equal(read[part], indices)
+
+        self.assertIsNone(LoadDataset.read_split(file, rows + 1))
+        self.assertIsNone(LoadDataset.read_split(file + '.missing', rows))
+
+    def test_invalid_options(self):
+
+        for split in [(0.5, 0.6), (0.5, 0.25, 0.125, 0.125), 'random', {'train': 0}]:
+            with self.subTest(split=split), self.assertRaises(ValueError):
+                LoadDataset.load_higgs(split=split)
+
+        with self.assertRaisesRegex(ValueError, 'chunksize'):
+            LoadDataset.load_higgs(split=(0.8, 0.2), chunksize=100)
+
+
+if __name__ == '__main__':
+    unittest.main()
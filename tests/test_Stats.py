@@ -0,0 +1,97 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+from localserver import serve_dataset
+from LoadDataset.stats import MAX_TARGET_CLASSES
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def assertMatchesData(self, stats, data, target):
+        self.assertEqual(stats['rows'], len(data))
+        self.assertEqual(list(stats['columns']), [str(col) for col in data.columns])
+        for col in data.columns:
+            column = stats['columns'][str(col)]
+            self.assertEqual(column['count'], data[col].count())
+            self.assertAlmostEqual(column['min'], data[col].min())
+            self.assertAlmostEqual(column['max'], data[col].max())
+            self.assertAlmostEqual(column['mean'], data[col].mean(), places=6)
+            self.assertAlmostEqual(column['std'], data[col].std(), places=6)
+
+        counts = target.value_counts().sort_index()
+        self.assertEqual(stats['target']['classes'], counts.index.tolist())
+        self.assertEqual(stats['target']['counts'], counts.tolist())
+
+    def test_frame_stats(self):
+
+        df = pd.DataFrame({
+            'target': np.array([1, 0, 1, 2, 1], dtype='uint8'),
+            'rate': np.array([0.5, np.nan, 2.0, 3.5, 1.0], dtype='float32'),
+            'count': [3, 1, 4, 1, 5],
+            'name': ['a', 'b', 'a', 'c', 'b'],
+        })
+        stats = LoadDataset.frame_stats(df)
+
+        self.assertEqual(stats['columns']['rate']['count'], 4)
+        self.assertIsNone(stats['columns'].pop('name'))
+        self.assertEqual(stats['target'], {'column': 'target', 'classes': [0, 1, 2], 'counts': [1, 3, 1]})
+        self.assertMatchesData(stats, df[['rate', 'count']], df['target'])
+
+    def test_batches_give_the_same_statistics(self):
+
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(rng.normal(loc=1e6, size=(1000, 4)))
+        df.insert(0, 'target', rng.integers(0, 3, size=1000))
+
+        accumulator = LoadDataset.StatsAccumulator()
+        for start in range(0, 1000, 77):
+            accumulator.update(df.iloc[start:start + 77])
+        whole = LoadDataset.frame_stats(df)
+        batched = accumulator.result()
+
+        self.assertEqual(batched['target'], whole['target'])
+        for col, column in whole['columns'].items():
+            for key, value in column.items():
+                self.assertAlmostEqual(batched['columns'][col][key], value, delta=abs(value) * 1e-9)
+
+    def test_continuous_target_has_no_classes(self):
+
+        df = pd.DataFrame({'target': np.arange(MAX_TARGET_CLASSES + 1) / 7, 'a': 1.0})
+        self.assertIsNone(LoadDataset.frame_stats(df)['target']['classes'])
+
+    def test_describe_a_saved_and_a_cached_dataset(self):
+
+        serve_dataset(self, 'higgs', 240)
+        with mock.patch('LoadDataset.store._cache_dir', self.tmp.name + '/cache'), \
+                mock.patch('LoadDataset.store._cache_enabled', True):
+            self.assertIsNone(LoadDataset.describe('higgs'))
+
+            data, target = LoadDataset.load_higgs(save_path=self.tmp.name + '/saved', cache_format='parquet')
+            self.assertMatchesData(LoadDataset.describe('higgs', load_path=self.tmp.name + '/saved'), data, target)
+            self.assertMatchesData(LoadDataset.describe('higgs'), data, target)
+
+            # Batches are described as they are written
+            batches = list(LoadDataset.load_higgs(chunksize=70, save_path=self.tmp.name + '/batches', cache_format='npy'))
+            self.assertMatchesData(LoadDataset.describe('higgs', load_path=self.tmp.name + '/batches'), data, target)
+
+            # A warm load does not compute them again
+            with mock.patch('LoadDataset.stats.StatsAccumulator.update') as update:
+                LoadDataset.load_higgs()
+                self.assertMatchesData(LoadDataset.describe('higgs'), data, target)
+            update.assert_not_called()
+
+        self.assertEqual(len(batches), 4)
+        self.assertIsNone(LoadDataset.describe('susy', load_path=self.tmp.name + '/saved'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,213 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+import synthetic
+from localserver import serve_dataset
+
+
+class TestStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+        for name, value in [('_cache_dir', self.tmp.name), ('_cache_enabled', True)]:
+            patcher = mock.patch(f'LoadDataset.store.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.server, self.url = serve_dataset(self, 'higgs', 300)
+
+    def test_second_load_hits_the_cache(self):
+
+        data, target = LoadDataset.load_higgs(cache_format='parquet')
+        cached_data, cached_target = LoadDataset.load_higgs()
+
+        self.assertEqual(self.server.requests, ['/higgs.zip'])
+        np.testing.assert_array_equal(cached_data.to_numpy(), data.to_numpy())
+        np.testing.assert_array_equal(cached_target.to_numpy(), target.to_numpy())
+
+    def test_warm_load_equals_the_cold_load(self):
+
+        serve_dataset(self, 'kdd99', 300, self.server)
+        for load in [LoadDataset.load_higgs, LoadDataset.load_kdd99]:
+            for cache_format in ['npy', 'csv', 'parquet']:
+                with self.subTest(load=load.__name__, cache_format=cache_format):
+                    LoadDataset.clear_cache()
+                    data, target = load(cache_format=cache_format)
+                    cached_data, cached_target = load(cache_format=cache_format)
+
+                    # The integer labels of the columns are not turned into strings by the cache
+                    self.assertIsInstance(cached_data.columns[0], (int, np.integer))
+                    pd.testing.assert_frame_equal(cached_data, data)
+                    pd.testing.assert_series_equal(cached_target, target)
+
+    def test_manifest(self):
+
+        LoadDataset.load_higgs(cache_format='npy')
+        manifest = LoadDataset.read_manifest('higgs')
+
+        self.assertEqual(manifest['source'], self.url)
+        self.assertEqual(manifest['rows'], 300)
+        self.assertEqual(manifest['cache_format'], 'npy')
+        self.assertEqual(len(manifest['schema']), 29)
+        self.assertEqual(manifest['schema']['0'], 'float64')
+        self.assertEqual(len(manifest['checksum']), 64)
+
+        entry = os.path.join(self.tmp.name, 'higgs', manifest['checksum'][:16])
+        self.assertTrue(os.path.isdir(os.path.join(entry, 'higgs.npy')))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp.name, 'higgs'))), sorted([manifest['checksum'][:16], 'manifest.json']))
+
+    def test_binary_format_by_default(self):
+
+        # The save_path format stays CSV, the local cache has its own default
+        LoadDataset.load_higgs()
+        self.assertEqual(LoadDataset.read_manifest('higgs')['cache_format'], 'npy')
+
+    def test_save_path_file_is_reused(self):
+
+        out = os.path.join(self.tmp.name, 'out')
+        with mock.patch('LoadDataset.cache.frame_stats', wraps=LoadDataset.frame_stats) as stats:
+            LoadDataset.load_higgs(save_path=out, cache_format='parquet')
+
+        manifest = LoadDataset.read_manifest('higgs')
+        entry = os.path.join(self.tmp.name, 'higgs', manifest['checksum'][:16])
+        self.assertEqual(manifest['cache_format'], 'parquet')
+        self.assertTrue(os.path.samefile(os.path.join(entry, 'higgs.parquet'), os.path.join(out, 'higgs.parquet')))
+        self.assertEqual(stats.call_count, 1)
+        self.assertEqual(manifest['stats'], LoadDataset.describe('higgs', out))
+        self.assertEqual(manifest['rows'], 300)
+
+        data, target = LoadDataset.load_higgs()
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(data.shape, (300, 28))
+
+    def test_statistics_are_computed_once_for_another_format(self):
+
+        out = os.path.join(self.tmp.name, 'out')
+        update = LoadDataset.StatsAccumulator.update
+        with mock.patch.object(LoadDataset.StatsAccumulator, 'update', autospec=True, side_effect=update) as calls:
+            LoadDataset.load_higgs(save_path=out)
+
+        # Only the save_path file is scanned, the npy entry reuses its statistics
+        self.assertEqual(calls.call_count, 1)
+        self.assertEqual(LoadDataset.read_manifest('higgs')['cache_format'], 'npy')
+        self.assertTrue(os.path.exists(os.path.join(out, 'higgs.csv')))
+        self.assertEqual(LoadDataset.read_manifest('higgs')['stats'], LoadDataset.describe('higgs', out))
+
+    def test_cache_false_skips_the_cache(self):
+
+        LoadDataset.load_higgs(cache=False)
+        LoadDataset.load_higgs(cache=False)
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'higgs')))
+
+    def test_changed_source_rebuilds(self):
+
+        LoadDataset.load_higgs(cache_format='parquet')
+        old = LoadDataset.read_manifest('higgs')
+
+        url = self.server.add('/higgs-v2.zip', synthetic.zipped_gzip('HIGGS.csv.gz', synthetic.numeric_csv(200, 28, seed=1)))
+        with mock.patch('LoadDataset.LoadDataset.HIGGS_URL', url):
+            data, target = LoadDataset.load_higgs(cache_format='parquet')
+
+        new = LoadDataset.read_manifest('higgs')
+        self.assertEqual(data.shape, (200, 28))
+        self.assertEqual(new['source'], url)
+        self.assertEqual(new['rows'], 200)
+
+        # The previous entry is replaced, not kept next to the new one
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'higgs', old['checksum'][:16])))
+
+    def test_modified_file_is_stale(self):
+
+        LoadDataset.load_higgs(cache_format='csv')
+        manifest = LoadDataset.read_manifest('higgs')
+        file = os.path.join(self.tmp.name, 'higgs', manifest['checksum'][:16], 'higgs.csv')
+        with open(file, 'a') as f:
+            f.write('1,' + ','.join(['0'] * 28) + '\n')
+
+        data, target = LoadDataset.load_higgs(cache_format='csv')
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(data.shape, (300, 28))
+
+    def test_verify_detects_corruption(self):
+
+        LoadDataset.load_higgs(cache_format='csv')
+        self.assertTrue(LoadDataset.verify_cache('higgs'))
+
+        manifest = LoadDataset.read_manifest('higgs')
+        file = os.path.join(self.tmp.name, 'higgs', manifest['checksum'][:16], 'higgs.csv')
+        stat = os.stat(file)
+        with open(file, 'r+b') as f:
+            f.seek(100)
+            f.write(b'7')
+        # Same size and modification time, only the checksum can tell
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.assertFalse(LoadDataset.verify_cache('higgs'))
+        self.assertIsNone(LoadDataset.read_manifest('higgs'))
+
+        LoadDataset.load_higgs(cache_format='csv')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertTrue(LoadDataset.verify_cache('higgs'))
+
+    def test_dtype_policy_of_the_entry(self):
+
+        LoadDataset.load_higgs(cache_format='parquet', dtype_policy='float32')
+
+        # A float32 copy cannot serve a float64 request, the dataset is rebuilt
+        data, target = LoadDataset.load_higgs(cache_format='parquet')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(data.dtypes.unique().tolist(), [np.dtype('float64')])
+
+        # A float64 copy is converted on read
+        data, target = LoadDataset.load_higgs(cache_format='parquet', dtype_policy='float32')
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(data.dtypes.unique().tolist(), [np.dtype('float32')])
+
+    def test_interrupted_batches_leave_no_entry(self):
+
+        batches = LoadDataset.iter_batches('higgs', chunksize=100, cache_format='parquet')
+        next(batches)
+        batches.close()
+
+        self.assertIsNone(LoadDataset.read_manifest('higgs'))
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, 'higgs')), [])
+
+        batches = list(LoadDataset.iter_batches('higgs', chunksize=100, cache_format='parquet'))
+        data, target = LoadDataset.load_higgs()
+
+        self.assertEqual(len(batches), 3)
+        self.assertEqual(data.shape, (300, 28))
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_failed_build_keeps_the_previous_entry(self):
+
+        LoadDataset.load_higgs(cache_format='parquet')
+        manifest = LoadDataset.read_manifest('higgs')
+
+        with mock.patch('LoadDataset.store.CacheWriter.write', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                LoadDataset.load_higgs(cache=True, load_path=None, save_path=os.path.join(self.tmp.name, 'out'))
+
+        # The entry built from the save_path file fails the same way
+        with mock.patch('LoadDataset.store._link', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                LoadDataset.load_higgs(cache_format='parquet', cache=True, save_path=os.path.join(self.tmp.name, 'out'))
+
+        self.assertEqual(LoadDataset.read_manifest('higgs'), manifest)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp.name, 'higgs'))), sorted([manifest['checksum'][:16], 'manifest.json']))
+        self.assertTrue(LoadDataset.verify_cache('higgs'))
+
+
+if __name__ == '__main__':
+    unittest.main()
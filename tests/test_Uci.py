@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import context as LoadDataset
+
+
+def fake_adult(id):
+    """Stand-in for fetch_ucirepo returning a small Adult-like payload."""
+    features = pd.DataFrame({
+        'age': [39, 50, 38, 53, 28, 37],
+        'workclass': ['State-gov', 'Private', 'Private', np.nan, 'Private', 'Self-emp'],
+        'hours-per-week': [40, 13, 40, 40, 40, 80],
+    })
+    targets = pd.DataFrame({'income': ['<=50K', '>50K', '<=50K.', '>50K.', '<=50K', '>50K']})
+    return SimpleNamespace(data=SimpleNamespace(features=features, targets=targets),
+                           variables=pd.DataFrame({'name': ['age', 'workclass', 'hours-per-week', 'income']}),
+                           metadata={'uci_id': id, 'name': 'Adult'})
+
+
+class TestUci(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.calls = []
+
+        def fetch(id):
+            self.calls.append(id)
+            return fake_adult(id)
+
+        for name, value in [('LoadDataset.store._cache_dir', self.tmp.name), ('LoadDataset.store._cache_enabled', True),
+                            ('LoadDataset.uci._fetch_function', fetch)]:
+            patcher = mock.patch(name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_payload_is_fetched_once(self):
+
+        first = LoadDataset.fetch_uci(2)
+        second = LoadDataset.fetch_uci(2)
+
+        self.assertEqual(self.calls, [2])
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, 'ucimlrepo', '2.pkl')))
+        pd.testing.assert_frame_equal(second.data.features, first.data.features)
+        pd.testing.assert_frame_equal(second.data.targets, first.data.targets)
+        self.assertEqual(second.metadata, {'uci_id': 2, 'name': 'Adult'})
+        self.assertEqual(second.variables['name'].tolist(), ['age', 'workclass', 'hours-per-week', 'income'])
+
+    def test_cache_false_fetches_every_time(self):
+
+        LoadDataset.fetch_uci(2, cache=False)
+        LoadDataset.fetch_uci(2, cache=False)
+
+        self.assertEqual(self.calls, [2, 2])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, 'ucimlrepo')))
+
+    def test_loader_uses_the_payload(self):
+
+        data, target = LoadDataset.load_adult()
+
+        # Without the processed copy the dataset is rebuilt from the payload, not fetched again
+        LoadDataset.clear_cache('adult')
+        cached_data, cached_target = LoadDataset.load_adult(dtype_policy='compact')
+
+        self.assertEqual(self.calls, [2])
+        self.assertEqual(target.tolist(), [0, 1, 0, 1, 0, 1])
+        np.testing.assert_array_equal(cached_data.to_numpy(), data.to_numpy())
+        np.testing.assert_array_equal(cached_target.to_numpy(), target.to_numpy())
+        self.assertEqual(cached_target.dtype, np.dtype('uint8'))
+
+    def test_corrupt_payload_is_fetched_again(self):
+
+        LoadDataset.fetch_uci(2)
+        with open(os.path.join(self.tmp.name, 'ucimlrepo', '2.pkl'), 'wb') as f:
+            f.write(b'not a pickle')
+
+        dataset = LoadDataset.fetch_uci(2)
+
+        self.assertEqual(self.calls, [2, 2])
+        self.assertEqual(dataset.data.features.shape, (6, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()